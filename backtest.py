@@ -0,0 +1,61 @@
+# backtest.py
+"""
+Replay a market-data recording through the strategies and executor.
+
+    python backtest.py recordings/
+    python backtest.py session.jsonl
+    python backtest.py session.jsonl --min-profit 0.2,0.3,0.5 --slippage-tolerance 0.002,0.005
+
+Comma-separated values run every combination and print one report each.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+from config.settings import CONFIG
+from core.backtest import BacktestEngine, load_recording
+
+
+def _floats(value: str):
+    return [float(v) for v in value.split(',')]
+
+
+def _print_report(report: dict):
+    fill_rate = 'n/a' if report['fill_rate'] is None else f"{report['fill_rate']:.1%}"
+    print(f"  ticks={report['ticks']} records={report['records']} opportunities={report['opportunities']} "
+          f"statistical signals={report['statistical_signals']}")
+    print(f"  executions={report['executions']} successful={report['successful']} hedged={report['hedged']} "
+          f"fill rate={fill_rate}")
+    print(f"  pnl={ {c: round(v, 8) for c, v in report['pnl'].items()} }")
+    print(f"  pnl marked={ {c: round(v, 4) for c, v in report['pnl_marked'].items()} } "
+          f"fees={ {c: round(v, 4) for c, v in report['fees'].items()} }")
+    print(f"  {report['ticks_per_second'] or 0:.0f} ticks/s, {report['evaluations_per_second'] or 0:.0f} evaluations/s, "
+          f"{report['simulated_seconds']:.0f}s simulated in {report['wall_seconds']:.2f}s "
+          f"({report['speedup'] or 0:.0f}x real time)")
+
+
+async def main(args: argparse.Namespace):
+    for min_profit, slippage_tolerance in itertools.product(args.min_profit, args.slippage_tolerance):
+        config = dict(CONFIG, min_profit=min_profit, slippage_tolerance=slippage_tolerance)
+        if args.taker_fee is not None:
+            config['default_taker_fee'] = args.taker_fee
+        engine = BacktestEngine(config, tick_ms=args.tick_ms)
+        report = await engine.run(load_recording(args.recording, args.start, args.end))
+        print(f"min_profit={min_profit} slippage_tolerance={slippage_tolerance}")
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', help='Recording directory (record_path) or JSON-lines file')
+    parser.add_argument('--start', type=int, help='Replay from this timestamp (ms)')
+    parser.add_argument('--end', type=int, help='Replay up to this timestamp (ms, exclusive)')
+    parser.add_argument('--min-profit', type=_floats, default=[CONFIG['min_profit']])
+    parser.add_argument('--slippage-tolerance', type=_floats, default=[CONFIG['slippage_tolerance']])
+    parser.add_argument('--taker-fee', type=float, help='Taker fee for every venue (default: default_taker_fee)')
+    parser.add_argument('--tick-ms', type=int, help='Replay tick length (default: poll_interval)')
+    parser.add_argument('--verbose', action='store_true', help='Log every execution')
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    asyncio.run(main(args))
@@ -0,0 +1,80 @@
+# benchmarks/bench_currency_graph.py
+"""
+Currency graph benchmark.
+
+Builds a synthetic multi-exchange market graph with consistent prices plus a
+few planted arbitrage cycles, then times the per-tick work of the triangular
+engine: repricing the markets whose books changed and running the
+negative-cycle search.
+
+    python -m benchmarks.bench_currency_graph --exchanges 5 --currencies 200 --markets 1000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from strategies.currency_graph import CurrencyGraph
+
+
+def build_graph(args: argparse.Namespace, rng: random.Random):
+    currencies = [f'C{i}' for i in range(args.currencies)]
+    values = {c: rng.lognormvariate(0, 2) for c in currencies}
+    graph = CurrencyGraph()
+    markets = []
+    for e in range(args.exchanges):
+        ex_id = f'ex{e}'
+        pairs = set()
+        while len(pairs) < args.markets:
+            base, quote = rng.sample(currencies, 2)
+            if (quote, base) not in pairs:
+                pairs.add((base, quote))
+        for base, quote in sorted(pairs):
+            symbol = f'{base}/{quote}'
+            graph.add_market(ex_id, symbol, base, quote, fee=args.fee)
+            markets.append((ex_id, symbol, base, quote))
+    return graph, markets, values
+
+
+def quote_market(graph, market, values, rng, spread=0.0005, edge=0.0):
+    ex_id, symbol, base, quote = market
+    fair = values[base] / values[quote] * (1 + rng.gauss(0, 0.0002) + edge)
+    graph.update_market(ex_id, symbol, fair * (1 - spread), fair * (1 + spread))
+
+
+def main(args: argparse.Namespace):
+    rng = random.Random(7)
+    graph, markets, values = build_graph(args, rng)
+    for market in markets:
+        quote_market(graph, market, values, rng)
+
+    timings_ms = []
+    found = []
+    for tick in range(args.ticks):
+        changed = rng.sample(markets, min(args.changed, len(markets)))
+        started = time.perf_counter()
+        for i, market in enumerate(changed):
+            # Plant a mispriced market now and then so cycles exist to be found
+            quote_market(graph, market, values, rng, edge=0.02 if i == 0 and tick % 5 == 0 else 0.0)
+        cycles = graph.find_cycles(max_length=args.max_length, min_profit=0.0)
+        timings_ms.append((time.perf_counter() - started) * 1000)
+        found.append(len(cycles))
+
+    print(f"graph:        {len(graph.nodes)} nodes, {graph.edge_count} edges "
+          f"({args.exchanges} exchanges x {args.markets} markets)")
+    print(f"per tick:     {args.changed} repriced markets + cycle search (max length {args.max_length})")
+    print(f"latency ms:   mean={statistics.mean(timings_ms):.3f} p50={statistics.median(timings_ms):.3f} "
+          f"max={max(timings_ms):.3f}")
+    print(f"cycles found: {sum(found)} over {args.ticks} ticks")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exchanges', type=int, default=5)
+    parser.add_argument('--currencies', type=int, default=200)
+    parser.add_argument('--markets', type=int, default=1000, help='Markets per exchange')
+    parser.add_argument('--changed', type=int, default=100, help='Markets repriced per tick')
+    parser.add_argument('--max-length', type=int, default=4)
+    parser.add_argument('--fee', type=float, default=0.001)
+    parser.add_argument('--ticks', type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,100 @@
+# benchmarks/bench_indicators.py
+"""
+Incremental indicator benchmark and pandas parity check.
+
+Feeds a synthetic candle stream bar by bar (including in-progress updates of
+the newest bar) into IndicatorEngine and compares every tick's values with
+calculate_indicators recomputed on the full window, then times both paths.
+Exits non-zero if any value differs beyond the tolerance.
+
+    python -m benchmarks.bench_indicators --bars 3000
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import calculate_indicators
+from utils.indicators import OHLCV_COLUMNS, IndicatorEngine
+
+
+def synthetic_candles(bars: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.002, bars)
+    steps[rng.random(bars) < 0.05] = 0.0  # Unchanged closes
+    steps[bars // 3:bars // 3 + 30] = 0.0  # A flat stretch longer than the window
+    close = 60000 * np.exp(np.cumsum(steps))
+    ts = np.arange(bars, dtype=np.float64) * 300000
+    return np.column_stack([ts, close, close * 1.001, close * 0.999, close, rng.random(bars)])
+
+
+def parity(candles: np.ndarray, capacity: int, tolerance: float) -> float:
+    engine = IndicatorEngine(window=20, capacity=capacity)
+    worst = 0.0
+    for i, candle in enumerate(candles):
+        # Every bar first arrives in progress and is then finalized
+        partial = candle.copy()
+        partial[4] = candle[1]
+        engine.update(partial)
+        engine.update(candle)
+
+        window = pd.DataFrame(candles[max(0, i + 1 - capacity):i + 1], columns=OHLCV_COLUMNS)
+        expected = calculate_indicators(window)
+        got = engine.latest()
+        for name in ('bollinger_upper', 'bollinger_lower', 'rsi'):
+            if name not in expected:
+                assert math.isnan(got[name]), (i, name, got[name])
+                continue
+            want = expected[name].iloc[-1]
+            if math.isnan(want) or math.isnan(got[name]):
+                assert math.isnan(want) and math.isnan(got[name]), (i, name, want, got[name])
+                continue
+            error = abs(want - got[name]) / max(1.0, abs(want))
+            worst = max(worst, error)
+            if error > tolerance:
+                raise AssertionError(f"bar {i} {name}: pandas={want} incremental={got[name]}")
+    return worst
+
+
+def throughput(candles: np.ndarray, capacity: int):
+    engine = IndicatorEngine(window=20, capacity=capacity)
+    started = time.perf_counter()
+    for candle in candles:
+        engine.update(candle)
+        engine.latest()
+    incremental = (time.perf_counter() - started) / len(candles)
+
+    sample = candles[-200:]
+    history = pd.DataFrame(candles[:capacity], columns=OHLCV_COLUMNS)
+    started = time.perf_counter()
+    for candle in sample:
+        history = pd.concat([history, pd.DataFrame([candle], columns=OHLCV_COLUMNS)]).tail(capacity)
+        calculate_indicators(history)
+    recompute = (time.perf_counter() - started) / len(sample)
+    return incremental, recompute
+
+
+def main(args: argparse.Namespace):
+    candles = synthetic_candles(args.bars)
+    worst = parity(candles[:args.parity_bars], args.capacity, args.tolerance)
+    print(f"parity:       {min(args.parity_bars, args.bars)} bars, max relative error {worst:.2e}")
+    incremental, recompute = throughput(candles, args.capacity)
+    print(f"incremental:  {incremental * 1e6:.2f} us/bar")
+    print(f"pandas:       {recompute * 1e6:.2f} us/bar (concat + full recompute on {args.capacity} rows)")
+    print(f"speedup:      {recompute / incremental:.0f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=3000)
+    parser.add_argument('--parity-bars', type=int, default=1500)
+    parser.add_argument('--capacity', type=int, default=1000)
+    parser.add_argument('--tolerance', type=float, default=1e-8)
+    try:
+        main(parser.parse_args())
+    except AssertionError as e:
+        print(f"parity check failed: {e}")
+        sys.exit(1)
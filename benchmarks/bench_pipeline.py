@@ -0,0 +1,217 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end tick pipeline benchmark against simulated exchanges.
+
+For every combination of exchange and pair counts, runs the bot's event-driven
+MarketPipeline (REST polling feeds, cross-exchange detector, TradeExecutor with
+its balance cache and scheduler) against SimulatedExchange venues with
+books following a shared random walk (plus each venue's own deviation from
+it), request latency and injected errors, and reports:
+
+  - book updates (ticks) applied and detector evaluations per second
+  - detect-to-order latency percentiles: detection to each leg's submission
+  - executions, the share of them that lost money or left a leg unfilled,
+    and the realized P&L after fees
+  - traced memory per tracked (exchange, pair) book, measured in a separate
+    run under tracemalloc so it does not slow the throughput run
+
+With --slow-latency the first venue answers that much slower than the
+others, so its books are older and its orders arrive later. With
+--latency-aware every configuration is run a second time with a
+LatencyTracker feeding the detector's drift discount (volatility set to the
+simulated one), to compare how many executions were wasted on quotes that
+had moved by the time the orders arrived.
+
+With --min-ticks or --max-p99-ms the exit status is non-zero when any
+configuration misses them, so it can gate a deployment.
+
+    python -m benchmarks.bench_pipeline --exchanges 2 4 --pairs 5 20 50 --duration 3
+    python -m benchmarks.bench_pipeline --exchanges 3 --pairs 20 --slow-latency 0.3 --latency-aware
+"""
+import argparse
+import asyncio
+import contextvars
+import logging
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from core.pipeline import MarketPipeline
+from core.trade_executor import TradeExecutor
+from exchanges.api_utils import APIUtils
+from exchanges.latency_tracker import LatencyTracker
+from exchanges.simulated_exchange import PriceWalk, SimulatedExchange
+from strategies.arbitrage import ArbitrageStrategy
+
+_detected_at = contextvars.ContextVar('detected_at', default=None)
+
+
+def build_exchanges(count: int, pairs: list, args: argparse.Namespace) -> dict:
+    rng = random.Random(1)
+    prices = {pair: 10.0 + rng.random() * 1000 for pair in pairs}
+    walk = PriceWalk(args.volatility, seed=count)
+    exchanges = {}
+    for i in range(count):
+        exchange = SimulatedExchange(
+            f'ex{i}', latency=args.slow_latency if i == 0 and args.slow_latency else args.latency, latency_jitter=args.jitter, error_rate=args.error_rate,
+            depth=args.depth, volatility=args.venue_volatility, walk=walk, consume_liquidity=False, seed=i,
+            balances={currency: 1e12 for pair in pairs for currency in pair.split('/')}
+        )
+        for pair in pairs:
+            exchange.add_market(pair, prices[pair] * (1 + rng.gauss(0, 0.001)), level_size=args.level_size)
+        exchanges[exchange.id] = exchange
+    return exchanges
+
+
+def realized(result: dict) -> float:
+    """Quote P&L of an execution's matched amount, after both legs' fees."""
+    buy, sell = result.get('buy_order') or {}, result.get('sell_order') or {}
+    matched = min(result['filled_buy'], result['filled_sell'])
+    if not matched:
+        return 0.0
+    return matched * ((sell['average'] - sell['fee']['cost'] / sell['filled'])
+                      - (buy['average'] + buy['fee']['cost'] / buy['filled']))
+
+
+def instrument(executor: TradeExecutor, exchanges: dict, latencies: list):
+    """Record the time from detection to every limit order reaching a venue."""
+    execute_trade = executor._execute_trade
+
+    async def timed_execute_trade(opportunity, snapshot=None):
+        _detected_at.set(opportunity.detected_at)  # Scheduled executions each run in their own task
+        return await execute_trade(opportunity, snapshot)
+
+    executor._execute_trade = timed_execute_trade
+    for exchange in exchanges.values():
+        def timed_create_order(symbol, type, side, amount, price=None, params={}, create_order=exchange.create_order):
+            detected_at = _detected_at.get()
+            if detected_at is not None and type == 'limit':
+                latencies.append(time.monotonic() - detected_at)
+            return create_order(symbol, type, side, amount, price, params)
+        timed_create_order.__name__ = 'create_order'
+        exchange.create_order = timed_create_order
+
+
+async def measure(exchange_count: int, pair_count: int, args: argparse.Namespace, duration: float,
+                  trace_memory: bool = False, latency_aware: bool = False) -> dict:
+    pairs = [f'C{i}/USD' for i in range(pair_count)]
+    config = {
+        'symbol_pairs': pairs, 'min_profit': args.min_profit, 'trade_amount': 0.01, 'max_trade_amount': 0.1,
+        'min_trade_amount': 0.001, 'slippage_tolerance': 0.005, 'cooldown': 0, 'max_concurrent_trades': 16,
+        'poll_interval': 1.0, 'snapshot_max_age': 1.0, 'feed_interval': args.feed_interval,
+        'order_timeout': 0.0, 'order_poll_interval': 0.01, 'balance_refresh_interval': 3600,
+        'task_restart_delay': 0.1, 'drift_z': args.drift_z
+    }
+    exchanges = build_exchanges(exchange_count, pairs, args)
+    if trace_memory:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    tracker = LatencyTracker(config) if latency_aware else None
+    APIUtils.set_latency_tracker(tracker)
+    executor = TradeExecutor(exchanges, config)
+    await executor.start()
+    pipeline = MarketPipeline(exchanges, config, executor, latency=tracker)
+    volatility = math.hypot(args.volatility, args.venue_volatility)  # Of each venue's quotes
+    strategy = ArbitrageStrategy(exchanges, config, latency=tracker, volatility=lambda pair: volatility)
+    pipeline.subscribe('cross_exchange', strategy.find_arbitrage, per_pair=True)
+    latencies, executions = [], []
+    instrument(executor, exchanges, latencies)
+    executor.execution_engine.add_listener(lambda result: executions.append(result))
+
+    task = asyncio.create_task(pipeline.run(poll=True))
+    await asyncio.sleep(args.warmup)
+    latencies.clear()
+    executions.clear()
+    updates, evaluations = pipeline.stats['updates'], pipeline.stats['evaluations']
+    calls, errors = sum(ex.calls for ex in exchanges.values()), sum(ex.errors for ex in exchanges.values())
+    started = time.perf_counter()
+    await asyncio.sleep(duration)
+    elapsed = time.perf_counter() - started
+    pnl = [realized(execution) for execution in executions]
+    result = {
+        'ticks_per_sec': (pipeline.stats['updates'] - updates) / elapsed,
+        'evaluations_per_sec': (pipeline.stats['evaluations'] - evaluations) / elapsed,
+        'orders': len(latencies),
+        'latencies_ms': np.array(latencies) * 1000,
+        'executions': len(executions),
+        'wasted': sum(1 for execution, value in zip(executions, pnl) if not execution['success'] or value <= 0),
+        'pnl': sum(pnl),
+        'error_share': (sum(ex.errors for ex in exchanges.values()) - errors)
+                       / max(1, sum(ex.calls for ex in exchanges.values()) - calls)
+    }
+    if trace_memory:
+        result['bytes_per_book'] = (tracemalloc.get_traced_memory()[0] - baseline) / (exchange_count * pair_count)
+        tracemalloc.stop()
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await executor.close()
+    APIUtils.set_latency_tracker(None)
+    return result
+
+
+async def run(args: argparse.Namespace) -> int:
+    APIUtils.configure_cache(order_book_ttl=0.0)  # Every poll reaches the venue
+    failures = []
+    slow = f", ex0 latency={args.slow_latency * 1000:.0f}ms" if args.slow_latency else ""
+    print(f"venues: latency={args.latency * 1000:.0f}ms (+{args.jitter * 1000:.0f}ms jitter){slow}, "
+          f"error rate={args.error_rate:.1%}, volatility={args.volatility}/sqrt(s) "
+          f"(+{args.venue_volatility} per venue), depth={args.depth}, "
+          f"feed interval={args.feed_interval * 1000:.0f}ms")
+    print(f"{'exch':>4} {'pairs':>5} {'scoring':>7} {'ticks/s':>9} {'evals/s':>9} {'orders':>7} "
+          f"{'d2o p50':>8} {'d2o p99':>8} {'d2o max':>8} {'execs':>6} {'wasted':>7} {'pnl':>9} "
+          f"{'KiB/book':>9} {'errors':>7}")
+    for exchange_count in args.exchanges:
+        for pair_count in args.pairs:
+            memory = await measure(exchange_count, pair_count, args, args.memory_duration, trace_memory=True)
+            for latency_aware in ([False, True] if args.latency_aware else [False]):
+                result = await measure(exchange_count, pair_count, args, args.duration, latency_aware=latency_aware)
+                ms = result['latencies_ms']
+                p50, p99 = (np.percentile(ms, 50), np.percentile(ms, 99)) if len(ms) else (np.nan, np.nan)
+                print(f"{exchange_count:>4} {pair_count:>5} {'aware' if latency_aware else 'naive':>7} "
+                      f"{result['ticks_per_sec']:>9,.0f} {result['evaluations_per_sec']:>9,.0f} "
+                      f"{result['orders']:>7} {p50:>8.2f} {p99:>8.2f} {ms.max() if len(ms) else np.nan:>8.2f} "
+                      f"{result['executions']:>6} {result['wasted'] / max(1, result['executions']):>7.1%} "
+                      f"{result['pnl']:>9.3f} {memory['bytes_per_book'] / 1024:>9.1f} {result['error_share']:>7.1%}")
+                if args.min_ticks and result['ticks_per_sec'] < args.min_ticks:
+                    failures.append(f"{exchange_count}x{pair_count}: {result['ticks_per_sec']:,.0f} ticks/s")
+                if args.max_p99_ms and len(ms) and p99 > args.max_p99_ms:
+                    failures.append(f"{exchange_count}x{pair_count}: detect-to-order p99 {p99:.2f} ms")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exchanges', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--pairs', type=int, nargs='+', default=[5, 20, 50])
+    parser.add_argument('--latency', type=float, default=0.005, help='Seconds per simulated request')
+    parser.add_argument('--jitter', type=float, default=0.002)
+    parser.add_argument('--slow-latency', type=float, default=0.0, help='Seconds per request on the first venue')
+    parser.add_argument('--latency-aware', action='store_true',
+                        help='Also run every configuration with latency and drift aware scoring')
+    parser.add_argument('--error-rate', type=float, default=0.005, help='Share of requests failing with a network error')
+    parser.add_argument('--volatility', type=float, default=0.002, help='Relative mid price stdev per sqrt(second)')
+    parser.add_argument('--venue-volatility', type=float, default=0.001,
+                        help='Stdev per sqrt(second) of each venue\'s deviation from the shared price')
+    parser.add_argument('--drift-z', type=float, default=2.0, help='Drift stdevs deducted by latency aware scoring')
+    parser.add_argument('--depth', type=int, default=20, help='Levels per book side')
+    parser.add_argument('--level-size', type=float, default=0.05)
+    parser.add_argument('--min-profit', type=float, default=0.05, help='Percent, low enough to trade regularly')
+    parser.add_argument('--feed-interval', type=float, default=0.05)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--memory-duration', type=float, default=1.0)
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--min-ticks', type=float, default=0.0, help='Fail below this many ticks/s')
+    parser.add_argument('--max-p99-ms', type=float, default=0.0, help='Fail above this detect-to-order p99')
+    parser.add_argument('--verbose', action='store_true', help='Keep the bot\'s logging (it slows the run)')
+    parsed = parser.parse_args()
+    if not parsed.verbose:
+        logging.disable(logging.ERROR)  # Injected errors and every execution would otherwise be logged
+    sys.exit(asyncio.run(run(parsed)))
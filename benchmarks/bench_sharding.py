@@ -0,0 +1,106 @@
+# benchmarks/bench_sharding.py
+"""
+Sharded scanning benchmark.
+
+Splits a synthetic universe of pairs across 1..N scanner processes (see
+core/sharding.py), each generating its own books for every exchange and
+running cross-exchange detection, and reports aggregate pair evaluations per
+second as the worker count grows. Opportunities travel to the collecting
+process over the same Unix socket channel the bot uses.
+
+    python -m benchmarks.bench_sharding --pairs 256 --exchanges 6 --workers 1,2,4,8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+
+from core.market_snapshot import MarketSnapshot
+from core.sharding import OpportunityServer, run_shard, shard_config, shard_pairs
+from exchanges.simulated_exchange import SimulatedExchange
+
+
+class SyntheticMarketSource:
+    """Random-walk books for a shard's pairs on every exchange, produced as fast as they are consumed."""
+
+    def __init__(self, config: dict):
+        self.pairs = config['symbol_pairs']
+        self.depth = config['bench_depth']
+        self.exchanges = {f'ex{i}': SimulatedExchange(f'ex{i}', taker_fee=0.001)
+                          for i in range(config['bench_exchanges'])}
+        self.rng = random.Random(hash(tuple(self.pairs)))
+        self.mids = {pair: 100.0 + self.rng.random() * 100 for pair in self.pairs}
+
+    async def next_snapshot(self) -> MarketSnapshot:
+        order_books = {}
+        for pair in self.pairs:
+            mid = self.mids[pair] = self.mids[pair] * (1 + self.rng.gauss(0, 0.0005))
+            per_ex = order_books[pair] = {}
+            for ex_id in self.exchanges:
+                m = mid * (1 + self.rng.gauss(0, 0.002))
+                per_ex[ex_id] = {
+                    'bids': [[m * (1 - 0.0005 * i), 0.05] for i in range(1, self.depth + 1)],
+                    'asks': [[m * (1 + 0.0005 * i), 0.05] for i in range(1, self.depth + 1)]
+                }
+        return MarketSnapshot.build(order_books, {}, max_age=1.0)
+
+    async def close(self):
+        pass
+
+
+async def measure(workers: int, args: argparse.Namespace) -> dict:
+    pairs = [f'C{i}/USD' for i in range(args.pairs)]
+    config = {'min_profit': 0.3, 'max_trade_amount': 0.1, 'trade_amount': 0.01, 'poll_interval': 0,
+              'bench_exchanges': args.exchanges, 'bench_depth': args.depth}
+    socket_path = os.path.join(tempfile.gettempdir(), f'bench_sharding_{os.getpid()}.sock')
+    stats = []
+
+    async def collect(shard_id, opportunities):
+        pass
+
+    server = OpportunityServer(socket_path, collect, on_message=stats.append)
+    await server.start()
+    shards = shard_pairs(pairs, workers)
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_shard, args=(i, shard_config(config, group, len(shards)), socket_path,
+                                                SyntheticMarketSource, args.duration))
+        for i, group in enumerate(shards)
+    ]
+    for process in processes:
+        process.start()
+    while len(stats) < len(processes):
+        await asyncio.sleep(0.05)
+    for process in processes:
+        process.join()
+    await server.stop()
+
+    evaluations = sum(s['pair_evaluations'] for s in stats)
+    seconds = max(s['seconds'] for s in stats)
+    return {'workers': len(shards), 'evaluations_per_second': evaluations / seconds,
+            'opportunities': server.stats['opportunities']}
+
+
+async def run(args: argparse.Namespace):
+    print(f"{args.pairs} pairs x {args.exchanges} exchanges, {args.depth} levels, "
+          f"{args.duration:.0f}s per run, {os.cpu_count()} CPUs available")
+    baseline = None
+    for workers in args.workers:
+        result = await measure(workers, args)
+        baseline = baseline or result['evaluations_per_second']
+        print(f"workers={result['workers']:3d}  {result['evaluations_per_second']:10.0f} pair evaluations/s  "
+              f"scaling={result['evaluations_per_second'] / baseline:.2f}x  "
+              f"opportunities published={result['opportunities']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=256)
+    parser.add_argument('--exchanges', type=int, default=6)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--workers', type=lambda v: [int(w) for w in v.split(',')],
+                        default=[w for w in (1, 2, 4, 8, 16) if w <= max(1, os.cpu_count() or 1)] or [1])
+    asyncio.run(run(parser.parse_args()))
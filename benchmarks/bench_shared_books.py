@@ -0,0 +1,156 @@
+# benchmarks/bench_shared_books.py
+"""
+Shared-memory order book store vs. queue pickling.
+
+A feed process updates every (exchange, pair) book as fast as it can while
+the strategy process turns the latest books into OrderBooks, first through
+a multiprocessing.Queue of ccxt dicts (pickle + from_ccxt), then through
+SharedBookStore (seqlock read of the top levels). Reports books delivered per
+second on each side, reader CPU per book and, for the store, how often a slot
+was rewritten around a read. An in-process section shows the per-book cost without
+scheduling noise.
+
+    python -m benchmarks.bench_shared_books --books 64 --depth 25 --duration 3
+"""
+import argparse
+import multiprocessing
+import pickle
+import queue
+import random
+import time
+
+from utils.order_book import OrderBook
+from utils.shared_book_store import SharedBookStore
+
+
+def _keys(count: int):
+    return [(f'ex{i % 8}', f'C{i // 8}/USD') for i in range(count)]
+
+
+def _book(rng: random.Random, depth: int) -> dict:
+    mid = 100 + rng.random()
+    return {
+        'bids': [[mid - 0.01 * i, 1.0 + rng.random()] for i in range(1, depth + 1)],
+        'asks': [[mid + 0.01 * i, 1.0 + rng.random()] for i in range(1, depth + 1)],
+        'timestamp': int(time.time() * 1000)
+    }
+
+
+def _pregenerated(keys, depth: int, variants: int = 16):
+    rng = random.Random(1)
+    return [[_book(rng, depth) for _ in keys] for _ in range(variants)]
+
+
+def _queue_feed(book_queue, keys, depth, duration, written):
+    books = _pregenerated(keys, depth)
+    end = time.perf_counter() + duration
+    n = 0
+    while time.perf_counter() < end:
+        for key, book in zip(keys, books[n % len(books)]):
+            try:
+                book_queue.put((key, book), timeout=0.1)
+                written.value += 1
+            except queue.Full:
+                pass
+        n += 1
+
+
+def _shm_feed(name, keys, depth, duration, written):
+    store = SharedBookStore.attach(name, keys, depth)
+    books = _pregenerated(keys, depth)
+    end = time.perf_counter() + duration
+    n = 0
+    while time.perf_counter() < end:
+        for (exchange_id, pair), book in zip(keys, books[n % len(books)]):
+            store.write(exchange_id, pair, book)
+        written.value += len(keys)
+        n += 1
+    store.close()
+
+
+def cross_process(args: argparse.Namespace):
+    keys = _keys(args.books)
+    context = multiprocessing.get_context('spawn')
+
+    # Queue of pickled ccxt dicts
+    book_queue = context.Queue(maxsize=10000)
+    written = context.Value('q', 0, lock=False)
+    feed = context.Process(target=_queue_feed, args=(book_queue, keys, args.depth, args.duration, written))
+    feed.start()
+    received, cpu = 0, 0.0
+    end = time.perf_counter() + args.duration
+    while time.perf_counter() < end:
+        started = time.process_time()
+        try:
+            key, book = book_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        OrderBook.from_ccxt(book)
+        cpu += time.process_time() - started
+        received += 1
+    feed.terminate()
+    feed.join()
+    print(f"queue:  feed {written.value / args.duration:10.0f} books/s  "
+          f"reader {received / args.duration:10.0f} books/s  {cpu / max(received, 1) * 1e6:6.1f} us CPU/book")
+
+    # Shared-memory store
+    store = SharedBookStore(keys, depth=args.depth)
+    written = context.Value('q', 0, lock=False)
+    feed = context.Process(target=_shm_feed, args=(store.name, keys, args.depth, args.duration, written))
+    feed.start()
+    reads, cpu, torn = 0, 0.0, 0
+    end = time.perf_counter() + args.duration
+    while time.perf_counter() < end:
+        started = time.process_time()
+        for exchange_id, pair in keys:
+            seq = store.version(exchange_id, pair)
+            if store.read(exchange_id, pair, levels=args.levels) is not None:
+                reads += 1
+                torn += store.version(exchange_id, pair) != seq
+        cpu += time.process_time() - started
+    feed.join()
+    print(f"shm:    feed {written.value / args.duration:10.0f} books/s  "
+          f"reader {reads / args.duration:10.0f} books/s  {cpu / max(reads, 1) * 1e6:6.1f} us CPU/book  "
+          f"(slot changed during {torn / max(reads, 1):.1%} of reads)")
+    store.close()
+    store.unlink()
+
+
+def in_process(args: argparse.Namespace):
+    keys = _keys(args.books)
+    books = _pregenerated(keys, args.depth, variants=1)[0]
+    rounds = max(1, 20000 // len(keys))
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for key, book in zip(keys, books):
+            OrderBook.from_ccxt(pickle.loads(pickle.dumps((key, book)))[1])
+    pickled = (time.perf_counter() - started) / (rounds * len(keys))
+
+    store = SharedBookStore(keys, depth=args.depth)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for (exchange_id, pair), book in zip(keys, books):
+            store.write(exchange_id, pair, book)
+    write = (time.perf_counter() - started) / (rounds * len(keys))
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for exchange_id, pair in keys:
+            store.read(exchange_id, pair, levels=args.levels)
+    read = (time.perf_counter() - started) / (rounds * len(keys))
+    store.close()
+    store.unlink()
+    print(f"in-process per book: pickle+unpickle+from_ccxt {pickled * 1e6:.1f} us | "
+          f"store write {write * 1e6:.1f} us, store read {read * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=64, help='(exchange, pair) keys')
+    parser.add_argument('--depth', type=int, default=25, help='Levels per side written by the feed')
+    parser.add_argument('--levels', type=int, default=None, help='Top levels read by the strategy (default: all)')
+    parser.add_argument('--duration', type=float, default=3.0)
+    args = parser.parse_args()
+    print(f"{args.books} books, depth {args.depth}, reading {args.levels or args.depth} levels")
+    in_process(args)
+    cross_process(args)
@@ -0,0 +1,158 @@
+# benchmarks/bench_statistical.py
+"""
+Multi-pair statistical arbitrage benchmark and parity check.
+
+Builds a synthetic universe of instruments (several exchanges quoting groups
+of co-moving pairs), feeds one new bar per instrument at a time into a
+CandleStore, and times StatisticalArbitrageStrategy.analyze, which updates
+the SpreadMatrix incrementally and scores every instrument pair. For
+comparison the same statistics (hedge ratio, z-score and lag-1
+autocorrelation of every pair) are recomputed from the full window on every
+bar with batched NumPy, and on a sample of pairs with a per-pair
+least-squares fit. The matrix update costs the same at any window length
+while the recompute grows with it; --sweep repeats the comparison over
+several windows to show where the two cross.
+
+Exits non-zero if the incremental statistics drift from the recomputed ones
+beyond the tolerance, or if analyze exceeds the per-bar budget at p99.
+
+    python -m benchmarks.bench_statistical --instruments 300 --window 100 --bars 200
+    python -m benchmarks.bench_statistical --window 100 --bars 30 --sweep 25 50 250 500
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+
+from strategies.statistical import StatisticalArbitrageStrategy
+from utils.candle_store import CandleStore
+
+STEP_MS = 300000
+BUDGET_MS = 15.0  # p99 at the default size is ~11 ms; before batching the feed and reusing buffers it was ~23
+
+
+def synthetic_closes(instruments: int, bars: int, groups: int, seed: int = 1) -> np.ndarray:
+    """Closes (bars x instruments): a random-walk factor per group plus mean-reverting noise."""
+    rng = np.random.default_rng(seed)
+    factors = np.cumsum(rng.normal(0, 0.002, (bars, groups)), axis=0)
+    loadings = rng.uniform(0.5, 1.5, instruments)
+    group = np.arange(instruments) % groups
+    noise = np.zeros((bars, instruments))
+    for t in range(1, bars):
+        noise[t] = 0.8 * noise[t - 1] + rng.normal(0, 0.001, instruments)
+    return 100 * np.exp(factors[:, group] * loadings + noise)
+
+
+def reference_stats(closes: np.ndarray, window: int, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Spread z-scores and lag-1 autocorrelations recomputed from the window (closed bars) plus the current bar."""
+    logs = np.log(closes) - np.log(closes[0])
+    rows, current = logs[-window - 1:-1], logs[-1]
+    mean = rows.mean(axis=0)
+    centered = rows - mean
+    cov = centered.T @ centered / window
+    beta = cov[x, y] / cov[x, x]
+    spread_mean = mean[y] - beta * mean[x]
+    spread_var = cov[y, y] - beta * cov[x, y]
+    z = ((current[y] - beta * current[x]) - spread_mean) / np.sqrt(spread_var)
+    lagged = rows[1:].T @ rows[:-1] / (window - 1)  # [a, b] = mean of a_t * b_(t-1)
+    lag_cov = (
+        lagged[y, y] - beta * (lagged[y, x] + lagged[x, y]) + beta * beta * lagged[x, x]
+    ) - spread_mean * spread_mean
+    return z, lag_cov / spread_var
+
+
+def per_pair_seconds(closes: np.ndarray, window: int, sample: int) -> float:
+    """Time a per-pair polyfit on `sample` pairs."""
+    logs = np.log(closes[-window - 1:])
+    rng = np.random.default_rng(2)
+    pairs = rng.integers(0, closes.shape[1], (sample, 2))
+    started = time.perf_counter()
+    for i, j in pairs:
+        beta, intercept = np.polyfit(logs[:-1, i], logs[:-1, j], 1)
+        spread = logs[:-1, j] - beta * logs[:-1, i]
+        (logs[-1, j] - beta * logs[-1, i] - spread.mean()) / spread.std()
+    return (time.perf_counter() - started) / sample
+
+
+async def measure(args: argparse.Namespace, window: int, bars: int) -> Dict[str, object]:
+    """Time analyze over `bars` new bars at `window`, with the recompute on the same bars for comparison."""
+    history = window + 1
+    closes = synthetic_closes(args.instruments, history + bars, args.groups)
+    keys = [(f'ex{i % args.exchanges}', f'C{i}/USD') for i in range(args.instruments)]
+    config = {'trade_amount': 0.01, 'stat_window': window, 'stat_entry_z': 2.0,
+              'stat_max_half_life': window / 4, 'default_taker_fee': 0.0005}
+    store = CandleStore(capacity=window * 2, window=20)
+    strategy = StatisticalArbitrageStrategy(config)
+
+    def add_bar(t: int):
+        for k, (ex_id, pair) in enumerate(keys):
+            c = closes[t, k]
+            store.upsert(ex_id, pair, '5m', [[t * STEP_MS, c, c, c, c, 1.0]], allow_gaps=True)
+
+    for t in range(history):
+        add_bar(t)
+    started = time.perf_counter()
+    await strategy.analyze(store, '5m')
+    warmup = time.perf_counter() - started
+
+    order = [keys.index(instrument) for instrument in strategy.matrix.instruments]  # Matrix column order
+    timings, evaluate, recompute, signals, worst = [], [], [], 0, 0.0
+    for t in range(history, history + bars):
+        add_bar(t)
+        started = time.perf_counter()
+        opportunities = await strategy.analyze(store, '5m')
+        timings.append(time.perf_counter() - started)
+        signals += len(opportunities)
+        started = time.perf_counter()
+        stats = strategy.matrix.evaluate()
+        evaluate.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        ref_z, ref_phi = reference_stats(closes[:t + 1, order], window, stats['x'], stats['y'])
+        recompute.append(time.perf_counter() - started)
+        for got, ref in ((stats['z'], ref_z), (stats['phi'], ref_phi)):
+            finite = np.isfinite(ref) & np.isfinite(got)
+            worst = max(worst, float(np.max(np.abs(got[finite] - ref[finite]), initial=0.0)))
+    return {'pairs': len(strategy.matrix.x), 'warmup': warmup, 'signals': signals, 'worst': worst,
+            'timings': np.array(timings) * 1000, 'evaluate': np.array(evaluate) * 1000,
+            'recompute': np.array(recompute) * 1000, 'closes': closes}
+
+
+async def run(args: argparse.Namespace) -> int:
+    result = await measure(args, args.window, args.bars)
+    ms, recompute = result['timings'], result['recompute']
+    per_pair = per_pair_seconds(result['closes'], args.window, 200)
+    p99 = np.percentile(ms, 99)
+    print(f"{args.instruments} instruments, {result['pairs']} candidate pairs, window {args.window}, {args.bars} bars")
+    print(f"incremental analyze per bar ms: mean={ms.mean():.2f} p99={p99:.2f} "
+          f"max={ms.max():.2f} (first build {result['warmup'] * 1000:.1f} ms)")
+    print(f"  of which SpreadMatrix.evaluate ms: mean={result['evaluate'].mean():.2f} "
+          f"(the rest reads the CandleStore, closes the row and builds signals)")
+    print(f"full-window NumPy recompute of the same statistics per bar ms: mean={recompute.mean():.2f}")
+    print(f"per-pair polyfit, extrapolated per bar ms: {per_pair * result['pairs'] * 1000:.0f}")
+    print(f"signals: {result['signals']}, max |z|, |phi| difference vs recompute: {result['worst']:.2e}")
+    worst = result['worst']
+    for window in args.sweep:
+        swept = await measure(args, window, args.bars)
+        worst = max(worst, swept['worst'])
+        print(f"window {window:5d}: analyze mean={swept['timings'].mean():.2f} ms, "
+              f"evaluate mean={swept['evaluate'].mean():.2f} ms, recompute mean={swept['recompute'].mean():.2f} ms")
+    within = not args.budget_ms or p99 <= args.budget_ms
+    if args.budget_ms:
+        print(f"budget {args.budget_ms} ms: {'met' if within else 'EXCEEDED'} at p99")
+    return 0 if worst <= args.tolerance and within else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instruments', type=int, default=300)
+    parser.add_argument('--exchanges', type=int, default=4)
+    parser.add_argument('--groups', type=int, default=10, help='Independent price factors')
+    parser.add_argument('--window', type=int, default=100)
+    parser.add_argument('--bars', type=int, default=200)
+    parser.add_argument('--sweep', type=int, nargs='*', default=[], help='More windows to compare at')
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS, help='Per-bar p99 budget for analyze, 0 to skip')
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,93 @@
+# benchmarks/bench_streaming.py
+"""
+Streaming order book benchmark.
+
+Runs the mock feed server and the OrderBookStream client in one process and
+reports delta throughput plus the latency from a feed message being sent to the
+cross-exchange strategy having evaluated the updated books.
+
+    python -m benchmarks.bench_streaming --duration 10 --gap-probability 0.001
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from core.market_snapshot import MarketSnapshot
+from exchanges.mock_feed import MockFeedServer
+from exchanges.order_book_stream import OrderBookStream
+from strategies.arbitrage import ArbitrageStrategy
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else float('nan')
+
+
+async def run(args: argparse.Namespace):
+    exchanges = [f'ex{i}' for i in range(args.exchanges)]
+    symbols = [f'C{i}/USD' for i in range(args.symbols)]
+    config = {'min_profit': 0.3, 'max_trade_amount': 0.1, 'trade_amount': 0.01}
+    strategy = ArbitrageStrategy({ex_id: SimpleNamespace(fees={'taker': 0.001}) for ex_id in exchanges}, config)
+
+    server = MockFeedServer(exchanges, symbols, updates_per_second=args.rate,
+                            gap_probability=args.gap_probability, seed=1)
+    await server.start(port=args.port)
+
+    stream = OrderBookStream(f'ws://127.0.0.1:{args.port}/feed', symbols, depth=args.depth)
+    latencies_ms = []
+    current = {}
+
+    handle_message = stream.handle_message
+
+    async def timed_handle(message):
+        current['sent_ns'] = message.get('sent_ns')
+        await handle_message(message)
+
+    stream.handle_message = timed_handle
+
+    def on_book(book):
+        books = {
+            ex_id: other.to_ccxt(args.depth)
+            for (ex_id, symbol), other in stream.books.items()
+            if symbol == book.symbol and other.synced
+        }
+        strategy.find_arbitrage(MarketSnapshot.build({book.symbol: books}, {}, max_age=1.0))
+        if current.get('sent_ns'):
+            latencies_ms.append((time.time_ns() - current['sent_ns']) / 1e6)
+
+    stream.add_listener(on_book)
+    feed_task = asyncio.create_task(stream.run())
+
+    await asyncio.sleep(args.warmup)
+    start_updates = stream.stats['updates']
+    latencies_ms.clear()
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    elapsed = time.perf_counter() - started
+    applied = stream.stats['updates'] - start_updates
+
+    await stream.close()
+    feed_task.cancel()
+    await server.stop()
+
+    print(f"books:            {len(exchanges)} exchanges x {len(symbols)} symbols")
+    print(f"deltas applied:   {applied} in {elapsed:.2f}s ({applied / elapsed:,.0f} updates/sec)")
+    print(f"gaps / snapshots: {stream.stats['gaps']} / {stream.stats['snapshots']}")
+    if latencies_ms:
+        print(f"update->eval ms:  p50={statistics.median(latencies_ms):.3f} "
+              f"p99={_percentile(latencies_ms, 99):.3f} max={max(latencies_ms):.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exchanges', type=int, default=2)
+    parser.add_argument('--symbols', type=int, default=3)
+    parser.add_argument('--rate', type=float, default=0.0, help='Feed updates/sec (0 = as fast as possible)')
+    parser.add_argument('--depth', type=int, default=25)
+    parser.add_argument('--gap-probability', type=float, default=0.0)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--warmup', type=float, default=0.5)
+    parser.add_argument('--port', type=int, default=8799)
+    asyncio.run(run(parser.parse_args()))
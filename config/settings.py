@@ -13,8 +13,58 @@ CONFIG = {
     'symbol_pairs': ['BTC/USD', 'ETH/USD', 'ETH/BTC'],  # Pairs supported by both CEX.io and Kraken
     'min_profit': 0.3,  # Minimum profit percentage
     'trade_amount': 0.01,  # Base currency amount
-    'cooldown': 30,  # Seconds between trades
+    'cooldown': 30,  # Seconds before an exchange/pair traded on can be traded again
+    'max_concurrent_trades': 4,  # Executions allowed in flight at once
     'slippage_tolerance': 0.005,  # 0.5% slippage tolerance
-    'poll_interval': 2,  # Seconds between market scans
-    'max_trade_amount': 0.1  # Maximum trade amount
+    'poll_interval': 2,  # Seconds between candle updates and statistical scans
+    'feed_interval': 0.25,  # Seconds between REST order book polls of one exchange
+    'feed_max_backoff': 30,  # Longest pause for an exchange whose polls keep failing
+    'update_queue_size': 1024,  # Book updates waiting for the dispatcher (newest per book kept)
+    'opportunity_queue_size': 256,  # Opportunities waiting for the executor (the worst dropped when full)
+    'opportunity_ttl': 1.0,  # Seconds a detected opportunity may wait for an execution slot
+    'snapshot_max_age': 1.5,  # Seconds a market snapshot may be reused before refetching
+    'max_book_age': 2.0,  # Skip a venue's book once this many seconds old by the exchange's timestamp
+    'drift_z': 2.0,  # Stdevs of price drift over the venues' latency deducted from a cross-exchange edge
+    'drift_volatility_window': 30,  # Candles per pair the drift volatility is estimated from
+    'drift_default_volatility': 0.0001,  # Relative price stdev per sqrt(second) until candles give one
+    'latency_ewma_alpha': 0.2,  # Smoothing of per-exchange round trip, order ack and book lag estimates
+    'max_book_lag': 1.0,  # Book lag above a venue's usual is distrusted beyond this; receive time is used instead
+    'clock_offset_alpha': 0.01,  # How fast a venue's estimated clock offset follows lags that rise
+    'max_trade_amount': 0.1,  # Maximum trade amount
+    'min_trade_amount': 0.001,  # Smallest amount worth executing after sizing to available balances
+    'default_taker_fee': 0.0026,  # Taker fee used when an exchange does not report one
+    'triangular_max_length': 4,  # Longest conversion cycle searched by the triangular strategy
+    'ohlcv_timeframe': '5m',  # Candle timeframe stored per (exchange, pair)
+    'statistical_exchange': 'cex',  # Series whose volatility is reported in market conditions
+    'statistical_pair': 'BTC/USD',
+    'stat_window': 100,  # Bars in the rolling hedge ratio / spread z-score window
+    'stat_entry_z': 2.0,  # Spread z-score that signals a statistical opportunity
+    'stat_max_half_life': 25,  # Slowest spread mean reversion accepted, in bars
+    'stat_max_signals': 20,  # Statistical opportunities reported per evaluation
+    'order_timeout': 5.0,  # Seconds to wait for both legs to fill before canceling the rest
+    'order_poll_interval': 0.25,  # Seconds between order status polls
+    'leg_risk_policy': 'hedge',  # 'hedge' completes the short leg at market, 'unwind' reverses the excess
+    'balance_refresh_interval': 30,  # Seconds between background reconciliations of cached balances
+    'max_concurrent_requests': 4,  # In-flight requests per exchange (also the connection pool size)
+    'http_keepalive': 30,  # Seconds an idle pooled connection is kept open
+    'rate_limit_burst': 2,  # Requests an exchange may receive back to back
+    'order_book_cache_ttl': 0.25,  # Seconds a fetched order book (or in-progress candles) is reused by other callers
+    'api_cache_size': 1024,  # Market data responses kept in the fetch cache
+    'rate_limits': {},  # Per exchange: {'rate': req/s, 'burst': n, 'endpoints': {'orders': req/s, ...}}
+    # Exchange markets (precision, limits, fees) kept across restarts, outside the checkout
+    'market_cache_path': '~/.cache/my_xrp_bot/market_cache.json',
+    'market_cache_ttl': 86400,  # Seconds before cached markets are reloaded in the background
+    'market_data_mode': 'poll',  # 'poll' (REST every poll_interval), 'stream' (WebSocket deltas) or 'sharded'
+    'scan_workers': 4,  # Scanner processes in 'sharded' mode, each owning a subset of the pairs
+    'parent_rate_limit_share': 0.25,  # Request budget kept by the executing process in 'sharded' mode
+    'shard_socket': '/tmp/arbitrage_bot.sock',  # Unix socket the scanners publish opportunities to
+    'stream_url': 'ws://127.0.0.1:8765/feed',  # Normalized order book delta feed
+    'stream_depth': 25,  # Levels kept per side when exporting streamed books
+    'metrics_enabled': False,  # Record latency metrics and serve them over HTTP
+    'metrics_host': '127.0.0.1',
+    'metrics_port': 9102,  # Metrics at http://<metrics_host>:<metrics_port>/metrics
+    'record_path': None,  # Directory to record fetched market data to (None disables recording)
+    'record_depth': 25,  # Book levels kept per recorded order book
+    'record_chunk_rows': 1024,  # Rows buffered per recording chunk
+    'record_compression': True  # zlib-compress recorded chunks
 }
\ No newline at end of file
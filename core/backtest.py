@@ -0,0 +1,218 @@
+# core/backtest.py
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from core.execution_scheduler import ExecutionScheduler
+from core.market_snapshot import MarketSnapshot
+from core.opportunity import OpportunityQueue
+from core.trade_executor import TradeExecutor
+from exchanges.simulated_exchange import SimulatedExchange
+from strategies.arbitrage import ArbitrageStrategy
+from strategies.statistical import StatisticalArbitrageStrategy
+from strategies.triangular import TriangularArbitrageStrategy
+from utils.candle_store import CandleStore
+from utils.logger import setup_logger
+from utils.market_recorder import RecordingReader
+
+# Set up logger
+logger = setup_logger('Backtest')
+
+
+class SimulatedClock:
+    """Clock advanced by the replay instead of by wall time (seconds)."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def load_recording(path: str, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[dict]:
+    """
+    Stream records with start <= ts < end (ms) from a recording, in time order.
+
+    `path` is either a MarketRecorder directory, read through memory-mapped
+    segments, or a JSON-lines file with one fetch result per line:
+        {"ts": <ms>, "type": "order_book", "exchange": ..., "symbol": ..., "bids": [...], "asks": [...]}
+        {"ts": <ms>, "type": "ohlcv", "exchange": ..., "symbol": ..., "candles": [[ts, o, h, l, c, v], ...]}
+    """
+    if os.path.isdir(path):
+        reader = RecordingReader(path)
+        try:
+            yield from reader.records(start, end)
+        finally:
+            reader.close()
+        return
+
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                if (start is None or record['ts'] >= start) and (end is None or record['ts'] < end):
+                    yield record
+
+
+class BacktestEngine:
+    def __init__(self, config: dict, tick_ms: Optional[int] = None, balances: Optional[Dict[str, float]] = None):
+        """
+        Replay recorded market data through the live strategies and executor.
+
+        Records are grouped into ticks of `tick_ms` (default: the poll interval).
+        After each tick the strategies see a snapshot of the latest books and
+        the executor trades against SimulatedExchange instances holding those
+        books, so fills are depth-based and pay the venue's taker fee. Time is
+        simulated: cooldowns and timestamps follow the recording, and the replay
+        runs as fast as the strategies can evaluate.
+        """
+        self.config = dict(config, order_timeout=0.0)  # Resting remainders are canceled at once
+        self.tick_ms = tick_ms or int(config['poll_interval'] * 1000)
+        self.initial_balances = dict(balances or {})
+        self.clock = SimulatedClock()
+        self.exchanges: Dict[str, SimulatedExchange] = {}
+        self.candle_store = CandleStore(1000, 20)
+        self.timeframe = config.get('ohlcv_timeframe', '5m')
+
+        self.arbitrage_strategy = ArbitrageStrategy(self.exchanges, self.config)
+        self.triangular_strategy = TriangularArbitrageStrategy(self.exchanges, self.config)
+        self.statistical_strategy = StatisticalArbitrageStrategy(self.config)
+        self.trade_executor = TradeExecutor(self.exchanges, self.config)
+        self.trade_executor.scheduler = ExecutionScheduler(self.config, clock=self.clock)
+        self.trade_executor.queue = OpportunityQueue(self.config.get('opportunity_ttl', 1.0),
+                                                     self.config.get('opportunity_queue_size', 256), clock=self.clock)
+        self.trade_executor.execution_engine.add_listener(self._record_execution)
+
+        self._books: Dict[str, Dict[str, dict]] = defaultdict(dict)  # pair -> exchange -> latest book
+        self._ohlcv: Dict[str, Dict[str, list]] = defaultdict(dict)
+        self._executions: List[dict] = []
+        self.stats = {'ticks': 0, 'records': 0, 'opportunities': 0, 'statistical_signals': 0, 'eval_seconds': 0.0}
+
+    def _exchange(self, exchange_id: str) -> SimulatedExchange:
+        exchange = self.exchanges.get(exchange_id)
+        if exchange is None:
+            exchange = self.exchanges[exchange_id] = SimulatedExchange(
+                exchange_id,
+                taker_fee=self.config.get('default_taker_fee', 0.0026),
+                balances=self.initial_balances,
+                seed=0
+            )
+            if self.initial_balances:
+                # Starting balances are known, so the executor sizes trades to them
+                self.trade_executor.balances.set_balances(exchange_id, self.initial_balances)
+        return exchange
+
+    def _record_execution(self, result: dict):
+        self._executions.append(result)
+
+    def _apply(self, record: dict):
+        ex_id, symbol = record['exchange'], record['symbol']
+        if record['type'] == 'order_book':
+            self._exchange(ex_id).set_order_book(symbol, record)
+            self._books[symbol][ex_id] = record
+        elif record['type'] == 'ohlcv':
+            self._exchange(ex_id)
+            self._ohlcv[symbol][ex_id] = record['candles']
+            self.candle_store.upsert(ex_id, symbol, self.timeframe, record['candles'], allow_gaps=True)
+
+    async def _tick(self, now_ms: int):
+        self.clock.now = now_ms / 1000.0
+        snapshot = MarketSnapshot.build(self._books, self._ohlcv, max_age=math.inf, fetched_at=self.clock.now)
+
+        started = time.perf_counter()
+        opportunities = (
+            self.arbitrage_strategy.find_arbitrage(snapshot)
+            + self.triangular_strategy.find_triangular_arbitrage(snapshot)
+        )
+        statistical_ops = await self.statistical_strategy.analyze(self.candle_store, self.timeframe)
+        self.stats['eval_seconds'] += time.perf_counter() - started
+        self.stats['ticks'] += 1
+        self.stats['opportunities'] += len(opportunities)
+        self.stats['statistical_signals'] += len(statistical_ops)
+
+        if opportunities:
+            # Executions finish inside the tick so the replay stays deterministic
+            await self.trade_executor.execute_trades(opportunities, snapshot)
+            await self.trade_executor.close()
+
+    async def run(self, records: Iterable[dict]) -> dict:
+        """
+        Replay records (ordered by 'ts') and return the backtest report.
+        """
+        started = time.perf_counter()
+        first_ts = last_ts = tick_end = None
+        for record in records:
+            ts = record['ts']
+            if tick_end is not None and ts >= tick_end:
+                await self._tick(last_ts)
+                tick_end = None
+            if tick_end is None:
+                tick_end = (ts // self.tick_ms + 1) * self.tick_ms
+            if first_ts is None:
+                first_ts = ts
+            last_ts = ts
+            self._apply(record)
+            self.stats['records'] += 1
+        if tick_end is not None:
+            await self._tick(last_ts)
+
+        wall_seconds = time.perf_counter() - started
+        simulated_seconds = (last_ts - first_ts) / 1000.0 if first_ts is not None else 0.0
+        return self.report(wall_seconds, simulated_seconds)
+
+    def _mark_prices(self) -> Dict[str, float]:
+        """Latest mid price of every base currency in its quote currency."""
+        marks = {}
+        for pair, per_ex in self._books.items():
+            for book in per_ex.values():
+                if book.get('bids') and book.get('asks'):
+                    marks[pair] = (book['bids'][0][0] + book['asks'][0][0]) / 2
+        return marks
+
+    def report(self, wall_seconds: float, simulated_seconds: float) -> dict:
+        """
+        PnL, fill and throughput figures for the replay so far.
+
+        PnL is the net balance change per currency summed over all venues; the
+        marked-to-market total values each currency in a pair's quote currency
+        at the last mid, and currencies with no such price are left out of it.
+        """
+        pnl: Dict[str, float] = defaultdict(float)
+        fees: Dict[str, float] = defaultdict(float)
+        requested = filled = 0.0
+        for exchange in self.exchanges.values():
+            for currency, total in exchange.balances.items():
+                pnl[currency] += total - self.initial_balances.get(currency, 0.0)
+            for order in exchange.orders.values():
+                requested += order['amount']
+                filled += order['filled']
+                fees[order['fee']['currency']] += order['fee']['cost']
+
+        marks = self._mark_prices()
+        marked: Dict[str, float] = defaultdict(float)
+        for quote in {pair.split('/')[1] for pair in marks}:
+            prices = {pair.split('/')[0]: mid for pair, mid in marks.items() if pair.endswith('/' + quote)}
+            prices[quote] = 1.0
+            marked[quote] = sum(delta * prices[currency] for currency, delta in pnl.items() if currency in prices)
+
+        executions = len(self._executions)
+        eval_seconds = self.stats['eval_seconds']
+        return {
+            **self.stats,
+            'executions': executions,
+            'successful': sum(1 for r in self._executions if r['success']),
+            'hedged': sum(1 for r in self._executions if r['hedge_order'] is not None),
+            'fill_rate': filled / requested if requested else None,
+            'pnl': dict(pnl),
+            'pnl_marked': dict(marked),
+            'fees': dict(fees),
+            'wall_seconds': wall_seconds,
+            'simulated_seconds': simulated_seconds,
+            'ticks_per_second': self.stats['ticks'] / wall_seconds if wall_seconds else None,
+            'evaluations_per_second': self.stats['ticks'] / eval_seconds if eval_seconds else None,
+            'speedup': simulated_seconds / wall_seconds if wall_seconds else None
+        }
@@ -0,0 +1,176 @@
+# core/balance_manager.py
+import asyncio
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from core.opportunity import CrossExchangeOpportunity
+from exchanges.api_utils import APIUtils
+from exchanges.market_cache import MarketTable
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger('BalanceManager')
+
+Resource = Tuple[str, str]  # (exchange_id, currency)
+
+
+class BalanceManager:
+    def __init__(self, exchanges: Dict[str, object], config: dict, markets: Optional[MarketTable] = None):
+        """
+        In-memory view of free and reserved funds per exchange.
+
+        Balances are loaded from the exchanges, then kept current without
+        round trips: funds are reserved when an execution is scheduled, fills
+        are applied as orders report them and reservations are released when
+        the execution ends. A background task reconciles each exchange with
+        fetch_balance every 'balance_refresh_interval' seconds, so pre-trade
+        checks are dictionary lookups.
+
+        Exchanges whose balances have never been loaded are not checked.
+        """
+        self.exchanges = exchanges
+        self.config = config
+        self.api_utils = APIUtils()
+        self.markets = markets or MarketTable(exchanges, config)
+        self.free: Dict[Resource, float] = defaultdict(float)
+        self.reserved: Dict[Resource, float] = defaultdict(float)
+        self.loaded = set()  # Exchanges with known balances
+        self.stats = {'reconciled': 0, 'deferred': 0, 'failed': 0}
+        self._open_reservations: Dict[str, int] = defaultdict(int)  # exchange_id -> reservations outstanding
+        self._generation: Dict[str, int] = defaultdict(int)  # exchange_id -> local changes so far
+        self._task: Optional[asyncio.Task] = None
+
+    def available(self, exchange_id: str, currency: str) -> float:
+        """Free funds not reserved by a scheduled execution."""
+        return self.free[(exchange_id, currency)] - self.reserved[(exchange_id, currency)]
+
+    def _buy_price(self, opportunity: CrossExchangeOpportunity) -> float:
+        """Worst quote cost per unit of the buy leg: limit price plus taker fee."""
+        fee = self.markets.taker_fee(opportunity.buy_exchange, opportunity.pair)
+        return opportunity.buy_price * (1 + self.config['slippage_tolerance']) * (1 + fee)
+
+    def requirements(self, opportunity: CrossExchangeOpportunity, amount: float) -> Dict[Resource, float]:
+        """Funds an execution of `amount` draws on: quote on the buy venue, base on the sell venue."""
+        base, quote = opportunity.pair.split('/')
+        return {
+            (opportunity.buy_exchange, quote): amount * self._buy_price(opportunity),
+            (opportunity.sell_exchange, base): amount
+        }
+
+    def tradable_amount(self, opportunity: CrossExchangeOpportunity, amount: float) -> float:
+        """
+        Largest part of `amount` both legs can fund right now.
+
+        Returns `amount` unchanged when neither venue's balances are known.
+        """
+        base, quote = opportunity.pair.split('/')
+        buy_exchange, sell_exchange = opportunity.buy_exchange, opportunity.sell_exchange
+        if buy_exchange in self.loaded:
+            amount = min(amount, self.available(buy_exchange, quote) / self._buy_price(opportunity))
+        if sell_exchange in self.loaded:
+            amount = min(amount, self.available(sell_exchange, base))
+        return max(amount, 0.0)
+
+    def reserve(self, opportunity: CrossExchangeOpportunity, amount: float) -> Dict[Resource, float]:
+        """Set aside the funds for an execution; pass the result to release() when it ends."""
+        reservation = self.requirements(opportunity, amount)
+        for resource, value in reservation.items():
+            self.reserved[resource] += value
+            self._open_reservations[resource[0]] += 1
+            self._generation[resource[0]] += 1
+        return reservation
+
+    def release(self, reservation: Dict[Resource, float]):
+        for resource, value in reservation.items():
+            self.reserved[resource] -= value
+            if self.reserved[resource] <= 1e-12:
+                del self.reserved[resource]
+            self._open_reservations[resource[0]] -= 1
+
+    def apply_fill(self, exchange_id: str, order: Optional[dict]):
+        """Move funds for an order's filled amount as the exchange will once it settles."""
+        if exchange_id not in self.loaded or not order or not order.get('filled'):
+            return
+        base, quote = order['symbol'].split('/')
+        sign = 1 if order['side'] == 'buy' else -1
+        cost = order.get('cost') or order['filled'] * (order.get('average') or order.get('price') or 0.0)
+        self.free[(exchange_id, base)] += sign * order['filled']
+        self.free[(exchange_id, quote)] -= sign * cost
+        fee = order.get('fee') or {}
+        if fee.get('cost'):
+            self.free[(exchange_id, fee.get('currency') or quote)] -= fee['cost']
+        self._generation[exchange_id] += 1
+
+    def on_execution(self, result: dict):
+        """ExecutionEngine listener: apply the fills of both legs and any hedge."""
+        self.apply_fill(result['buy_exchange'], result.get('buy_order'))
+        self.apply_fill(result['sell_exchange'], result.get('sell_order'))
+        if result.get('hedge_order') is not None:
+            self.apply_fill(result['hedge_exchange'], result['hedge_order'])
+
+    def set_balances(self, exchange_id: str, free: Dict[str, float]):
+        """Replace an exchange's free balances."""
+        for resource in [resource for resource in self.free if resource[0] == exchange_id]:
+            del self.free[resource]
+        for currency, value in free.items():
+            if value:
+                self.free[(exchange_id, currency)] = float(value)
+        self.loaded.add(exchange_id)
+
+    async def refresh(self, exchange_id: str) -> bool:
+        """
+        Reconcile one exchange with its reported free balances.
+
+        Deferred while the exchange has executions in flight, or if local
+        changes happened during the fetch: the report may not reflect them yet.
+        """
+        if self._open_reservations[exchange_id]:
+            self.stats['deferred'] += 1
+            return False
+        generation = self._generation[exchange_id]
+        balance = await self.api_utils.fetch_balance_safely(self.exchanges[exchange_id])
+        if balance is None:
+            self.stats['failed'] += 1
+            logger.warning("Could not refresh balances on %s", exchange_id)
+            return False
+        if self._open_reservations[exchange_id] or self._generation[exchange_id] != generation:
+            self.stats['deferred'] += 1
+            return False
+
+        free = {currency: value for currency, value in (balance.get('free') or {}).items() if value is not None}
+        if exchange_id in self.loaded:
+            drift = {
+                currency: value - self.free[(exchange_id, currency)]
+                for currency, value in free.items()
+                if abs(value - self.free[(exchange_id, currency)]) > 1e-9
+            }
+            if drift:
+                logger.info("Balances on %s corrected by %s", exchange_id, drift)
+        self.set_balances(exchange_id, free)
+        self.stats['reconciled'] += 1
+        return True
+
+    async def refresh_all(self):
+        await asyncio.gather(*(self.refresh(exchange_id) for exchange_id in self.exchanges))
+
+    async def start(self):
+        """Load every exchange's balances, then keep reconciling them in the background."""
+        await self.refresh_all()
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.config.get('balance_refresh_interval', 30))
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                logger.error("Balance reconciliation failed: %s", e)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
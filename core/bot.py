@@ -1,18 +1,24 @@
 # core/bot.py
 import asyncio
-import logging
-from typing import Dict, List
-import pandas as pd
+import multiprocessing
+import time
+from typing import List
 from exchanges.exchange_manager import ExchangeManager
 from strategies.arbitrage import ArbitrageStrategy
 from strategies.triangular import TriangularArbitrageStrategy
 from strategies.statistical import StatisticalArbitrageStrategy
 from core.trade_executor import TradeExecutor
 from core.market_analyzer import MarketAnalyzer
+from core.opportunity import Opportunity
+from core.pipeline import MarketPipeline
+from core.sharding import OpportunityServer, parent_config, run_shard, shard_config, shard_pairs
 from exchanges.api_utils import APIUtils
+from exchanges.latency_tracker import LatencyTracker
+from exchanges.market_cache import MarketCache, MarketTable
+from exchanges.order_book_stream import OrderBookStream
 from utils.logger import setup_logger
-from utils.data_utils import process_order_books
-from utils.risk_management import check_liquidity, calculate_slippage
+from utils import metrics
+from utils.metrics import STRATEGY_EVALUATION, MetricsServer
 
 # Set up logger
 logger = setup_logger('ArbitrageBot', log_file='arbitrage.log')
@@ -23,71 +29,166 @@ class ArbitrageBot:
         Initialize the arbitrage bot with all strategies and components.
         """
         self.config = config
-        self.exchange_manager = ExchangeManager(config)
+        # In sharded mode the scan workers take most of each exchange's request budget
+        self.exchange_manager = ExchangeManager(
+            parent_config(config) if config.get('market_data_mode') == 'sharded' else config
+        )
         self.market_analyzer = MarketAnalyzer(self.exchange_manager.exchanges, config)
-        self.arbitrage_strategy = ArbitrageStrategy(self.exchange_manager.exchanges, config)
-        self.triangular_strategy = TriangularArbitrageStrategy(self.exchange_manager.exchanges, config)
-        self.statistical_strategy = StatisticalArbitrageStrategy(config)
-        self.trade_executor = TradeExecutor(self.exchange_manager.exchanges, config)
+        self.market_table = MarketTable(self.exchange_manager.exchanges, config)
+        self.market_cache = MarketCache(self.exchange_manager.exchanges, config, self.market_table)
+        self.latency = LatencyTracker(config)
+        APIUtils.set_latency_tracker(self.latency)
+        self.arbitrage_strategy = ArbitrageStrategy(
+            self.exchange_manager.exchanges, config, self.market_table,
+            latency=self.latency, volatility=self.market_analyzer.volatility
+        )
+        self.triangular_strategy = TriangularArbitrageStrategy(self.exchange_manager.exchanges, config, self.market_table)
+        self.statistical_strategy = StatisticalArbitrageStrategy(config, self.market_table)
+        self.trade_executor = TradeExecutor(self.exchange_manager.exchanges, config, self.market_table)
         self.api_utils = APIUtils()
+        self.metrics_server = None
 
     async def run(self):
         """
-        Main bot loop with market analysis, arbitrage detection, and trade execution.
+        Run the bot: market data flows through an event-driven pipeline into
+        the detectors, and what they find into the trade executor.
+        """
+        if self.config.get('metrics_enabled'):
+            await self._start_metrics()
+        await self.market_cache.start()
+        await self.trade_executor.start()
+
+        if self.config.get('market_data_mode') == 'sharded':
+            await self._run_sharded()
+            return
+
+        pipeline = self._pipeline()
+        tasks = [('analysis', lambda: self._run_analysis(pipeline))]
+        if self.config.get('market_data_mode') == 'stream':
+            await self._run_streaming(pipeline, tasks)
+        else:
+            await pipeline.run(poll=True, tasks=tasks)
+
+    def _pipeline(self) -> MarketPipeline:
+        """
+        Pipeline with the cross-exchange and triangular detectors subscribed.
+
+        The cross-exchange detector only re-evaluates pairs whose books
+        changed; the triangular one reads every pair a cycle may cross.
+        """
+        pipeline = MarketPipeline(
+            self.exchange_manager.exchanges,
+            self.config,
+            self.trade_executor,
+            recorder=self.market_analyzer.recorder,
+            latency=self.latency
+        )
+        pipeline.subscribe('cross_exchange', self.arbitrage_strategy.find_arbitrage, per_pair=True)
+        pipeline.subscribe('triangular', self.triangular_strategy.find_triangular_arbitrage)
+        if self.config.get('metrics_enabled'):
+            metrics.REGISTRY.add_collector(pipeline.metric_samples)
+        return pipeline
+
+    async def _run_analysis(self, pipeline: MarketPipeline):
+        """
+        Candle-driven work, off the order book path: merge new candles, run the
+        statistical strategy and log market conditions every poll_interval.
         """
         while True:
-            try:
-                # Fetch and process market data
-                market_data = await self.market_analyzer.fetch_market_data()
-                if not market_data:
-                    logger.warning("Failed to fetch market data")
-                    await asyncio.sleep(self.config['poll_interval'])
-                    continue
-
-                # Update historical data and calculate indicators
-                await self.market_analyzer.update_historical_data()
-
-                # Monitor market conditions
-                await self.market_analyzer.monitor_market_conditions()
-
-                # Find arbitrage opportunities
-                cross_arbitrage_ops = self.arbitrage_strategy.find_arbitrage(market_data)
-                triangular_ops = self.triangular_strategy.find_triangular_arbitrage(market_data)
-                statistical_ops = await self.statistical_strategy.analyze(self.market_analyzer.historical_data)
-
-                # Execute trades
-                await self.trade_executor.execute_trades(
-                    cross_arbitrage_ops + triangular_ops + statistical_ops
-                )
+            started = time.monotonic()
+            await self.market_analyzer.update_candles()
+            await self.market_analyzer.monitor_market_conditions(pipeline.snapshot())
+            evaluated = time.perf_counter()
+            statistical_ops = await self.statistical_strategy.analyze(
+                self.market_analyzer.candle_store, self.market_analyzer.timeframe
+            )
+            STRATEGY_EVALUATION.observe(time.perf_counter() - evaluated, 'statistical')
+            if statistical_ops:
+                pipeline.submit(statistical_ops)
+            await asyncio.sleep(max(0.0, self.config['poll_interval'] - (time.monotonic() - started)))
 
-                await asyncio.sleep(self.config['poll_interval'])
-            except Exception as e:
-                logger.error(f"Error in main loop: {e}")
-                await asyncio.sleep(60)
+    async def _run_streaming(self, pipeline: MarketPipeline, tasks: list):
+        """
+        Feed the pipeline from the WebSocket delta stream instead of REST polling.
 
-    async def _fetch_all_order_books(self) -> Dict[str, dict]:
+        Every book change is published as the live L2Book; it is exported to a
+        ccxt dict only when the dispatcher takes it, so bursts of deltas to one
+        book cost a single conversion.
         """
-        Fetch order books from all exchanges with retries.
+        depth = self.config.get('stream_depth', 25)
+        stream = OrderBookStream(self.config['stream_url'], self.config['symbol_pairs'], depth=depth)
+        pipeline.materialize = lambda book: book.to_ccxt(depth) if book.synced else None
+        stream.add_listener(lambda book: pipeline.publish(book.exchange_id, book.symbol, book))
+        try:
+            await pipeline.run(poll=False, tasks=tasks + [('stream', stream.run)])
+        finally:
+            await stream.close()
+
+    async def _start_metrics(self):
+        """
+        Enable instrumentation and serve it on the local metrics endpoint.
         """
-        tasks = []
-        for ex_id, exchange in self.exchange_manager.exchanges.items():
-            for pair in self.config['symbol_pairs']:
-                tasks.append(self.api_utils.fetch_order_book_safely(exchange, pair))
-        results = await asyncio.gather(*tasks)
-        return process_order_books(results, list(self.exchange_manager.exchanges.keys()), self.config['symbol_pairs'])
+        metrics.enable()
+        metrics.REGISTRY.add_collector(APIUtils.metric_samples)
+        metrics.REGISTRY.add_collector(self.latency.metric_samples)
+        metrics.REGISTRY.add_collector(self.arbitrage_strategy.metric_samples)
+        self.metrics_server = MetricsServer()
+        await self.metrics_server.start(
+            self.config.get('metrics_host', '127.0.0.1'),
+            self.config.get('metrics_port', 9102)
+        )
 
-    async def _update_historical_data(self):
+    async def _run_sharded(self):
         """
-        Update historical market data for statistical analysis.
+        Scan pairs in worker processes and execute what they find from this one.
+
+        Each worker polls every exchange for its share of the pairs, runs
+        cross-exchange detection locally and publishes candidates over a Unix
+        socket; this process owns balances and order placement. Workers that
+        exit are restarted.
         """
+        socket_path = self.config.get('shard_socket', '/tmp/arbitrage_bot.sock')
+        shards = shard_pairs(self.config['symbol_pairs'], self.config.get('scan_workers', 4))
+        server = OpportunityServer(socket_path, self._execute_shard_opportunities)
+        await server.start()
+
+        context = multiprocessing.get_context('spawn')
+        workers = [None] * len(shards)
         try:
-            ohlcv = await self.api_utils.fetch_ohlcv_safely(
-                self.exchange_manager.exchanges['cex'],
-                'BTC/USD',
-                timeframe='5m'
-            )
-            if ohlcv:
-                new_data = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                self.market_analyzer.historical_data = pd.concat([self.market_analyzer.historical_data, new_data]).tail(1000)  # Keep last 1000 data points
-        except Exception as e:
-            logger.error(f"Failed to update historical data: {e}")
\ No newline at end of file
+            while True:
+                for shard_id, pairs in enumerate(shards):
+                    worker = workers[shard_id]
+                    if worker is None or not worker.is_alive():
+                        if worker is not None:
+                            logger.warning("Scan worker %s exited with %s, restarting", shard_id, worker.exitcode)
+                        worker = context.Process(
+                            target=run_shard,
+                            args=(shard_id, shard_config(self.config, pairs, len(shards)), socket_path),
+                            daemon=True
+                        )
+                        worker.start()
+                        workers[shard_id] = worker
+                await asyncio.sleep(self.config['poll_interval'])
+        finally:
+            for worker in workers:
+                if worker is not None and worker.is_alive():
+                    worker.terminate()
+            await server.stop()
+
+    async def _execute_shard_opportunities(self, shard_id: int, opportunities: List[dict]):
+        """
+        Schedule opportunities published by a scan worker. Books are rechecked
+        by the executor since the worker's snapshot is not shared.
+        """
+        await self.trade_executor.execute_trades([Opportunity.from_dict(item) for item in opportunities])
+
+    async def close(self):
+        """
+        Wait for in-flight trades, then release exchange clients and their pooled HTTP sessions.
+        """
+        await self.trade_executor.close()
+        await self.market_cache.close()
+        self.market_analyzer.close()
+        await self.exchange_manager.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
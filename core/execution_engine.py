@@ -0,0 +1,163 @@
+# core/execution_engine.py
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from exchanges.api_utils import APIUtils
+from utils.metrics import ORDER_ACK
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger('ExecutionEngine')
+
+FINAL_STATUSES = ('closed', 'canceled', 'expired', 'rejected')
+
+
+class ExecutionEngine:
+    def __init__(self, exchanges: Dict[str, object], config: dict):
+        """
+        Place both legs of an arbitrage concurrently and manage leg risk.
+        """
+        self.exchanges = exchanges
+        self.config = config
+        self.api_utils = APIUtils()
+        self.ack_latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=500))  # Seconds, per exchange
+        self.listeners: List[Callable[[dict], None]] = []
+
+    def add_listener(self, callback: Callable[[dict], None]):
+        """Register a callback invoked with the result of every execution."""
+        self.listeners.append(callback)
+
+    async def execute_pair(
+        self,
+        pair: str,
+        amount: float,
+        buy_exchange: str,
+        buy_price: float,
+        sell_exchange: str,
+        sell_price: float
+    ) -> dict:
+        """
+        Submit the buy and sell legs at the same time, wait for their fills and
+        flatten any imbalance between them.
+
+        Returns:
+            A result dict with both final orders, filled amounts, any hedge
+            order and its venue, per-leg ack latencies and 'success' (both legs
+            fully filled).
+        """
+        buy_order, sell_order = await asyncio.gather(
+            self._submit(buy_exchange, pair, 'buy', amount, buy_price),
+            self._submit(sell_exchange, pair, 'sell', amount, sell_price)
+        )
+        result = {
+            'pair': pair,
+            'buy_exchange': buy_exchange,
+            'sell_exchange': sell_exchange,
+            'buy_ack_ms': buy_order.pop('_ack_ms', None) if buy_order else None,
+            'sell_ack_ms': sell_order.pop('_ack_ms', None) if sell_order else None,
+            'hedge_order': None,
+            'hedge_exchange': None
+        }
+
+        buy_order, sell_order = await asyncio.gather(
+            self._await_fill(buy_exchange, buy_order),
+            self._await_fill(sell_exchange, sell_order)
+        )
+        filled_buy = (buy_order or {}).get('filled') or 0.0
+        filled_sell = (sell_order or {}).get('filled') or 0.0
+        result.update(buy_order=buy_order, sell_order=sell_order, filled_buy=filled_buy, filled_sell=filled_sell)
+
+        imbalance = filled_buy - filled_sell
+        if abs(imbalance) > self.config.get('min_hedge_amount', 1e-8):
+            result['hedge_exchange'], result['hedge_order'] = await self._flatten(
+                pair, imbalance, buy_exchange, sell_exchange
+            )
+
+        result['success'] = filled_buy >= amount - 1e-12 and filled_sell >= amount - 1e-12
+        for callback in self.listeners:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error("Execution listener failed: %s", e)
+        return result
+
+    async def _submit(self, ex_id: str, pair: str, side: str, amount: float, price: float) -> Optional[dict]:
+        """Place one leg and record its submission-to-ack latency."""
+        started = time.perf_counter()
+        order = await self.api_utils.create_order_safely(
+            self.exchanges[ex_id],
+            symbol=pair,
+            side=side,
+            amount=amount,
+            order_type='limit',
+            price=price
+        )
+        elapsed = time.perf_counter() - started
+        if order is None:
+            logger.warning("%s leg on %s for %s was not accepted", side, ex_id, pair)
+            return None
+        self.ack_latencies[ex_id].append(elapsed)
+        ORDER_ACK.observe(elapsed, ex_id)
+        order['_ack_ms'] = elapsed * 1000
+        return order
+
+    async def _await_fill(self, ex_id: str, order: Optional[dict]) -> Optional[dict]:
+        """
+        Poll an order until it reaches a final status or 'order_timeout' passes,
+        then cancel whatever is still open and return the final order state.
+        """
+        if order is None:
+            return None
+        exchange = self.exchanges[ex_id]
+        deadline = time.monotonic() + self.config.get('order_timeout', 5.0)
+        poll_interval = self.config.get('order_poll_interval', 0.25)
+        while order.get('status') not in FINAL_STATUSES and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            latest = await self.api_utils.fetch_order_safely(exchange, order['id'], order['symbol'])
+            if latest is not None:
+                order = latest
+
+        if order.get('status') not in FINAL_STATUSES:
+            canceled = await self.api_utils.cancel_order_safely(exchange, order['id'], order['symbol'])
+            latest = await self.api_utils.fetch_order_safely(exchange, order['id'], order['symbol'])
+            order = latest or canceled or order
+        return order
+
+    async def _flatten(
+        self,
+        pair: str,
+        imbalance: float,
+        buy_exchange: str,
+        sell_exchange: str
+    ) -> Tuple[Optional[str], Optional[dict]]:
+        """
+        Remove the net position left by unequal fills with a market order,
+        returning the venue it was placed on and the order.
+
+        With 'leg_risk_policy' = 'hedge' the missing part of the weaker leg is
+        completed on its own venue; with 'unwind' (or if hedging fails) the
+        excess of the stronger leg is reversed on the venue it filled on.
+        """
+        if imbalance > 0:
+            # Bought more than sold: sell the excess
+            hedge_venue, unwind_venue, side = sell_exchange, buy_exchange, 'sell'
+        else:
+            # Sold more than bought: buy the shortfall back
+            hedge_venue, unwind_venue, side = buy_exchange, sell_exchange, 'buy'
+        amount = abs(imbalance)
+
+        venues = [unwind_venue] if self.config.get('leg_risk_policy', 'hedge') == 'unwind' else [hedge_venue, unwind_venue]
+        for venue in venues:
+            logger.warning("Leg imbalance of %s %s: market %s %s on %s", imbalance, pair, side, amount, venue)
+            order = await self.api_utils.create_order_safely(
+                self.exchanges[venue],
+                symbol=pair,
+                side=side,
+                amount=amount,
+                order_type='market'
+            )
+            if order is not None:
+                return venue, order
+        logger.error("Failed to flatten %s %s; position left open", imbalance, pair)
+        return None, None
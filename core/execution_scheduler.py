@@ -0,0 +1,90 @@
+# core/execution_scheduler.py
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, Set, Tuple
+from core.opportunity import CrossExchangeOpportunity
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger('ExecutionScheduler')
+
+Resource = Tuple[str, str]  # (exchange_id, currency) balance an execution draws on
+
+
+class ExecutionScheduler:
+    def __init__(self, config: dict, clock: Callable[[], float] = time.monotonic):
+        """
+        Run opportunities as background tasks without blocking market scanning.
+
+        Tracks a cooldown per (exchange, pair) and the balances each in-flight
+        execution draws on. Opportunities that share no balance with anything in
+        flight run concurrently; the rest are skipped until the conflict clears.
+        """
+        self.config = config
+        self.clock = clock
+        self.cooldowns: Dict[Tuple[str, str], float] = {}  # (exchange_id, pair) -> ready at
+        self.locked: Set[Resource] = set()
+        self.tasks: Set[asyncio.Task] = set()
+        self._slot_freed = asyncio.Event()
+
+    @staticmethod
+    def resources(opportunity: CrossExchangeOpportunity) -> FrozenSet[Resource]:
+        """Balances an opportunity spends: quote on the buy venue, base on the sell venue."""
+        base, quote = opportunity.pair.split('/')
+        return frozenset({(opportunity.buy_exchange, quote), (opportunity.sell_exchange, base)})
+
+    @staticmethod
+    def venues(opportunity: CrossExchangeOpportunity) -> Tuple[Tuple[str, str], ...]:
+        return ((opportunity.buy_exchange, opportunity.pair), (opportunity.sell_exchange, opportunity.pair))
+
+    def has_capacity(self) -> bool:
+        return len(self.tasks) < self.config.get('max_concurrent_trades', 4)
+
+    async def wait_for_capacity(self):
+        """Wait until fewer than 'max_concurrent_trades' executions are in flight."""
+        while not self.has_capacity():
+            self._slot_freed.clear()
+            await self._slot_freed.wait()
+
+    def cooling_down(self, opportunity: CrossExchangeOpportunity) -> bool:
+        now = self.clock()
+        return any(self.cooldowns.get(venue, 0.0) > now for venue in self.venues(opportunity))
+
+    def try_schedule(self, opportunity: CrossExchangeOpportunity, run: Callable[[], Awaitable[bool]]) -> bool:
+        """
+        Start `run` in the background if the opportunity's venues are not cooling
+        down, its balances are free and the concurrency limit allows it.
+        """
+        if not self.has_capacity():
+            return False
+        if self.cooling_down(opportunity):
+            return False
+        resources = self.resources(opportunity)
+        if resources & self.locked:
+            return False
+
+        self.locked |= resources
+        task = asyncio.create_task(self._run(opportunity, resources, run))
+        self.tasks.add(task)
+        task.add_done_callback(self._finished)
+        return True
+
+    def _finished(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        self._slot_freed.set()
+
+    async def _run(self, opportunity: CrossExchangeOpportunity, resources: FrozenSet[Resource], run: Callable[[], Awaitable[bool]]):
+        try:
+            if await run():
+                ready_at = self.clock() + self.config['cooldown']
+                for venue in self.venues(opportunity):
+                    self.cooldowns[venue] = ready_at
+        except Exception as e:
+            logger.error("Scheduled execution failed: %s", e)
+        finally:
+            self.locked -= resources
+
+    async def drain(self):
+        """Wait for every in-flight execution to finish."""
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
@@ -1,12 +1,19 @@
 # core/market_analyzer.py
 import asyncio
 import logging
+import time
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional
+from core.market_snapshot import MarketSnapshot
 from exchanges.api_utils import APIUtils
-from utils.data_utils import calculate_indicators
+from utils.candle_store import CandleStore
+from utils.data_utils import timeframe_to_ms
+from utils.indicators import IndicatorEngine
+from utils.market_recorder import MarketRecorder
 from utils.risk_management import check_liquidity, calculate_slippage
 from utils.logger import setup_logger
+from utils.metrics import MARKET_DATA_FETCH
 
 # Set up logger
 logger = setup_logger('MarketAnalyzer')
@@ -19,96 +26,233 @@ class MarketAnalyzer:
         self.exchanges = exchanges
         self.config = config
         self.api_utils = APIUtils()
-        self.historical_data = pd.DataFrame()  # Store historical market data
-        self.indicators = {}  # Store calculated indicators
+        self.timeframe = config.get('ohlcv_timeframe', '5m')
+        self.candle_store = CandleStore(capacity=1000, window=20)  # Last 1000 candles per (exchange, pair, timeframe)
+        self.indicators = {}  # Latest indicator values per series
+        self.volatilities: Dict[str, float] = {}  # Per pair: relative price stdev per sqrt(second)
+        self.recorder = None
+        if config.get('record_path'):
+            self.recorder = MarketRecorder(
+                config['record_path'],
+                depth=config.get('record_depth', 25),
+                chunk_rows=config.get('record_chunk_rows', 1024),
+                compress=config.get('record_compression', True)
+            )
 
-    async def fetch_market_data(self) -> Dict[str, dict]:
+    @property
+    def indicator_engine(self) -> IndicatorEngine:
+        """
+        Candles and indicators of the series used by the statistical strategy.
         """
-        Fetch market data (order books and OHLCV) from all exchanges.
+        return self.candle_store.engine(
+            self.config.get('statistical_exchange', 'cex'),
+            self.config.get('statistical_pair', 'BTC/USD'),
+            self.timeframe
+        )
+
+    @property
+    def historical_data(self) -> pd.DataFrame:
         """
-        market_data = {}
+        Stored candles as a DataFrame, built on demand (not on the tick path).
+        """
+        return self.indicator_engine.candles.to_frame()
+
+    async def fetch_market_data(self, candles: bool = True) -> MarketSnapshot:
+        """
+        Fetch market data (order books and, unless `candles` is False, OHLCV)
+        from all exchanges.
+
+        Returns a MarketSnapshot that is reused for the rest of the tick.
+        """
+        order_books = {}
+        ohlcv = {}
         tasks = []
+        fetched_at = time.time()
 
         # Fetch order books
         for ex_id, exchange in self.exchanges.items():
             for pair in self.config['symbol_pairs']:
                 tasks.append(self.api_utils.fetch_order_book_safely(exchange, pair))
 
-        # Fetch OHLCV data
-        for ex_id, exchange in self.exchanges.items():
+        # Fetch OHLCV data: only bars since the newest stored one, or a full window on first load
+        for ex_id, exchange in (self.exchanges.items() if candles else ()):
             for pair in self.config['symbol_pairs']:
-                tasks.append(self.api_utils.fetch_ohlcv_safely(exchange, pair, timeframe='5m'))
+                since = self.candle_store.since(ex_id, pair, self.timeframe)
+                tasks.append(self.api_utils.fetch_ohlcv_safely(
+                    exchange, pair, timeframe=self.timeframe, since=since,
+                    limit=None if since is not None else self.candle_store.capacity
+                ))
 
         results = await asyncio.gather(*tasks)
+        MARKET_DATA_FETCH.observe(time.time() - fetched_at)
 
         # Process order books
         idx = 0
         for ex_id in self.exchanges:
             for pair in self.config['symbol_pairs']:
-                if pair not in market_data:
-                    market_data[pair] = {}
-                market_data[pair][ex_id] = {
-                    'order_book': results[idx]
-                }
+                order_books.setdefault(pair, {})[ex_id] = results[idx]
                 idx += 1
 
         # Process OHLCV data
-        for ex_id in self.exchanges:
+        for ex_id in (self.exchanges if candles else ()):
             for pair in self.config['symbol_pairs']:
-                market_data[pair][ex_id]['ohlcv'] = results[idx]
+                ohlcv.setdefault(pair, {})[ex_id] = results[idx]
                 idx += 1
 
-        return market_data
+        if self.recorder is not None:
+            self._record(order_books, ohlcv, int(fetched_at * 1000))
+
+        return MarketSnapshot.build(
+            order_books,
+            ohlcv,
+            max_age=self.config.get('snapshot_max_age', self.config['poll_interval']),
+            fetched_at=fetched_at
+        )
 
-    async def update_historical_data(self):
+    def _record(self, order_books: Dict[str, dict], ohlcv: Dict[str, dict], ts: int):
         """
-        Update historical market data for analysis.
+        Append this fetch's responses to the market data recording.
         """
         try:
+            for pair, per_ex in order_books.items():
+                for ex_id, book in per_ex.items():
+                    if book:
+                        self.recorder.record_order_book(ex_id, pair, book, ts)
+            for pair, per_ex in ohlcv.items():
+                for ex_id, candles in per_ex.items():
+                    if candles:
+                        self.recorder.record_ohlcv(ex_id, pair, candles, ts)
+        except Exception as e:
+            logger.error("Failed to record market data: %s", e)
+
+    def close(self):
+        """
+        Flush and close the market data recording, if any.
+        """
+        if self.recorder is not None:
+            self.recorder.close()
+
+    async def update_historical_data(self, snapshot: MarketSnapshot):
+        """
+        Update historical market data for analysis from the tick's snapshot.
+
+        Candles are upserted per (exchange, pair, timeframe); missing bars are
+        backfilled from the exchange before newer bars are applied.
+        """
+        for pair in snapshot.pairs():
+            for ex_id in snapshot.order_books.get(pair, {}):
+                try:
+                    ohlcv = snapshot.candles(ex_id, pair)
+                    if ohlcv:
+                        await self._merge_candles(ex_id, pair, ohlcv)
+                        key = (ex_id, pair, self.timeframe)
+                        self.indicators[key] = self.candle_store.series[key].latest()
+                except Exception as e:
+                    logger.error("Failed to update historical data for %s on %s: %s", pair, ex_id, e)
+        self._update_volatilities()
+
+    async def update_candles(self):
+        """
+        Fetch and merge new candles for every (exchange, pair) on their own.
+
+        Used by the event-driven loop, where order books arrive separately;
+        a failure on one exchange or pair does not hold up the others.
+        """
+        async def update(ex_id: str, exchange, pair: str):
+            since = self.candle_store.since(ex_id, pair, self.timeframe)
             ohlcv = await self.api_utils.fetch_ohlcv_safely(
-                self.exchanges['cex'],
-                'BTC/USD',
-                timeframe='5m'
+                exchange, pair, timeframe=self.timeframe, since=since,
+                limit=None if since is not None else self.candle_store.capacity
             )
             if ohlcv:
-                new_data = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                self.historical_data = pd.concat([self.historical_data, new_data]).tail(1000)  # Keep last 1000 data points
-                self.indicators = calculate_indicators(self.historical_data)
-        except Exception as e:
-            logger.error(f"Failed to update historical data: {e}")
+                if self.recorder is not None:
+                    self._record({}, {pair: {ex_id: ohlcv}}, int(time.time() * 1000))
+                await self._merge_candles(ex_id, pair, ohlcv)
+                key = (ex_id, pair, self.timeframe)
+                self.indicators[key] = self.candle_store.series[key].latest()
+
+        keys = [(ex_id, exchange, pair) for ex_id, exchange in self.exchanges.items()
+                for pair in self.config['symbol_pairs']]
+        results = await asyncio.gather(*(update(*key) for key in keys), return_exceptions=True)
+        for (ex_id, _, pair), result in zip(keys, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to update candles for %s on %s: %s", pair, ex_id, result)
+        self._update_volatilities()
+
+    def volatility(self, pair: str) -> Optional[float]:
+        """
+        Recent volatility of `pair` as the relative stdev of its price over one
+        second (scale by sqrt(seconds) for longer horizons), or None before
+        enough candles are stored.
+        """
+        return self.volatilities.get(pair)
+
+    def _update_volatilities(self):
+        """
+        Re-estimate every pair's volatility from the log returns of its last
+        'drift_volatility_window' closes, taking the median over exchanges.
+        """
+        window = self.config.get('drift_volatility_window', 30)
+        seconds = timeframe_to_ms(self.timeframe) / 1000
+        estimates: Dict[str, List[float]] = {}
+        for (ex_id, pair, timeframe), series in self.candle_store.series.items():
+            if timeframe != self.timeframe:
+                continue
+            closes = series.candles.last(window + 1)[:, 4]
+            closes = closes[closes > 0]
+            if len(closes) >= 3:
+                estimates.setdefault(pair, []).append(float(np.diff(np.log(closes)).std(ddof=1)))
+        for pair, stdevs in estimates.items():
+            self.volatilities[pair] = float(np.median(stdevs) / np.sqrt(seconds))
+
+    async def _merge_candles(self, ex_id: str, pair: str, ohlcv: List[list], max_backfills: int = 5):
+        """
+        Upsert candles into the store, backfilling any gap before the rest are applied.
+        """
+        for _ in range(max_backfills):
+            applied, gap_start = self.candle_store.upsert(ex_id, pair, self.timeframe, ohlcv)
+            if gap_start is None:
+                return
+            logger.warning("Gap in %s %s candles on %s from %s, backfilling", pair, self.timeframe, ex_id, gap_start)
+            backfill = await self.api_utils.fetch_ohlcv_safely(
+                self.exchanges[ex_id], pair, timeframe=self.timeframe, since=gap_start
+            )
+            if not backfill or min(candle[0] for candle in backfill) > gap_start:
+                break  # The exchange has no bars for the gap
+            self.candle_store.upsert(ex_id, pair, self.timeframe, backfill)
+        self.candle_store.upsert(ex_id, pair, self.timeframe, ohlcv, allow_gaps=True)
 
-    async def monitor_market_conditions(self):
+    async def monitor_market_conditions(self, snapshot: MarketSnapshot):
         """
         Monitor market conditions (volatility, liquidity, etc.).
         """
         try:
-            market_data = await self.fetch_market_data()
-            volatility = self._calculate_volatility(market_data)
-            liquidity = self._calculate_liquidity(market_data)
+            volatility = self._calculate_volatility(snapshot)
+            liquidity = self._calculate_liquidity(snapshot)
 
-            logger.info(f"Market conditions - Volatility: {volatility}, Liquidity: {liquidity}")
+            logger.info("Market conditions - Volatility: %s, Liquidity: %s", volatility, liquidity)
         except Exception as e:
-            logger.error(f"Failed to monitor market conditions: {e}")
+            logger.error("Failed to monitor market conditions: %s", e)
 
-    def _calculate_volatility(self, market_data: dict) -> float:
+    def _calculate_volatility(self, snapshot: MarketSnapshot) -> float:
         """
         Calculate market volatility based on historical price changes.
         """
-        if len(self.historical_data) < 2:
+        candles = self.indicator_engine.candles
+        if len(candles) < 3:
             return 0.0
 
-        price_changes = self.historical_data['close'].pct_change().dropna()
-        return price_changes.std() * 100  # Return volatility as a percentage
+        closes = candles.column('close')
+        price_changes = np.diff(closes) / closes[:-1]
+        return float(price_changes.std(ddof=1)) * 100  # Return volatility as a percentage
 
-    def _calculate_liquidity(self, market_data: dict) -> float:
+    def _calculate_liquidity(self, snapshot: MarketSnapshot) -> float:
         """
         Calculate market liquidity based on order book depth.
         """
         liquidity = 0.0
-        for pair, exchanges_data in market_data.items():
-            for ex_id, data in exchanges_data.items():
-                order_book = data['order_book']
-                if order_book:
-                    cumulative = sum(ask[1] for ask in order_book['asks'][:5])  # Top 5 ask levels
-                    liquidity += cumulative
+        for pair in snapshot.pairs():
+            for ex_id in snapshot.exchanges(pair):
+                asks = snapshot.book(ex_id, pair).asks
+                liquidity += asks.cum_size[min(5, len(asks))]  # Top 5 ask levels
         return liquidity
\ No newline at end of file
@@ -0,0 +1,169 @@
+# core/market_snapshot.py
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from utils.order_book import OrderBook
+
+
+def _freeze(data: Dict[str, Dict[str, object]]) -> Mapping[str, Mapping[str, object]]:
+    """Wrap a two-level pair -> exchange mapping in read-only proxies."""
+    return MappingProxyType({pair: MappingProxyType(dict(per_ex)) for pair, per_ex in data.items()})
+
+
+class _DerivedBooks(Mapping):
+    """Read-only exchange -> ccxt dict mapping for one pair, converted from OrderBooks on first access."""
+
+    def __init__(self, books: Dict[str, OrderBook]):
+        self._books = books
+        self._dicts: Dict[str, dict] = {}
+
+    def __getitem__(self, exchange_id: str) -> dict:
+        book = self._dicts.get(exchange_id)
+        if book is None:
+            book = self._dicts[exchange_id] = self._books[exchange_id].to_ccxt()
+        return book
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._books)
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    Immutable view of the market for a single tick.
+
+    Built once per tick by MarketAnalyzer.fetch_market_data (or per detector
+    evaluation by MarketPipeline) and handed to the analyzer, every strategy
+    and the trade executor, so a tick costs one fetch per (exchange, pair,
+    data kind).
+    """
+    order_books: Mapping[str, Mapping[str, Optional[dict]]]  # pair -> exchange -> order book
+    ohlcv: Mapping[str, Mapping[str, Optional[list]]]  # pair -> exchange -> candles
+    fetched_at: float
+    max_age: float
+    _books: Dict[Tuple[str, str], OrderBook] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _versions: Dict[Tuple[str, str], int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @classmethod
+    def build(
+        cls,
+        order_books: Dict[str, Dict[str, Optional[dict]]],
+        ohlcv: Dict[str, Dict[str, Optional[list]]],
+        max_age: float,
+        fetched_at: Optional[float] = None,
+        books: Optional[Dict[Tuple[str, str], OrderBook]] = None,
+        versions: Optional[Dict[Tuple[str, str], int]] = None
+    ) -> 'MarketSnapshot':
+        """
+        Create a snapshot from freshly fetched data.
+
+        Args:
+            order_books: Order books keyed by pair, then exchange ID.
+            ohlcv: OHLCV candles keyed by pair, then exchange ID.
+            max_age: Staleness budget in seconds.
+            fetched_at: When the fetch started (defaults to now).
+            books: Already converted OrderBooks keyed by (exchange, pair), used
+                instead of converting the matching dicts.
+            versions: Update count of each (exchange, pair) book, when the
+                source tracks them.
+
+        Returns:
+            A read-only MarketSnapshot.
+        """
+        snapshot = cls(
+            order_books=_freeze(order_books),
+            ohlcv=_freeze(ohlcv),
+            fetched_at=time.time() if fetched_at is None else fetched_at,
+            max_age=max_age
+        )
+        if books:
+            snapshot._books.update(books)
+        if versions:
+            snapshot._versions.update(versions)
+        return snapshot
+
+    @classmethod
+    def from_books(
+        cls,
+        books: Dict[Tuple[str, str], OrderBook],
+        max_age: float,
+        fetched_at: Optional[float] = None,
+        versions: Optional[Dict[Tuple[str, str], int]] = None
+    ) -> 'MarketSnapshot':
+        """
+        Create a snapshot from OrderBooks alone, for sources that hold books as
+        arrays. The ccxt dicts in `order_books` are only built for the books a
+        consumer actually reads that way.
+        """
+        per_pair: Dict[str, Dict[str, OrderBook]] = {}
+        for (exchange_id, pair), book in books.items():
+            per_pair.setdefault(pair, {})[exchange_id] = book
+        snapshot = cls(
+            order_books=MappingProxyType({pair: _DerivedBooks(per_ex) for pair, per_ex in per_pair.items()}),
+            ohlcv=MappingProxyType({}),
+            fetched_at=time.time() if fetched_at is None else fetched_at,
+            max_age=max_age
+        )
+        snapshot._books.update(books)
+        if versions:
+            snapshot._versions.update(versions)
+        return snapshot
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Seconds elapsed since the data was fetched."""
+        return (time.time() if now is None else now) - self.fetched_at
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        """True once the snapshot is older than its staleness budget."""
+        return self.age(now) > self.max_age
+
+    def order_book(self, exchange_id: str, pair: str) -> Optional[dict]:
+        """Order book for a pair on an exchange, or None if it was not fetched."""
+        return self.order_books.get(pair, {}).get(exchange_id)
+
+    def book(self, exchange_id: str, pair: str) -> Optional[OrderBook]:
+        """
+        Array-backed OrderBook for a pair on an exchange.
+
+        Converted from the ccxt dict on first access and cached for the rest of
+        the tick, so every consumer shares one conversion.
+        """
+        key = (exchange_id, pair)
+        book = self._books.get(key)
+        if book is None:
+            raw = self.order_book(exchange_id, pair)
+            if not raw:
+                return None
+            book = self._books[key] = OrderBook.from_ccxt(raw)
+        return book
+
+    def book_versions(self, keys: Iterable[Tuple[str, str]]) -> Tuple[Tuple[str, str, int], ...]:
+        """(exchange, pair, version) of each (exchange, pair) book whose version is known."""
+        versions = self._versions
+        return tuple((ex_id, pair, versions[(ex_id, pair)]) for ex_id, pair in keys if (ex_id, pair) in versions)
+
+    def candles(self, exchange_id: str, pair: str) -> Optional[list]:
+        """OHLCV candles for a pair on an exchange, or None if they were not fetched."""
+        return self.ohlcv.get(pair, {}).get(exchange_id)
+
+    def books_for(self, pair: str) -> Dict[str, dict]:
+        """All successfully fetched order books for a pair, keyed by exchange ID."""
+        return {ex_id: book for ex_id, book in self.order_books.get(pair, {}).items() if book}
+
+    def exchanges(self, pair: str) -> List[str]:
+        """IDs of the exchanges with a fetched order book for a pair (no dict is built for array-backed books)."""
+        per_ex = self.order_books.get(pair, {})
+        if isinstance(per_ex, _DerivedBooks):
+            return list(per_ex)
+        return [ex_id for ex_id, book in per_ex.items() if book]
+
+    def pairs(self) -> List[str]:
+        """Pairs covered by this snapshot."""
+        return list(self.order_books.keys())
+
+    def __bool__(self) -> bool:
+        return bool(self._books) or any(book for per_ex in self.order_books.values() for book in per_ex.values())
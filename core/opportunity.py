@@ -0,0 +1,243 @@
+# core/opportunity.py
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass, field, fields, replace
+from typing import Callable, ClassVar, Dict, Hashable, List, Mapping, NamedTuple, Optional, Tuple
+
+BookKey = Tuple[str, str]  # (exchange_id, pair)
+BookVersion = Tuple[str, str, int]  # (exchange_id, pair, version)
+
+
+class Leg(NamedTuple):
+    """One order of an opportunity."""
+    exchange: str
+    pair: str
+    side: str  # 'buy' or 'sell'
+    price: float  # Limit price: the worst level the order is expected to reach
+    amount: float  # Base currency (0.0 if the strategy does not size it)
+
+
+@dataclass(slots=True, kw_only=True, eq=False)
+class Opportunity:
+    """
+    Common header of everything a strategy detects.
+
+    Subclasses add the strategy's own fields and name it in `strategy`.
+    Queued instances are not modified; resize() returns a copy.
+    """
+    strategy: ClassVar[str] = 'opportunity'
+    legs: Tuple[Leg, ...]
+    amount: float  # Base amount of the first leg
+    profit: float  # Expected net edge after fees, percent
+    expected_profit: float = 0.0  # Expected net edge in the first leg's quote currency
+    book_versions: Tuple[BookVersion, ...] = ()  # Books it was computed from, as MarketSnapshot.book_versions
+    detected_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def pair(self) -> str:
+        return self.legs[0].pair
+
+    @property
+    def key(self) -> Hashable:
+        """Identity across detections: the same strategy trading the same markets in the same direction."""
+        return (self.strategy,) + tuple((leg.exchange, leg.pair, leg.side) for leg in self.legs)
+
+    def resize(self, amount: float) -> 'Opportunity':
+        """Copy trading `amount` instead, with every leg scaled to match."""
+        scale = amount / self.amount if self.amount else 0.0
+        return replace(self, amount=amount, legs=tuple(leg._replace(amount=leg.amount * scale) for leg in self.legs))
+
+    def to_dict(self) -> dict:
+        """JSON-compatible form, for structured logs and the shard channel."""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data['strategy'] = self.strategy
+        data['legs'] = [list(leg) for leg in self.legs]
+        data['book_versions'] = [list(version) for version in self.book_versions]
+        return data
+
+    @staticmethod
+    def from_dict(data: dict) -> 'Opportunity':
+        """Rebuild an opportunity of the right type from to_dict() output."""
+        data = dict(data)
+        cls = OPPORTUNITY_TYPES[data.pop('strategy')]
+        data['legs'] = tuple(Leg(*leg) for leg in data['legs'])
+        data['book_versions'] = tuple(tuple(version) for version in data.get('book_versions', ()))
+        return cls(**data)
+
+    def __str__(self) -> str:
+        legs = ', '.join(f"{leg.side} {leg.amount:g} {leg.pair} on {leg.exchange} @ {leg.price:g}" for leg in self.legs)
+        return f"{self.strategy}: {legs} ({self.profit:.3f}%)"
+
+
+@dataclass(slots=True, kw_only=True, eq=False)
+class CrossExchangeOpportunity(Opportunity):
+    """Buy a pair on one exchange and sell it on another at the same time."""
+    strategy: ClassVar[str] = 'cross_exchange'
+    buy_vwap: float
+    sell_vwap: float
+    drift: float = 0.0  # Percent already deducted from `profit` for price moves over the venues' latency
+
+    @classmethod
+    def create(cls, pair: str, buy_exchange: str, sell_exchange: str, amount: float, buy_price: float,
+               sell_price: float, **kwargs) -> 'CrossExchangeOpportunity':
+        return cls(legs=(Leg(buy_exchange, pair, 'buy', buy_price, amount),
+                         Leg(sell_exchange, pair, 'sell', sell_price, amount)), amount=amount, **kwargs)
+
+    @property
+    def buy_exchange(self) -> str:
+        return self.legs[0].exchange
+
+    @property
+    def sell_exchange(self) -> str:
+        return self.legs[1].exchange
+
+    @property
+    def buy_price(self) -> float:
+        return self.legs[0].price
+
+    @property
+    def sell_price(self) -> float:
+        return self.legs[1].price
+
+
+@dataclass(slots=True, kw_only=True, eq=False)
+class TriangularOpportunity(Opportunity):
+    """A conversion cycle on one exchange; legs are priced at the top of book and unsized."""
+    strategy: ClassVar[str] = 'triangular'
+
+    @property
+    def exchange(self) -> str:
+        return self.legs[0].exchange
+
+    @property
+    def path(self) -> Tuple[str, ...]:
+        return tuple(leg.pair for leg in self.legs)
+
+
+@dataclass(slots=True, kw_only=True, eq=False)
+class StatisticalOpportunity(Opportunity):
+    """A spread between two instruments far enough from its mean to trade its reversion."""
+    strategy: ClassVar[str] = 'statistical'
+    z_score: float
+    hedge_ratio: float
+    half_life: float
+
+
+OPPORTUNITY_TYPES = {cls.strategy: cls for cls in (CrossExchangeOpportunity, TriangularOpportunity,
+                                                     StatisticalOpportunity)}
+
+
+class OpportunityQueue:
+    def __init__(
+        self,
+        ttl: float = 1.0,
+        maxsize: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+        versions: Optional[Mapping[BookKey, int]] = None
+    ):
+        """
+        Opportunities waiting for execution, best expected edge first.
+
+        A heap ordered on `profit` makes push and pop O(log n). Pushing an
+        opportunity whose key is already queued replaces the queued one, so an
+        opportunity detected again on every tick is held once, at its latest
+        pricing. Entries expire `ttl` seconds after they were pushed; with
+        `versions` (the latest version of every book) an entry computed from a
+        book that has since changed is dropped as superseded, since the
+        detectors re-evaluate the new book. Replaced and invalid entries are
+        discarded lazily when they reach the top.
+
+        When `maxsize` opportunities are queued, a new one evicts the worst
+        if it is better, and is dropped otherwise.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self.versions = versions
+        self._heap: List[list] = []  # [-profit, sequence, expires at, key, opportunity or None once replaced]
+        self._entries: Dict[Hashable, list] = {}
+        self._sequence = itertools.count()
+        self._not_empty = asyncio.Event()
+        self.stats = {'pushed': 0, 'replaced': 0, 'expired': 0, 'superseded': 0, 'dropped': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def push(self, opportunity: Opportunity) -> bool:
+        """Queue an opportunity, replacing an earlier detection of it; False if it was dropped."""
+        key = opportunity.key
+        previous = self._entries.get(key)
+        if previous is not None:
+            previous[4] = None
+            self.stats['replaced'] += 1
+        elif len(self._entries) >= self.maxsize and not self._make_room(opportunity):
+            self.stats['dropped'] += 1
+            return False
+        entry = [-opportunity.profit, next(self._sequence), self.clock() + self.ttl, key, opportunity]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        self.stats['pushed'] += 1
+        if len(self._heap) > 2 * self.maxsize:
+            self._compact()
+        self._not_empty.set()
+        return True
+
+    def pop(self) -> Optional[Opportunity]:
+        """Remove and return the best opportunity that is still valid, or None."""
+        now = self.clock()
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            opportunity = entry[4]
+            if opportunity is None:
+                continue  # Replaced by a later detection
+            del self._entries[entry[3]]
+            reason = self._invalid(entry, now)
+            if reason is None:
+                return opportunity
+            self.stats[reason] += 1
+        self._not_empty.clear()
+        return None
+
+    async def get(self) -> Opportunity:
+        """Wait for the best valid opportunity."""
+        while True:
+            opportunity = self.pop()
+            if opportunity is not None:
+                return opportunity
+            await self._not_empty.wait()
+
+    def _invalid(self, entry: list, now: float) -> Optional[str]:
+        if entry[2] <= now:
+            return 'expired'
+        if self.versions is not None:
+            for exchange_id, pair, version in entry[4].book_versions:
+                if self.versions.get((exchange_id, pair), version) != version:
+                    return 'superseded'
+        return None
+
+    def _make_room(self, opportunity: Opportunity) -> bool:
+        """Free a slot for `opportunity`: drop invalid entries, else the worst one if it is worse."""
+        now = self.clock()
+        for key, entry in list(self._entries.items()):
+            reason = self._invalid(entry, now)
+            if reason is not None:
+                self._discard(key, entry)
+                self.stats[reason] += 1
+        if len(self._entries) < self.maxsize:
+            return True
+        worst_key, worst = max(self._entries.items(), key=lambda item: item[1][0])
+        if -worst[0] >= opportunity.profit:
+            return False
+        self._discard(worst_key, worst)
+        self.stats['dropped'] += 1
+        return True
+
+    def _discard(self, key: Hashable, entry: list):
+        entry[4] = None
+        del self._entries[key]
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[4] is not None]
+        heapq.heapify(self._heap)
@@ -0,0 +1,370 @@
+# core/pipeline.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from core.market_snapshot import MarketSnapshot
+from core.opportunity import Opportunity, OpportunityQueue
+from core.trade_executor import TradeExecutor
+from exchanges.api_utils import APIUtils
+from exchanges.latency_tracker import LatencyTracker
+from utils.logger import setup_logger
+from utils.metrics import STRATEGY_EVALUATION
+from utils.order_book import OrderBook
+
+# Set up logger
+logger = setup_logger('Pipeline')
+
+BookKey = Tuple[str, str]  # (exchange_id, pair)
+
+
+class ConflatingQueue:
+    """
+    Bounded queue of keyed items where a newer item replaces a queued one
+    with the same key, keeping its place in line.
+
+    Consumers therefore only ever see the latest value per key. put() waits
+    while the queue is full of other keys (backpressure); put_nowait() drops
+    the item instead.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.stats = {'put': 0, 'conflated': 0, 'dropped': 0}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _full_for(self, key: Hashable) -> bool:
+        return key not in self._items and len(self._items) >= self.maxsize
+
+    def _store(self, key: Hashable, item: Any):
+        self.stats['put'] += 1
+        if key in self._items:
+            self.stats['conflated'] += 1
+        self._items[key] = item
+        self._not_empty.set()
+        if len(self._items) >= self.maxsize:
+            self._not_full.clear()
+
+    async def put(self, key: Hashable, item: Any):
+        while self._full_for(key):
+            await self._not_full.wait()
+        self._store(key, item)
+
+    def put_nowait(self, key: Hashable, item: Any) -> bool:
+        if self._full_for(key):
+            self.stats['dropped'] += 1
+            return False
+        self._store(key, item)
+        return True
+
+    async def get(self) -> Tuple[Hashable, Any]:
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        key, item = self._items.popitem(last=False)
+        if not self._items:
+            self._not_empty.clear()
+        self._not_full.set()
+        return key, item
+
+
+class Detector:
+    """A strategy evaluation subscribed to the pairs it reads."""
+
+    def __init__(
+        self,
+        name: str,
+        evaluate: Callable[[MarketSnapshot], List[Opportunity]],
+        pairs: Optional[Iterable[str]] = None,
+        per_pair: bool = False
+    ):
+        self.name = name
+        self.evaluate = evaluate
+        self.pairs: Optional[Set[str]] = None if pairs is None else set(pairs)
+        self.per_pair = per_pair  # Evaluate only the pairs that changed rather than every book
+        self.dirty: Set[str] = set()
+        self.wake = asyncio.Event()
+
+    def wants(self, pair: str) -> bool:
+        return self.pairs is None or pair in self.pairs
+
+
+class MarketPipeline:
+    def __init__(
+        self,
+        exchanges: Dict[str, object],
+        config: dict,
+        executor: TradeExecutor,
+        materialize: Optional[Callable[[Any], Optional[dict]]] = None,
+        recorder=None,
+        latency: Optional[LatencyTracker] = None
+    ):
+        """
+        Event-driven market data path: feeds -> detectors -> executor.
+
+        Book updates go into a bounded conflating queue keyed by (exchange,
+        pair), so a slow consumer only ever sees the newest book. The
+        dispatcher converts each update once and wakes the detectors
+        subscribed to its pair; every detector runs in its own task and
+        coalesces the pairs that changed while it was evaluating. Detected
+        opportunities the executor can trade go into an OpportunityQueue that
+        knows every book's version, so the executor always takes the best
+        opportunity whose books have not changed since it was found.
+
+        Each exchange is polled by its own task, and every task is restarted
+        if it fails, so an error on one venue never stalls the others.
+
+        Args:
+            exchanges: Exchange clients keyed by ID.
+            config: Bot configuration.
+            executor: TradeExecutor, run against the opportunity queue.
+            materialize: Turns a published update into a ccxt order book dict
+                (default: updates already are dicts). Called only for updates
+                that survive conflation.
+            recorder: MarketRecorder for polled books (optional).
+            latency: LatencyTracker told the lag of every applied book
+                (optional).
+        """
+        self.exchanges = exchanges
+        self.config = config
+        self.executor = executor
+        self.materialize = materialize
+        self.recorder = recorder
+        self.latency = latency
+        self.api_utils = APIUtils()
+        self.updates = ConflatingQueue(config.get('update_queue_size', 1024))
+        self.versions: Dict[BookKey, int] = {}  # Updates applied per book
+        self.opportunities = OpportunityQueue(
+            config.get('opportunity_ttl', 1.0),
+            config.get('opportunity_queue_size', 256),
+            versions=self.versions
+        )
+        self.detectors: List[Detector] = []
+        self.order_books: Dict[str, Dict[str, dict]] = {}  # pair -> exchange -> latest book
+        self.books: Dict[BookKey, OrderBook] = {}
+        self.received: Dict[BookKey, float] = {}  # When each book arrived (epoch seconds)
+        self._recorded: Dict[BookKey, dict] = {}  # Latest book recorded per key
+        self.stats = {'updates': 0, 'unchanged': 0, 'evaluations': 0, 'evaluation_errors': 0, 'opportunities': 0,
+                      'signals': 0, 'restarts': 0}
+        self.feed_errors: Dict[str, int] = {ex_id: 0 for ex_id in exchanges}
+
+    def subscribe(
+        self,
+        name: str,
+        evaluate: Callable[[MarketSnapshot], List[Opportunity]],
+        pairs: Optional[Iterable[str]] = None,
+        per_pair: bool = False
+    ) -> Detector:
+        """Run `evaluate` whenever a book for one of `pairs` (default: any) changes."""
+        detector = Detector(name, evaluate, pairs, per_pair)
+        self.detectors.append(detector)
+        return detector
+
+    def publish(self, exchange_id: str, pair: str, update: Any) -> bool:
+        """Queue a book update without waiting; False if it had to be dropped."""
+        return self.updates.put_nowait((exchange_id, pair), update)
+
+    def snapshot(self, pairs: Optional[Iterable[str]] = None) -> MarketSnapshot:
+        """
+        Snapshot of the latest books for `pairs` (default: all).
+
+        Books older than the staleness budget are left out, so a venue whose
+        feed has stalled drops out of detection instead of aging every
+        snapshot. The snapshot is dated by its oldest book.
+        """
+        max_age = self.config.get('snapshot_max_age', self.config['poll_interval'])
+        cutoff = time.time() - max_age
+        order_books: Dict[str, Dict[str, dict]] = {}
+        for pair in (self.order_books if pairs is None else pairs):
+            for ex_id, book in self.order_books.get(pair, {}).items():
+                if self.received[(ex_id, pair)] >= cutoff:
+                    order_books.setdefault(pair, {})[ex_id] = book
+        keys = [(ex_id, pair) for pair, per_ex in order_books.items() for ex_id in per_ex]
+        return MarketSnapshot.build(
+            order_books,
+            {},
+            max_age=max_age,
+            fetched_at=min((self.received[key] for key in keys), default=None),
+            books={key: self.books[key] for key in keys},
+            versions={key: self.versions[key] for key in keys}
+        )
+
+    async def run(self, poll: bool = True, tasks: Iterable[Tuple[str, Callable[[], Awaitable[None]]]] = ()):
+        """
+        Run the pipeline until cancelled.
+
+        Args:
+            poll: Poll every exchange's order books over REST.
+            tasks: Further (name, coroutine function) pairs supervised
+                alongside the pipeline, such as a streaming feed.
+        """
+        supervised = [('dispatcher', self._dispatch),
+                      ('executor', lambda: self.executor.run(self.opportunities, self._execution_snapshot))]
+        supervised += [(f'detector:{d.name}', lambda d=d: self._run_detector(d)) for d in self.detectors]
+        if poll:
+            supervised += [(f'feed:{ex_id}', lambda ex_id=ex_id: self._poll_exchange(ex_id)) for ex_id in self.exchanges]
+        supervised += list(tasks)
+        running = [asyncio.create_task(self._supervise(name, factory)) for name, factory in supervised]
+        try:
+            await asyncio.gather(*running)
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def _supervise(self, name: str, factory: Callable[[], Awaitable[None]]):
+        """Keep a pipeline task running, restarting it after a short pause if it fails."""
+        while True:
+            try:
+                await factory()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['restarts'] += 1
+                logger.error("Pipeline task %s failed, restarting: %s", name, e)
+                await asyncio.sleep(self.config.get('task_restart_delay', 1.0))
+
+    async def _poll_exchange(self, exchange_id: str):
+        """
+        Fetch an exchange's books every 'feed_interval' seconds.
+
+        Books are not retried within a round: a retry's backoff would hold up
+        every other pair of the round, and the next round refetches anyway. A
+        round where no book could be fetched backs this exchange off
+        exponentially, up to 'feed_max_backoff'; other exchanges keep polling.
+        """
+        exchange = self.exchanges[exchange_id]
+        interval = self.config.get('feed_interval', 0.25)
+        pairs = self.config['symbol_pairs']
+        while True:
+            started = time.time()
+            books = await asyncio.gather(
+                *(self.api_utils.fetch_order_book_safely(exchange, pair, max_retries=1, use_cache=False)
+                  for pair in pairs),
+                return_exceptions=True
+            )
+            received = 0
+            for pair, book in zip(pairs, books):
+                if book and not isinstance(book, Exception):
+                    received += 1
+                    await self.updates.put((exchange_id, pair), book)
+                    if self.recorder is not None and not self._same_book(self._recorded.get((exchange_id, pair)), book):
+                        self._recorded[(exchange_id, pair)] = book
+                        self._record(exchange_id, pair, book, int(started * 1000))
+            if received:
+                self.feed_errors[exchange_id] = 0
+                wait = interval - (time.time() - started)
+            else:
+                self.feed_errors[exchange_id] += 1
+                wait = min(interval * 2 ** self.feed_errors[exchange_id], self.config.get('feed_max_backoff', 30))
+                logger.warning("No books from %s (%s rounds in a row), retrying in %.1fs",
+                               exchange_id, self.feed_errors[exchange_id], wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    @staticmethod
+    def _same_book(previous: Optional[dict], book: dict) -> bool:
+        """Whether `book` is `previous` again: the same object, or the same exchange timestamp and nonce."""
+        if previous is None:
+            return False
+        if book is previous:
+            return True
+        timestamp = book.get('timestamp')
+        return timestamp is not None and (timestamp, book.get('nonce')) == (
+            previous.get('timestamp'), previous.get('nonce')
+        )
+
+    def _record(self, exchange_id: str, pair: str, book: dict, ts: int):
+        try:
+            self.recorder.record_order_book(exchange_id, pair, book, ts)
+        except Exception as e:
+            logger.error("Failed to record market data: %s", e)
+
+    async def _dispatch(self):
+        """
+        Apply book updates and wake the detectors subscribed to their pairs.
+        An update that repeats the applied book (same object, or same exchange
+        timestamp and nonce) is skipped.
+        """
+        while True:
+            (exchange_id, pair), update = await self.updates.get()
+            try:
+                book = update if self.materialize is None else self.materialize(update)
+                if not book:
+                    continue
+                if self._same_book(self.order_books.get(pair, {}).get(exchange_id), book):
+                    self.stats['unchanged'] += 1  # Versions, receive times and book lag stay as they were
+                    continue
+                self.books[(exchange_id, pair)] = OrderBook.from_ccxt(book)
+            except Exception as e:
+                logger.error("Bad book update for %s on %s: %s", pair, exchange_id, e)
+                continue
+            self.order_books.setdefault(pair, {})[exchange_id] = book
+            received = self.received[(exchange_id, pair)] = time.time()
+            if self.latency is not None:
+                self.latency.observe_book(exchange_id, pair, book.get('timestamp'), received)
+            self.versions[(exchange_id, pair)] = self.versions.get((exchange_id, pair), 0) + 1
+            self.stats['updates'] += 1
+            for detector in self.detectors:
+                if detector.wants(pair):
+                    detector.dirty.add(pair)
+                    detector.wake.set()
+
+    async def _run_detector(self, detector: Detector):
+        while True:
+            await detector.wake.wait()
+            detector.wake.clear()
+            pairs, detector.dirty = detector.dirty, set()
+            snapshot = self.snapshot(pairs if detector.per_pair else detector.pairs)
+            started = time.perf_counter()
+            try:
+                opportunities = detector.evaluate(snapshot)
+            except Exception as e:
+                self.stats['evaluation_errors'] += 1
+                logger.error("Detector %s failed: %s", detector.name, e)
+                continue
+            finally:
+                STRATEGY_EVALUATION.observe(time.perf_counter() - started, detector.name)
+                self.stats['evaluations'] += 1
+            if opportunities:
+                self.submit(opportunities)
+            await asyncio.sleep(0)  # Let the dispatcher and other detectors run between evaluations
+
+    def submit(self, opportunities: List[Opportunity]):
+        """
+        Queue opportunities for execution, replacing earlier detections of the
+        same ones. Kinds the executor cannot trade (triangular and statistical
+        signals) are counted and logged instead, so they never take queue
+        slots from executable ones.
+        """
+        self.stats['opportunities'] += len(opportunities)
+        for opportunity in opportunities:
+            if self.executor.executable(opportunity):
+                self.opportunities.push(opportunity)
+            else:
+                self.stats['signals'] += 1
+                logger.debug("Signal: %s", opportunity)
+
+    def _execution_snapshot(self, opportunity: Opportunity) -> MarketSnapshot:
+        return self.snapshot({leg.pair for leg in opportunity.legs})
+
+    def metric_samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Queue and feed state as gauge samples for the metrics endpoint."""
+        samples = [('pipeline_update_queue_depth', {}, len(self.updates)),
+                   ('pipeline_opportunity_queue_depth', {}, len(self.opportunities))]
+        for name, value in self.updates.stats.items():
+            samples.append((f'pipeline_updates_{name}', {}, value))
+        for name, value in self.opportunities.stats.items():
+            samples.append((f'pipeline_opportunities_{name}', {}, value))
+        for name, value in self.stats.items():
+            samples.append((f'pipeline_{name}', {}, value))
+        for ex_id, errors in self.feed_errors.items():
+            samples.append(('pipeline_feed_consecutive_errors', {'exchange': ex_id}, errors))
+        return samples
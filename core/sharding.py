@@ -0,0 +1,224 @@
+# core/sharding.py
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core.market_analyzer import MarketAnalyzer
+from core.market_snapshot import MarketSnapshot
+from core.opportunity import Opportunity
+from exchanges.exchange_manager import ExchangeManager
+from exchanges.market_cache import MarketCache
+from strategies.arbitrage import ArbitrageStrategy
+from utils.logger import setup_logger
+
+# Set up logger
+logger = setup_logger('Sharding')
+
+
+def shard_pairs(pairs: List[str], shards: int) -> List[List[str]]:
+    """
+    Split pairs round-robin into at most `shards` non-empty groups.
+
+    A shard owns every exchange's feed for its pairs, so cross-exchange
+    detection for a pair never needs data from another shard.
+    """
+    groups = [pairs[i::shards] for i in range(max(1, shards))]
+    return [group for group in groups if group]
+
+
+class LiveMarketSource:
+    """
+    Order books for a shard, polled from the exchanges every poll_interval.
+
+    Markets come from the cache file the parent keeps fresh; the worker only
+    fetches what is missing from it and never rewrites it.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.exchange_manager = ExchangeManager(config)
+        self.exchanges = self.exchange_manager.exchanges
+        self.market_analyzer = MarketAnalyzer(self.exchanges, config)
+        self.market_cache = MarketCache(self.exchanges, config)
+        self._markets_loaded = False
+        self._next_at = 0.0
+
+    async def next_snapshot(self) -> MarketSnapshot:
+        if not self._markets_loaded:
+            await self.market_cache.load(save=False)
+            self._markets_loaded = True
+        wait = self._next_at - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._next_at = time.monotonic() + self.config['poll_interval']
+        return await self.market_analyzer.fetch_market_data(candles=False)  # Detection reads books only
+
+    async def close(self):
+        self.market_analyzer.close()
+        await self.exchange_manager.close()
+
+
+class OpportunityPublisher:
+    """Worker side of the IPC channel: newline-delimited JSON over a Unix socket."""
+
+    def __init__(self, socket_path: str, shard_id: int):
+        self.socket_path = socket_path
+        self.shard_id = shard_id
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self, attempts: int = 50, delay: float = 0.1):
+        for attempt in range(attempts):
+            try:
+                _, self._writer = await asyncio.open_unix_connection(self.socket_path)
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                if attempt == attempts - 1:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def send(self, message: dict):
+        message['shard'] = self.shard_id
+        self._writer.write(json.dumps(message).encode() + b'\n')
+        await self._writer.drain()
+
+    async def publish(self, opportunities: List[Opportunity]):
+        await self.send({'type': 'opportunities', 'items': [opportunity.to_dict() for opportunity in opportunities]})
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+
+class OpportunityServer:
+    """
+    Executor side of the IPC channel.
+
+    Accepts connections from shard workers and passes every published batch
+    of opportunities to `handler(shard_id, opportunities)`; other messages
+    (such as worker statistics) go to `on_message`.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        handler: Callable[[int, List[dict]], Awaitable[None]],
+        on_message: Optional[Callable[[dict], None]] = None
+    ):
+        self.socket_path = socket_path
+        self.handler = handler
+        self.on_message = on_message
+        self.stats = {'batches': 0, 'opportunities': 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message.get('type') == 'opportunities':
+                    self.stats['batches'] += 1
+                    self.stats['opportunities'] += len(message['items'])
+                    try:
+                        await self.handler(message['shard'], message['items'])
+                    except Exception as e:
+                        logger.error("Shard %s opportunity handler failed: %s", message['shard'], e)
+                elif self.on_message is not None:
+                    self.on_message(message)
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+async def scan_shard(
+    shard_id: int,
+    config: dict,
+    socket_path: str,
+    source_factory: Callable[[dict], object] = LiveMarketSource,
+    duration: Optional[float] = None
+):
+    """
+    Detect cross-exchange opportunities on one shard's pairs and publish them.
+
+    Runs until cancelled, or for `duration` seconds, after which a 'stats'
+    message with the shard's tick and pair-evaluation counts is sent.
+    """
+    source = source_factory(config)
+    strategy = ArbitrageStrategy(source.exchanges, config)
+    publisher = OpportunityPublisher(socket_path, shard_id)
+    await publisher.connect()
+    ticks = evaluations = 0
+    started = time.perf_counter()
+    try:
+        while duration is None or time.perf_counter() - started < duration:
+            try:
+                snapshot = await source.next_snapshot()
+                if not snapshot:
+                    continue
+                opportunities = strategy.find_arbitrage(snapshot)
+            except Exception as e:
+                logger.error("Shard %s scan failed: %s", shard_id, e)
+                continue
+            ticks += 1
+            evaluations += len(snapshot.pairs())
+            if opportunities:
+                await publisher.publish(opportunities)  # A broken channel ends the worker
+        await publisher.send({'type': 'stats', 'ticks': ticks, 'pair_evaluations': evaluations,
+                              'seconds': time.perf_counter() - started})
+    finally:
+        await publisher.close()
+        await source.close()
+
+
+def run_shard(
+    shard_id: int,
+    config: dict,
+    socket_path: str,
+    source_factory: Callable[[dict], object] = LiveMarketSource,
+    duration: Optional[float] = None
+):
+    """Process entry point for a shard worker."""
+    try:
+        asyncio.run(scan_shard(shard_id, config, socket_path, source_factory, duration))
+    except KeyboardInterrupt:
+        pass
+
+
+def parent_config(config: dict) -> Dict[str, object]:
+    """
+    Config for the process executing shard opportunities: the
+    'parent_rate_limit_share' of each exchange's request budget it reserves
+    for orders, balance refreshes and market loads.
+    """
+    return dict(config, rate_limit_share=config.get('rate_limit_share', 1.0) * config.get('parent_rate_limit_share', 0.25))
+
+
+def shard_config(config: dict, pairs: List[str], shards: int) -> Dict[str, object]:
+    """
+    Config for a worker: only its pairs, an equal share of what the parent
+    leaves of each exchange's request budget, and no metrics endpoint of its
+    own.
+    """
+    workers_share = config.get('rate_limit_share', 1.0) * (1 - config.get('parent_rate_limit_share', 0.25))
+    return dict(
+        config,
+        symbol_pairs=pairs,
+        rate_limit_share=workers_share / shards,
+        metrics_enabled=False
+    )
@@ -1,83 +1,177 @@
 # core/trade_executor.py
 import asyncio
 import logging
-from typing import List, Dict
+import time
+from typing import Callable, List, Dict, Optional
+from core.balance_manager import BalanceManager, Resource
+from core.execution_engine import ExecutionEngine
+from core.execution_scheduler import ExecutionScheduler
+from core.market_snapshot import MarketSnapshot
+from core.opportunity import CrossExchangeOpportunity, Opportunity, OpportunityQueue
 from exchanges.api_utils import APIUtils
+from exchanges.market_cache import MarketTable
 from utils.risk_management import check_liquidity, calculate_slippage
 from utils.logger import setup_logger
+from utils.metrics import DETECT_TO_ORDER
 
 # Set up logger
 logger = setup_logger('TradeExecutor')
 
 class TradeExecutor:
-    def __init__(self, exchanges: Dict[str, object], config: dict):
+    def __init__(self, exchanges: Dict[str, object], config: dict, markets: Optional[MarketTable] = None):
         self.exchanges = exchanges
         self.config = config
         self.api_utils = APIUtils()
+        self.execution_engine = ExecutionEngine(exchanges, config)
+        self.scheduler = ExecutionScheduler(config)
+        self.balances = BalanceManager(exchanges, config, markets)
+        self.execution_engine.add_listener(self.balances.on_execution)
+        self.queue = OpportunityQueue(config.get('opportunity_ttl', 1.0), config.get('opportunity_queue_size', 256))
 
-    async def execute_trades(self, opportunities: List[dict]):
-        """Execute profitable trades with risk management."""
-        for opp in sorted(opportunities, key=lambda x: x['profit'], reverse=True):
-            if opp['profit'] >= self.config['min_profit']:
-                logger.info(f"Executing opportunity: {opp}")
-                if await self._execute_trade(opp):
-                    logger.info("Trade executed successfully")
-                    await asyncio.sleep(self.config['cooldown'])
-                    break
-
-    async def _execute_trade(self, opportunity: dict) -> bool:
+    async def start(self):
+        """Load balances and start reconciling them in the background."""
+        await self.balances.start()
+
+    async def execute_trades(self, opportunities: List[Opportunity], snapshot: Optional[MarketSnapshot] = None):
+        """
+        Queue opportunities and schedule the best ones the scheduler can take now.
+
+        Returns as soon as executions are started: they run in the background
+        under the scheduler's per-venue cooldowns and balance locks, so market
+        scanning continues while orders are in flight. Opportunities left over
+        once every execution slot is taken stay queued until they expire or
+        are detected again. Kinds the executor cannot trade are not queued.
+        """
+        for opportunity in opportunities:
+            if self.executable(opportunity):
+                self.queue.push(opportunity)
+        while self.scheduler.has_capacity():
+            opportunity = self.queue.pop()
+            if opportunity is None:
+                break
+            self.try_execute(opportunity, snapshot)
+
+    async def run(self, queue: OpportunityQueue, snapshot: Callable[[Opportunity], Optional[MarketSnapshot]]):
+        """
+        Execute from `queue` until cancelled: whenever an execution slot is
+        free, take the best opportunity still valid at that moment.
+
+        Args:
+            queue: Opportunities to execute, such as MarketPipeline.opportunities.
+            snapshot: Current books for an opportunity's liquidity check.
+        """
+        while True:
+            await self.scheduler.wait_for_capacity()
+            opportunity = await queue.get()
+            self.try_execute(opportunity, snapshot(opportunity))
+
+    @staticmethod
+    def executable(opportunity: Opportunity) -> bool:
+        """Whether this kind of opportunity can be executed: only two-venue ones can."""
+        return isinstance(opportunity, CrossExchangeOpportunity)
+
+    def try_execute(self, opportunity: Opportunity, snapshot: Optional[MarketSnapshot] = None) -> bool:
+        """
+        Size, fund and schedule one opportunity; False if it is skipped.
+
+        Only cross-exchange opportunities are executed. Each is sized down to
+        what the cached balances can fund, and skipped if that falls below
+        'min_trade_amount'.
+        """
+        if opportunity.profit < self.config['min_profit'] or not self.executable(opportunity):
+            return False
+        requested = opportunity.amount or self.config['trade_amount']
+        amount = self.balances.tradable_amount(opportunity, requested)
+        if amount < self.config.get('min_trade_amount', 0.0):
+            logger.debug("Skipping %s: balances fund only %s", opportunity, amount)
+            return False
+        if amount != opportunity.amount:
+            opportunity = opportunity.resize(amount)
+        reservation = self.balances.reserve(opportunity, amount)
+        if not self.scheduler.try_schedule(opportunity, lambda: self._run_trade(opportunity, snapshot, reservation)):
+            self.balances.release(reservation)
+            return False
+        logger.info("Executing opportunity: %s", opportunity, extra={'opportunity': opportunity.to_dict()})
+        return True
+
+    async def _run_trade(
+        self,
+        opportunity: CrossExchangeOpportunity,
+        snapshot: Optional[MarketSnapshot],
+        reservation: Dict[Resource, float]
+    ) -> bool:
+        """Background body of a scheduled execution."""
+        try:
+            success = await self._execute_trade(opportunity, snapshot)
+        finally:
+            self.balances.release(reservation)
+        if success:
+            logger.info("Trade executed successfully")
+        return success
+
+    async def close(self):
+        """Wait for in-flight executions to finish, then stop balance reconciliation."""
+        await self.scheduler.drain()
+        await self.balances.close()
+
+    async def _execute_trade(
+        self,
+        opportunity: CrossExchangeOpportunity,
+        snapshot: Optional[MarketSnapshot] = None
+    ) -> bool:
         """Execute a single trade with slippage and liquidity checks."""
         try:
-            buy_ex = self.exchanges[opportunity['buy_exchange']]
-            sell_ex = self.exchanges[opportunity['sell_exchange']]
-            pair = opportunity['pair']
+            pair = opportunity.pair
+            amount = opportunity.amount
 
             # Verify liquidity
-            if not await self._check_liquidity(buy_ex, pair, self.config['trade_amount']):
-                logger.warning(f"Insufficient liquidity for {pair} on {opportunity['buy_exchange']}")
+            if not await self._check_liquidity(opportunity.buy_exchange, pair, amount, snapshot):
+                logger.warning("Insufficient liquidity for %s on %s", pair, opportunity.buy_exchange)
                 return False
 
-            # Execute buy order with slippage protection
-            buy_price = opportunity['buy_price'] * (1 - self.config['slippage_tolerance'])
-            buy_order = await self.api_utils.create_order_safely(
-                buy_ex,
-                symbol=pair,
-                side='buy',
-                amount=self.config['trade_amount'],
-                order_type='limit',
-                price=buy_price
-            )
-            if buy_order is None:
-                return False
+            DETECT_TO_ORDER.observe(time.monotonic() - opportunity.detected_at, opportunity.strategy)
 
-            # Execute sell order with slippage protection
-            sell_price = opportunity['sell_price'] * (1 + self.config['slippage_tolerance'])
-            sell_order = await self.api_utils.create_order_safely(
-                sell_ex,
-                symbol=pair,
-                side='sell',
-                amount=self.config['trade_amount'],
-                order_type='limit',
-                price=sell_price
+            # Fire both legs at once with slippage protection: buy limit above the worst
+            # level we expect to take, sell limit below the worst level we expect to hit
+            result = await self.execution_engine.execute_pair(
+                pair,
+                amount,
+                buy_exchange=opportunity.buy_exchange,
+                buy_price=opportunity.buy_price * (1 + self.config['slippage_tolerance']),
+                sell_exchange=opportunity.sell_exchange,
+                sell_price=opportunity.sell_price * (1 - self.config['slippage_tolerance'])
             )
-            if sell_order is None:
-                return False
 
-            logger.info(f"Executed orders: Buy {buy_order} | Sell {sell_order}")
-            return True
+            logger.info(
+                "Executed orders: Buy %s on %s (ack %s ms) | Sell %s on %s (ack %s ms) | Hedge %s",
+                result['filled_buy'], result['buy_exchange'], result['buy_ack_ms'],
+                result['filled_sell'], result['sell_exchange'], result['sell_ack_ms'], result['hedge_order'],
+                extra={'execution': {key: result[key] for key in ('pair', 'buy_exchange', 'sell_exchange', 'filled_buy',
+                                                                  'filled_sell', 'buy_ack_ms', 'sell_ack_ms', 'success')}}
+            )
+            return result['success']
         except Exception as e:
-            logger.error(f"Trade execution failed: {e}")
+            logger.error("Trade execution failed: %s", e)
             return False
 
-    async def _check_liquidity(self, exchange, symbol: str, amount: float) -> bool:
-        """Check if there is sufficient liquidity for the trade."""
-        order_book = await self.api_utils.fetch_order_book_safely(exchange, symbol)
+    async def _check_liquidity(
+        self,
+        exchange_id: str,
+        symbol: str,
+        amount: float,
+        snapshot: Optional[MarketSnapshot] = None
+    ) -> bool:
+        """
+        Check if there is sufficient liquidity for the trade.
+
+        Uses the tick's snapshot while it is within its staleness budget and only
+        refetches the order book once the snapshot has gone stale.
+        """
+        order_book = None
+        if snapshot is not None and not snapshot.is_stale():
+            order_book = snapshot.book(exchange_id, symbol)
+        if order_book is None:
+            order_book = await self.api_utils.fetch_order_book_safely(self.exchanges[exchange_id], symbol)
         if order_book is None:
             return False
-
-        cumulative = 0
-        for ask in order_book['asks']:
-            cumulative += ask[1]
-            if cumulative >= amount:
-                return True
-        return False
\ No newline at end of file
+        return check_liquidity(order_book, amount)
\ No newline at end of file
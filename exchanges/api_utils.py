@@ -1,12 +1,158 @@
 # exchanges/api_utils.py
 import asyncio
-import logging
-from typing import Any, Callable, Optional
-from ccxt import NetworkError, ExchangeError, RequestTimeout
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from ccxt import DDoSProtection, NetworkError, ExchangeError, RateLimitExceeded, RequestTimeout
+from exchanges.latency_tracker import LatencyTracker
+from exchanges.rate_limiter import RateLimiter, endpoint_class
+from utils.data_utils import timeframe_to_ms
+from utils.metrics import FETCH_LATENCY, REQUEST_FAILURES, REQUEST_RETRIES
+from utils.logger import setup_logger
 
-logger = logging.getLogger('APIUtils')
+logger = setup_logger('APIUtils')
 
 class APIUtils:
+    # Per-exchange caps on in-flight requests, shared by every APIUtils user
+    _semaphores: Dict[str, asyncio.Semaphore] = {}
+    # Per-exchange request rate schedulers, shared by every APIUtils user
+    _rate_limiters: Dict[str, RateLimiter] = {}
+    # Read-through cache and in-flight fetches for market data, shared by every APIUtils user
+    _cache: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()  # key -> (expires at, result)
+    _inflight: Dict[Hashable, asyncio.Future] = {}
+    _cache_size = 1024
+    _order_book_ttl = 0.25
+    _cache_stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+    # Round trip and order ack estimates per exchange, fed by every successful request
+    _latency: Optional[LatencyTracker] = None
+
+    @classmethod
+    def set_concurrency_limit(cls, exchange_id: str, limit: int):
+        """Cap the number of concurrent requests sent to an exchange."""
+        cls._semaphores[exchange_id] = asyncio.Semaphore(limit)
+
+    @classmethod
+    def set_rate_limiter(cls, exchange_id: str, limiter: RateLimiter):
+        """Route every request to an exchange through a shared rate limiter."""
+        cls._rate_limiters[exchange_id] = limiter
+
+    @classmethod
+    def set_latency_tracker(cls, tracker: Optional[LatencyTracker]):
+        """Time every successful request into `tracker` (None stops tracking)."""
+        cls._latency = tracker
+
+    @classmethod
+    def configure_cache(cls, order_book_ttl: float = 0.25, max_entries: int = 1024):
+        """
+        Set how long fetched order books are reused (seconds) and how many
+        results are cached. A TTL of 0 disables order book caching.
+        """
+        cls._order_book_ttl = order_book_ttl
+        cls._cache_size = max_entries
+
+    @classmethod
+    def cache_metrics(cls) -> Dict[str, int]:
+        """Cache hits, misses and requests that joined an in-flight fetch."""
+        return dict(cls._cache_stats, entries=len(cls._cache), inflight=len(cls._inflight))
+
+    @classmethod
+    async def _single_flight(
+        cls,
+        key: Hashable,
+        ttl: Callable[[], float],
+        fetch: Callable[[], Any],
+        use_cache: bool = True
+    ) -> Any:
+        """
+        Serve a fetch from the cache, join an identical fetch already in flight,
+        or start one and cache its result for `ttl()` seconds. Without
+        `use_cache` the cached result is skipped, but an in-flight fetch is
+        still joined and the new result still cached for other callers.
+
+        Results are shared between callers and must be treated as read-only.
+        """
+        entry = cls._cache.get(key) if use_cache else None
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                cls._cache.move_to_end(key)
+                cls._cache_stats['hits'] += 1
+                return entry[1]
+            del cls._cache[key]
+
+        task = cls._inflight.get(key)
+        if task is None:
+            cls._cache_stats['misses'] += 1
+            task = cls._inflight[key] = asyncio.ensure_future(cls._fetch_into_cache(key, ttl, fetch))
+            task.add_done_callback(lambda _: cls._inflight.pop(key, None))
+        else:
+            cls._cache_stats['coalesced'] += 1
+        # Shielded so a cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    @classmethod
+    async def _fetch_into_cache(cls, key: Hashable, ttl: Callable[[], float], fetch: Callable[[], Any]) -> Any:
+        result = await fetch()
+        seconds = ttl()
+        if result is not None and seconds > 0:
+            cls._cache[key] = (time.monotonic() + seconds, result)
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls._cache_size:
+                cls._cache.popitem(last=False)
+        return result
+
+    @classmethod
+    def rate_limit_metrics(cls) -> Dict[str, dict]:
+        """Queue depth, wait times and current rate per exchange."""
+        return {ex_id: limiter.metrics() for ex_id, limiter in cls._rate_limiters.items()}
+
+    @classmethod
+    def metric_samples(cls) -> List[Tuple[str, Dict[str, str], float]]:
+        """Rate limiter and cache state as gauge samples for the metrics endpoint."""
+        samples = []
+        for ex_id, metrics in cls.rate_limit_metrics().items():
+            labels = {'exchange': ex_id}
+            samples.append(('rate_limiter_rate', labels, metrics['rate']))
+            samples.append(('rate_limiter_throttled', labels, metrics['throttled']))
+            samples.append(('rate_limiter_wait_avg_seconds', labels, metrics['wait_avg']))
+            samples.append(('rate_limiter_wait_max_seconds', labels, metrics['wait_max']))
+            for endpoint, depth in metrics['queue_depth'].items():
+                samples.append(('rate_limiter_queue_depth', {'exchange': ex_id, 'endpoint': endpoint}, depth))
+        for name, value in cls.cache_metrics().items():
+            samples.append((f'api_cache_{name}', {}, value))
+        return samples
+
+    @classmethod
+    async def _call(cls, func: Callable, *args, **kwargs) -> Any:
+        """
+        Invoke an exchange method once its exchange's rate limiter releases it,
+        under the exchange's concurrency cap.
+        """
+        exchange = getattr(func, '__self__', None)
+        exchange_id = getattr(exchange, 'id', None)
+        limiter = cls._rate_limiters.get(exchange_id)
+        if limiter is not None:
+            await limiter.acquire(endpoint_class(func.__name__))
+        semaphore = cls._semaphores.get(exchange_id)
+        started = time.perf_counter()
+        try:
+            if semaphore is None:
+                result = await func(*args, **kwargs)
+            else:
+                async with semaphore:
+                    result = await func(*args, **kwargs)
+        except (DDoSProtection, RateLimitExceeded):
+            if limiter is not None:
+                limiter.on_throttled(getattr(exchange, 'last_response_headers', None))
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            FETCH_LATENCY.observe(elapsed, exchange_id, func.__name__)
+        if cls._latency is not None:
+            cls._latency.observe(exchange_id, func.__name__, elapsed)
+        if limiter is not None:
+            limiter.on_success(getattr(exchange, 'last_response_headers', None))
+        return result
+
     @staticmethod
     async def fetch_with_retry(
         func: Callable,
@@ -18,17 +164,23 @@ class APIUtils:
         """Fetch data from an API with retries and exponential backoff."""
         for attempt in range(max_retries):
             try:
-                result = await func(*args, **kwargs)
+                result = await APIUtils._call(func, *args, **kwargs)
                 return result
             except (NetworkError, ExchangeError, RequestTimeout) as e:
-                logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}")
+                logger.warning("Attempt %d failed for %s: %s", attempt + 1, func.__name__, e)
+                exchange_id = getattr(getattr(func, '__self__', None), 'id', None)
                 if attempt < max_retries - 1:
+                    REQUEST_RETRIES.inc(exchange_id, func.__name__)
+                    if isinstance(e, (DDoSProtection, RateLimitExceeded)) and exchange_id in APIUtils._rate_limiters:
+                        continue  # The rate limiter has already backed off this exchange
                     await asyncio.sleep(delay * (2 ** attempt))  # Exponential backoff
                 else:
-                    logger.error(f"All retries failed for {func.__name__}: {str(e)}")
+                    logger.error("All retries failed for %s: %s", func.__name__, e)
+                    REQUEST_FAILURES.inc(exchange_id, func.__name__)
                     return None
             except Exception as e:
-                logger.error(f"Unexpected error in {func.__name__}: {str(e)}")
+                logger.error("Unexpected error in %s: %s", func.__name__, e)
+                REQUEST_FAILURES.inc(getattr(getattr(func, '__self__', None), 'id', None), func.__name__)
                 return None
 
     @staticmethod
@@ -36,29 +188,114 @@ class APIUtils:
         exchange,
         symbol: str,
         max_retries: int = 3,
+        delay: float = 1.0,
+        use_cache: bool = True
+    ) -> Optional[dict]:
+        """
+        Safely fetch an order book with retries and error handling.
+
+        Concurrent requests for the same book share one fetch, and the result
+        is reused for the order book cache TTL. Continuous pollers pass
+        `use_cache=False`: a cached book would be one they already have.
+        """
+        return await APIUtils._single_flight(
+            (exchange.id, 'fetch_order_book', symbol),
+            lambda: APIUtils._order_book_ttl,
+            lambda: APIUtils.fetch_with_retry(exchange.fetch_order_book, max_retries, delay, symbol),
+            use_cache
+        )
+
+    @staticmethod
+    async def fetch_ohlcv_safely(
+        exchange,
+        symbol: str,
+        timeframe: str = '5m',
+        max_retries: int = 3,
+        delay: float = 1.0,
+        since: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Optional[List[list]]:
+        """
+        Safely fetch OHLCV data with retries and error handling.
+
+        Concurrent identical requests share one fetch. A fetch from `since`
+        includes the in-progress bar, so its result is only reused for the
+        order book cache TTL; full-window fetches are reused until the current
+        bar closes.
+        """
+        return await APIUtils._single_flight(
+            (exchange.id, 'fetch_ohlcv', symbol, timeframe, since, limit),
+            lambda: APIUtils._order_book_ttl if since is not None else APIUtils._until_next_bar(timeframe),
+            lambda: APIUtils.fetch_with_retry(exchange.fetch_ohlcv, max_retries, delay, symbol, timeframe, since, limit)
+        )
+
+    @staticmethod
+    def _until_next_bar(timeframe: str) -> float:
+        """Seconds until the current `timeframe` bar closes."""
+        step = timeframe_to_ms(timeframe)
+        return (step - int(time.time() * 1000) % step) / 1000.0
+
+    @staticmethod
+    async def create_order_safely(
+        exchange,
+        symbol: str,
+        side: str,
+        amount: float,
+        order_type: str = 'limit',
+        price: Optional[float] = None,
+        max_retries: int = 1,
         delay: float = 1.0
     ) -> Optional[dict]:
-        """Safely fetch an order book with retries and error handling."""
+        """
+        Safely place an order. Not retried by default: a timed-out request may
+        still have reached the exchange, and a retry could double the position.
+        """
+        return await APIUtils.fetch_with_retry(
+            exchange.create_order,
+            max_retries,
+            delay,
+            symbol,
+            order_type,
+            side,
+            amount,
+            price
+        )
+
+    @staticmethod
+    async def fetch_balance_safely(exchange, max_retries: int = 3, delay: float = 1.0) -> Optional[dict]:
+        """Safely fetch account balances (ccxt structure with 'free', 'used' and 'total')."""
+        return await APIUtils.fetch_with_retry(exchange.fetch_balance, max_retries, delay)
+
+    @staticmethod
+    async def fetch_order_safely(
+        exchange,
+        order_id: str,
+        symbol: str,
+        max_retries: int = 3,
+        delay: float = 0.2
+    ) -> Optional[dict]:
+        """Safely fetch an order's current status."""
         return await APIUtils.fetch_with_retry(
-            exchange.fetch_order_book,
+            exchange.fetch_order,
             max_retries,
             delay,
+            order_id,
             symbol
         )
 
     @staticmethod
-    async def fetch_ohlcv_safely(
+    async def cancel_order_safely(
         exchange,
+        order_id: str,
         symbol: str,
-        timeframe: str = '5m',
         max_retries: int = 3,
-        delay: float = 1.0
-    ) -> Optional[List[list]]:
-        """Safely fetch OHLCV data with retries and error handling."""
+        delay: float = 0.2
+    ) -> Optional[dict]:
+        """Safely cancel an open order."""
         return await APIUtils.fetch_with_retry(
-            exchange.fetch_ohlcv,
+            exchange.cancel_order,
             max_retries,
             delay,
-            symbol,
-            timeframe
-        )
\ No newline at end of file
+            order_id,
+            symbol
+        )
@@ -1,24 +1,91 @@
 # exchanges/exchange_manager.py
-import ccxt
+import asyncio
+import ssl
 from typing import Dict
 
+import aiohttp
+import certifi
+import ccxt.async_support as ccxt
+
+from exchanges.api_utils import APIUtils
+from exchanges.rate_limiter import RateLimiter
+from utils.logger import setup_logger
+
+logger = setup_logger('ExchangeManager')
+
+
 class ExchangeManager:
     def __init__(self, config: dict):
+        """
+        Initialize async exchange clients.
+
+        Must be constructed inside a running event loop, since every exchange
+        gets its own pooled aiohttp session.
+        """
         self.config = config
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        APIUtils.configure_cache(
+            order_book_ttl=config.get('order_book_cache_ttl', 0.25),
+            max_entries=config.get('api_cache_size', 1024)
+        )
         self.exchanges = self._initialize_exchanges()
 
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create a keep-alive HTTP session backed by a dedicated connection pool."""
+        connector = aiohttp.TCPConnector(
+            ssl=ssl.create_default_context(cafile=certifi.where()),
+            limit=self.config.get('max_concurrent_requests', 4),
+            keepalive_timeout=self.config.get('http_keepalive', 30),
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+        return aiohttp.ClientSession(connector=connector, trust_env=True)
+
     def _initialize_exchanges(self) -> Dict[str, ccxt.Exchange]:
-        """Initialize exchange instances with API credentials."""
+        """Initialize async exchange instances with API credentials and shared sessions."""
         exchanges = {}
         for ex_id, credentials in self.config['exchanges'].items():
             exchange_class = getattr(ccxt, ex_id)
+            session = self._create_session()
+            self.sessions[ex_id] = session
             exchanges[ex_id] = exchange_class({
                 'apiKey': credentials['api_key'],
                 'secret': credentials['api_secret'],
-                'enableRateLimit': True
+                'enableRateLimit': False,  # Throttled by the shared RateLimiter instead
+                'session': session
             })
+            APIUtils.set_concurrency_limit(ex_id, self.config.get('max_concurrent_requests', 4))
+            APIUtils.set_rate_limiter(ex_id, self._create_rate_limiter(ex_id, exchanges[ex_id]))
         return exchanges
 
+    def _create_rate_limiter(self, ex_id: str, exchange: ccxt.Exchange) -> RateLimiter:
+        """
+        Rate limiter for an exchange: 'rate_limits' overrides from the config,
+        otherwise ccxt's documented rateLimit (milliseconds between requests).
+        """
+        limits = self.config.get('rate_limits', {}).get(ex_id, {})
+        share = self.config.get('rate_limit_share', 1.0)  # Fraction of the budget this process may use
+        return RateLimiter(
+            ex_id,
+            rate=limits.get('rate', 1000.0 / max(exchange.rateLimit, 1)) * share,
+            burst=limits.get('burst', self.config.get('rate_limit_burst', 2)),
+            endpoint_rates=limits.get('endpoints')
+        )
+
     def get_exchange(self, exchange_id: str) -> ccxt.Exchange:
         """Get an exchange instance by ID."""
-        return self.exchanges.get(exchange_id)
\ No newline at end of file
+        return self.exchanges.get(exchange_id)
+
+    async def close(self):
+        """Close all exchange clients and their HTTP sessions."""
+        results = await asyncio.gather(
+            *(exchange.close() for exchange in self.exchanges.values()),
+            return_exceptions=True
+        )
+        for ex_id, result in zip(self.exchanges, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to close %s: %s", ex_id, result)
+        for session in self.sessions.values():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
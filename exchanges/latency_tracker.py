@@ -0,0 +1,101 @@
+# exchanges/latency_tracker.py
+import time
+from typing import Dict, List, Optional, Tuple
+
+BookKey = Tuple[str, str]  # (exchange_id, pair)
+
+ORDER_METHODS = {'create_order'}
+
+
+class LatencyTracker:
+    def __init__(self, config: dict):
+        """
+        Per-exchange latency estimates: how old a venue's quotes are when they
+        arrive, and how long an order takes to reach it.
+
+        Three exponentially weighted averages (smoothing 'latency_ewma_alpha')
+        are kept per exchange: the round trip of market data and account
+        requests, the order acknowledgement time, and book lag, the time from
+        the exchange's own book timestamp to the book being applied locally.
+
+        Exchange clocks are not trusted: a slowly rising floor under the raw
+        lags (receipt minus exchange timestamp) estimates the clock offset plus
+        the fastest delivery, and lag is measured above that floor, plus half
+        a round trip. A constant lag is therefore indistinguishable from clock
+        offset; lag that builds up on a venue is not. Lag beyond
+        'max_book_lag' seconds (an exchange stamping the book's last change
+        rather than its send time, or a clock jump) and books without a
+        timestamp fall back to the local receive time plus half a round trip.
+        """
+        self.alpha = config.get('latency_ewma_alpha', 0.2)
+        self.max_lag = config.get('max_book_lag', 1.0)
+        self.floor_alpha = config.get('clock_offset_alpha', 0.01)  # How fast the floor follows rising lags
+        self.rtt: Dict[str, float] = {}
+        self.ack: Dict[str, float] = {}
+        self.book_lag: Dict[str, float] = {}
+        self._books: Dict[BookKey, Tuple[float, float]] = {}  # (received at, lag), epoch seconds
+        self._floor: Dict[str, float] = {}  # Per exchange: clock offset plus fastest delivery, seconds
+        self.fallbacks: Dict[str, int] = {}  # Books whose timestamp could not be used, per exchange
+
+    def _smooth(self, averages: Dict[str, float], exchange_id: str, value: float):
+        previous = averages.get(exchange_id)
+        averages[exchange_id] = value if previous is None else previous + self.alpha * (value - previous)
+
+    def observe(self, exchange_id: Optional[str], method: str, seconds: float):
+        """Record a completed request: order placements as acks, anything else as a round trip."""
+        if exchange_id is None:
+            return
+        self._smooth(self.ack if method in ORDER_METHODS else self.rtt, exchange_id, seconds)
+
+    def observe_book(self, exchange_id: str, pair: str, timestamp: Optional[int], received: Optional[float] = None):
+        """Record a book applied at `received` (default now) that the exchange stamped `timestamp` (ms)."""
+        received = time.time() if received is None else received
+        transit = self.rtt.get(exchange_id, 0.0) / 2
+        lag = None
+        if timestamp:
+            raw = received - timestamp / 1000
+            floor = self._floor.get(exchange_id)
+            if floor is None or raw < floor:
+                floor = raw
+            elif raw - floor <= self.max_lag:  # Implausible lags must not drag the floor up
+                floor += self.floor_alpha * (raw - floor)
+            self._floor[exchange_id] = floor
+            lag = raw - floor + transit
+            if lag > self.max_lag:
+                lag = None
+        if lag is None:
+            lag = transit
+            self.fallbacks[exchange_id] = self.fallbacks.get(exchange_id, 0) + 1
+        self._smooth(self.book_lag, exchange_id, lag)
+        self._books[(exchange_id, pair)] = (received, lag)
+
+    def book_age(self, exchange_id: str, pair: str, now: Optional[float] = None) -> Optional[float]:
+        """Seconds since the exchange produced its latest book for `pair`, or None if none was seen."""
+        entry = self._books.get((exchange_id, pair))
+        if entry is None:
+            return None
+        received, lag = entry
+        return max(0.0, (time.time() if now is None else now) - received) + lag
+
+    def order_delay(self, exchange_id: str) -> float:
+        """Expected seconds for an order sent now to reach the exchange (half its ack or round trip)."""
+        seconds = self.ack.get(exchange_id)
+        if seconds is None:
+            seconds = self.rtt.get(exchange_id, 0.0)
+        return seconds / 2
+
+    def window(self, exchange_id: str, pair: str, now: Optional[float] = None) -> float:
+        """Seconds the exchange's price can move between its latest book and an order arriving there."""
+        return (self.book_age(exchange_id, pair, now) or 0.0) + self.order_delay(exchange_id)
+
+    def metric_samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Latency estimates per exchange as gauge samples for the metrics endpoint."""
+        samples = []
+        for name, averages in (('rtt', self.rtt), ('order_ack', self.ack), ('book_lag', self.book_lag)):
+            for ex_id, seconds in averages.items():
+                samples.append((f'exchange_{name}_seconds', {'exchange': ex_id}, seconds))
+        for ex_id, floor in self._floor.items():
+            samples.append(('exchange_clock_offset_seconds', {'exchange': ex_id}, floor - self.rtt.get(ex_id, 0.0) / 2))
+        for ex_id, count in self.fallbacks.items():
+            samples.append(('exchange_book_timestamp_fallbacks', {'exchange': ex_id}, count))
+        return samples
@@ -0,0 +1,266 @@
+# exchanges/market_cache.py
+import asyncio
+import json
+import math
+import os
+import time
+from fractions import Fraction
+from typing import Dict, Iterable, Optional, Tuple
+
+import ccxt
+import numpy as np
+from ccxt.base.decimal_to_precision import DECIMAL_PLACES, TICK_SIZE
+
+from exchanges.api_utils import APIUtils
+from utils.logger import setup_logger
+
+logger = setup_logger('MarketCache')
+
+CACHE_VERSION = 1  # Bump when the file layout changes
+DEFAULT_PATH = '~/.cache/my_xrp_bot/market_cache.json'
+
+MarketKey = Tuple[str, str]  # (exchange_id, pair)
+
+
+class MarketTable:
+    """
+    Fees and precision per (exchange, pair), resolved once from the loaded markets.
+
+    Lookups are single dictionary hits after the first; the resolution order
+    is the market's own taker fee, then the exchange's trading fee, then
+    'default_taker_fee'. invalidate() drops an exchange's entries after its
+    markets are reloaded, and bumps `version` so consumers holding derived
+    state (such as the triangular strategy's graph) know to rebuild it.
+    """
+
+    def __init__(self, exchanges: Dict[str, object], config: dict):
+        self.exchanges = exchanges
+        self.config = config
+        self.version = 0
+        self._taker: Dict[MarketKey, float] = {}
+        self._amount_step: Dict[MarketKey, Optional[float]] = {}
+        self._min_amount: Dict[MarketKey, float] = {}
+        self._fee_vectors: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+        self._common_steps: Dict[Tuple[str, Tuple[str, ...]], Optional[float]] = {}
+
+    def _market(self, exchange_id: str, pair: str) -> dict:
+        markets = getattr(self.exchanges.get(exchange_id), 'markets', None) or {}
+        return markets.get(pair) or {}
+
+    def taker_fee(self, exchange_id: str, pair: str) -> float:
+        key = (exchange_id, pair)
+        fee = self._taker.get(key)
+        if fee is None:
+            fee = self._market(exchange_id, pair).get('taker')
+            if fee is None:
+                fees = getattr(self.exchanges.get(exchange_id), 'fees', None) or {}
+                fee = fees.get('trading', fees).get('taker')
+            fee = self._taker[key] = self.config.get('default_taker_fee', 0.0026) if fee is None else float(fee)
+        return fee
+
+    def taker_fees(self, pair: str, exchange_ids: Tuple[str, ...]) -> np.ndarray:
+        """Taker fees of `pair` on each of `exchange_ids`, as a reusable read-only array."""
+        key = (pair, exchange_ids)
+        fees = self._fee_vectors.get(key)
+        if fees is None:
+            fees = self._fee_vectors[key] = np.array([self.taker_fee(ex_id, pair) for ex_id in exchange_ids])
+            fees.flags.writeable = False
+        return fees
+
+    def amount_step(self, exchange_id: str, pair: str) -> Optional[float]:
+        """Smallest order size increment, or None if the market does not say."""
+        key = (exchange_id, pair)
+        if key not in self._amount_step:
+            precision = (self._market(exchange_id, pair).get('precision') or {}).get('amount')
+            mode = getattr(self.exchanges.get(exchange_id), 'precisionMode', TICK_SIZE)
+            if precision is None:
+                step = None
+            elif mode == DECIMAL_PLACES:
+                step = 10.0 ** -precision
+            else:
+                step = float(precision)
+            self._amount_step[key] = step
+        return self._amount_step[key]
+
+    def min_amount(self, exchange_id: str, pair: str) -> float:
+        key = (exchange_id, pair)
+        value = self._min_amount.get(key)
+        if value is None:
+            limits = (self._market(exchange_id, pair).get('limits') or {}).get('amount') or {}
+            value = self._min_amount[key] = float(limits.get('min') or 0.0)
+        return value
+
+    def common_step(self, pair: str, exchange_ids: Tuple[str, ...]) -> Optional[float]:
+        """
+        Smallest size that is a whole number of steps on every venue (the
+        least common multiple of their steps), or None if none has a step.
+        """
+        key = (pair, exchange_ids)
+        if key not in self._common_steps:
+            steps = [step for step in (self.amount_step(ex_id, pair) for ex_id in exchange_ids) if step]
+            common = None
+            if steps:
+                # Steps are decimal sizes such as 0.002 and 0.003; float division cannot find their multiple
+                fractions = [Fraction(repr(step)) for step in steps]
+                common = float(Fraction(
+                    math.lcm(*(f.numerator for f in fractions)), math.gcd(*(f.denominator for f in fractions))
+                ))
+            self._common_steps[key] = common
+        return self._common_steps[key]
+
+    def round_amount(self, pair: str, exchange_ids: Iterable[str], amount: float) -> float:
+        """
+        Round `amount` down to a size every venue accepts, or 0.0 if it falls
+        below any venue's minimum.
+        """
+        exchange_ids = tuple(exchange_ids)
+        step = self.common_step(pair, exchange_ids)
+        if step:
+            amount = round(math.floor(amount / step + 1e-9) * step, 12)  # Drop float residue like 0.009000000000000001
+        if any(amount < self.min_amount(ex_id, pair) for ex_id in exchange_ids) or amount <= 0:
+            return 0.0
+        return amount
+
+    def invalidate(self, exchange_id: Optional[str] = None):
+        """Forget resolved values for an exchange (default: all) after its markets change."""
+        for table in (self._taker, self._amount_step, self._min_amount):
+            for key in [key for key in table if exchange_id is None or key[0] == exchange_id]:
+                del table[key]
+        self._fee_vectors.clear()
+        self._common_steps.clear()
+        self.version += 1
+
+
+class MarketCache:
+    def __init__(self, exchanges: Dict[str, object], config: dict, table: Optional[MarketTable] = None):
+        """
+        On-disk cache of every exchange's markets (symbols, precision, limits, fees).
+
+        At startup markets are installed from the file with set_markets, so a
+        cold start is a local read; exchanges missing from it are loaded from
+        the API in parallel. Entries older than 'market_cache_ttl' are
+        installed anyway and refreshed in the background, and the file is
+        rewritten atomically. A file written by another cache layout or ccxt
+        version is ignored: every exchange is then loaded from the API
+        before start() returns. The file lives at 'market_cache_path'
+        (default under ~/.cache), so it stays out of the working directory.
+        """
+        self.exchanges = exchanges
+        self.config = config
+        self.table = table
+        self.path = os.path.expanduser(config.get('market_cache_path', DEFAULT_PATH))
+        self.ttl = config.get('market_cache_ttl', 86400)
+        self.entries: Dict[str, dict] = {}  # exchange_id -> {'fetched_at', 'markets', 'currencies'}
+        self._task: Optional[asyncio.Task] = None
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable market cache %s: %s", self.path, e)
+            return {}
+        if data.get('version') != CACHE_VERSION or data.get('ccxt_version') != ccxt.__version__:
+            logger.info("Market cache %s is from another version, reloading markets", self.path)
+            return {}
+        return data.get('exchanges', {})
+
+    def save(self):
+        """Write the cache atomically, so readers never see a partial file."""
+        tmp = f'{self.path}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'ccxt_version': ccxt.__version__, 'exchanges': self.entries}, f)
+            os.replace(tmp, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to write market cache %s: %s", self.path, e)
+
+    def _install(self, exchange_id: str, entry: dict):
+        self.exchanges[exchange_id].set_markets(entry['markets'], entry.get('currencies'))
+        self.entries[exchange_id] = entry
+        if self.table is not None:
+            self.table.invalidate(exchange_id)
+
+    async def _fetch(self, exchange_id: str) -> bool:
+        exchange = self.exchanges[exchange_id]
+        markets = await APIUtils.fetch_with_retry(exchange.load_markets, 3, 1.0, True)
+        if not markets:
+            logger.warning("Failed to load markets for %s", exchange_id)
+            return False
+        self.entries[exchange_id] = {
+            'fetched_at': time.time(),
+            'markets': exchange.markets,
+            'currencies': exchange.currencies
+        }
+        if self.table is not None:
+            self.table.invalidate(exchange_id)
+        return True
+
+    def _cacheable(self) -> list:
+        return [ex_id for ex_id, exchange in self.exchanges.items() if hasattr(exchange, 'set_markets')]
+
+    async def load(self, save: bool = True):
+        """
+        Install cached markets, fetching those that are missing in parallel.
+
+        Args:
+            save: Rewrite the file if anything was fetched (workers that
+                share the parent's cache pass False).
+        """
+        cached = self._read()
+        installed, missing = 0, []
+        for ex_id in self._cacheable():
+            entry = cached.get(ex_id)
+            if entry and entry.get('markets'):
+                try:
+                    self._install(ex_id, entry)
+                    installed += 1
+                    continue
+                except Exception as e:
+                    logger.warning("Cached markets for %s are unusable: %s", ex_id, e)
+            missing.append(ex_id)
+        if missing:
+            results = await asyncio.gather(*(self._fetch(ex_id) for ex_id in missing))
+            if save and any(results):
+                self.save()
+            logger.info("Markets ready: %s from cache, %s of %s fetched", installed, sum(results), len(missing))
+
+    def _stale(self) -> list:
+        now = time.time()
+        return [ex_id for ex_id in self._cacheable()
+                if now - self.entries.get(ex_id, {}).get('fetched_at', 0) >= self.ttl]
+
+    async def refresh(self, exchange_ids: Optional[Iterable[str]] = None):
+        """Reload markets for the given exchanges (default: stale ones) and rewrite the file."""
+        exchange_ids = self._stale() if exchange_ids is None else list(exchange_ids)
+        if exchange_ids:
+            results = await asyncio.gather(*(self._fetch(ex_id) for ex_id in exchange_ids))
+            if any(results):
+                self.save()
+
+    async def start(self):
+        """Load markets, then keep them refreshed in the background."""
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Market refresh failed: %s", e)
+            oldest = min((entry['fetched_at'] for entry in self.entries.values()), default=time.time())
+            await asyncio.sleep(max(60.0, oldest + self.ttl - time.time()))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
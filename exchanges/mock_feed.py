@@ -0,0 +1,227 @@
+# exchanges/mock_feed.py
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from aiohttp import web, WSMsgType
+
+from exchanges.order_book_stream import L2Book
+from utils.logger import setup_logger
+
+logger = setup_logger('MockFeedServer')
+
+
+class MockFeedServer:
+    """
+    Local WebSocket order book feed speaking the OrderBookStream protocol.
+
+    Generates random-walk books for every (exchange, symbol), or replays a
+    JSON-lines file of recorded feed messages, so the streaming engine can be
+    exercised offline. `gap_probability` drops outgoing deltas to force
+    sequence gaps and resyncs on the client side.
+    """
+
+    def __init__(
+        self,
+        exchanges: List[str],
+        symbols: List[str],
+        updates_per_second: float = 100.0,
+        levels: int = 25,
+        gap_probability: float = 0.0,
+        replay_path: Optional[str] = None,
+        replay_speed: float = 0.0,
+        initial_prices: Optional[Dict[str, float]] = None,
+        seed: Optional[int] = None
+    ):
+        self.exchanges = exchanges
+        self.symbols = symbols
+        self.updates_per_second = updates_per_second
+        self.levels = levels
+        self.gap_probability = gap_probability
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        self.rng = random.Random(seed)
+        self.books: Dict[Tuple[str, str], L2Book] = {}
+        self.mids: Dict[Tuple[str, str], float] = {}
+        self.clients: Dict[web.WebSocketResponse, Set[str]] = {}
+        self.sent = 0
+        self._runner: Optional[web.AppRunner] = None
+        self._producer: Optional[asyncio.Task] = None
+
+        initial_prices = initial_prices or {}
+        for ex_id in exchanges:
+            for symbol in symbols:
+                mid = initial_prices.get(symbol, 100.0 + 10.0 * symbols.index(symbol))
+                self.mids[(ex_id, symbol)] = mid * (1 + self.rng.uniform(-0.001, 0.001))
+                self.books[(ex_id, symbol)] = self._generate_book(ex_id, symbol)
+
+    def _generate_book(self, exchange_id: str, symbol: str) -> L2Book:
+        mid = self.mids[(exchange_id, symbol)]
+        tick = mid * 0.0001
+        book = L2Book(exchange_id, symbol)
+        book.apply_snapshot(
+            [[round(mid - tick * (i + 1), 8), round(self.rng.uniform(0.1, 2.0), 8)] for i in range(self.levels)],
+            [[round(mid + tick * (i + 1), 8), round(self.rng.uniform(0.1, 2.0), 8)] for i in range(self.levels)],
+            sequence=0,
+            timestamp=int(time.time() * 1000)
+        )
+        return book
+
+    def _snapshot_message(self, book: L2Book) -> dict:
+        data = book.to_ccxt()
+        return {
+            'type': 'snapshot',
+            'exchange': book.exchange_id,
+            'symbol': book.symbol,
+            'seq': book.sequence,
+            'timestamp': book.timestamp,
+            'bids': data['bids'],
+            'asks': data['asks'],
+            'sent_ns': time.time_ns()
+        }
+
+    def _random_delta(self, exchange_id: str, symbol: str) -> dict:
+        """Move the mid price a little and rewrite a couple of levels around it."""
+        key = (exchange_id, symbol)
+        book = self.books[key]
+        self.mids[key] *= 1 + self.rng.gauss(0, 0.0002)
+        mid = self.mids[key]
+        tick = mid * 0.0001
+        bids, asks = [], []
+
+        # Remove levels that crossed the new mid, then refresh one level per side
+        for price in [p for p in book.bids if p >= mid]:
+            bids.append([price, 0.0])
+        for price in [p for p in book.asks if p <= mid]:
+            asks.append([price, 0.0])
+        bids.append([round(mid - tick * self.rng.randint(1, self.levels), 8), round(self.rng.uniform(0.1, 2.0), 8)])
+        asks.append([round(mid + tick * self.rng.randint(1, self.levels), 8), round(self.rng.uniform(0.1, 2.0), 8)])
+
+        return {
+            'type': 'delta',
+            'exchange': exchange_id,
+            'symbol': symbol,
+            'seq': book.sequence + 1,
+            'timestamp': int(time.time() * 1000),
+            'bids': bids,
+            'asks': asks
+        }
+
+    async def _broadcast(self, message: dict):
+        key = (message['exchange'], message['symbol'])
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = L2Book(*key)
+        if message['type'] == 'snapshot':
+            book.apply_snapshot(message['bids'], message['asks'], message['seq'], message.get('timestamp'))
+        else:
+            book.apply_delta(message['bids'], message['asks'], message['seq'], message.get('timestamp'))
+            if self.gap_probability and self.rng.random() < self.gap_probability:
+                return  # Drop the delta on the wire to simulate a gap
+
+        message['sent_ns'] = time.time_ns()
+        payload = json.dumps(message)
+        for ws, subscribed in list(self.clients.items()):
+            if message['symbol'] in subscribed and not ws.closed:
+                await ws.send_str(payload)
+                self.sent += 1
+
+    async def _produce_random(self):
+        keys = list(self.books.keys())
+        interval = 1.0 / self.updates_per_second if self.updates_per_second > 0 else 0.0
+        while True:
+            exchange_id, symbol = keys[self.rng.randrange(len(keys))]
+            await self._broadcast(self._random_delta(exchange_id, symbol))
+            await asyncio.sleep(interval)
+
+    async def _produce_replay(self):
+        previous_ts = None
+        with open(self.replay_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                message = json.loads(line)
+                ts = message.get('timestamp')
+                if self.replay_speed > 0 and previous_ts is not None and ts is not None:
+                    await asyncio.sleep(max(0.0, (ts - previous_ts) / 1000.0 / self.replay_speed))
+                else:
+                    await asyncio.sleep(0)
+                previous_ts = ts
+                await self._broadcast(message)
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=15)
+        await ws.prepare(request)
+        self.clients[ws] = set()
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                request_msg = json.loads(msg.data)
+                if request_msg.get('op') == 'subscribe':
+                    self.clients[ws].update(request_msg['symbols'])
+                    for (ex_id, symbol), book in self.books.items():
+                        if symbol in request_msg['symbols'] and book.synced:
+                            await ws.send_json(self._snapshot_message(book))
+                elif request_msg.get('op') == 'snapshot':
+                    book = self.books.get((request_msg['exchange'], request_msg['symbol']))
+                    if book is not None and book.synced:
+                        await ws.send_json(self._snapshot_message(book))
+        finally:
+            self.clients.pop(ws, None)
+        return ws
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765):
+        """Start serving the feed on ws://host:port/feed."""
+        app = web.Application()
+        app.router.add_get('/feed', self._handle_ws)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        producer = self._produce_replay() if self.replay_path else self._produce_random()
+        self._producer = asyncio.create_task(producer)
+        logger.info("Mock feed serving on ws://%s:%s/feed", host, port)
+
+    async def stop(self):
+        if self._producer is not None:
+            self._producer.cancel()
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                pass
+        for ws in list(self.clients):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+async def _serve(args: argparse.Namespace):
+    server = MockFeedServer(
+        exchanges=args.exchanges,
+        symbols=args.symbols,
+        updates_per_second=args.rate,
+        gap_probability=args.gap_probability,
+        replay_path=args.replay,
+        replay_speed=args.speed
+    )
+    await server.start(args.host, args.port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local mock/replay order book feed')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--exchanges', nargs='+', default=['cex', 'kraken'])
+    parser.add_argument('--symbols', nargs='+', default=['BTC/USD', 'ETH/USD', 'ETH/BTC'])
+    parser.add_argument('--rate', type=float, default=100.0, help='Generated updates per second')
+    parser.add_argument('--gap-probability', type=float, default=0.0)
+    parser.add_argument('--replay', help='JSON-lines file of recorded feed messages')
+    parser.add_argument('--speed', type=float, default=0.0, help='Replay speed multiplier (0 = as fast as possible)')
+    asyncio.run(_serve(parser.parse_args()))
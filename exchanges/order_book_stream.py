@@ -0,0 +1,218 @@
+# exchanges/order_book_stream.py
+import asyncio
+import bisect
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from utils.logger import setup_logger
+
+logger = setup_logger('OrderBookStream')
+
+BookKey = Tuple[str, str]  # (exchange_id, symbol)
+
+
+class SequenceGapError(Exception):
+    """Raised when a delta does not directly follow the book's last sequence number."""
+
+
+class L2Book:
+    """
+    Local level-2 order book maintained from a snapshot plus incremental deltas.
+
+    Price levels are kept in dicts for O(1) updates, with a sorted price index
+    maintained by bisection so top-of-book reads never re-sort the book.
+    """
+
+    def __init__(self, exchange_id: str, symbol: str):
+        self.exchange_id = exchange_id
+        self.symbol = symbol
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+        self._bid_prices: List[float] = []  # ascending; best bid is last
+        self._ask_prices: List[float] = []  # ascending; best ask is first
+        self.sequence: Optional[int] = None
+        self.timestamp: Optional[int] = None
+
+    @property
+    def synced(self) -> bool:
+        return self.sequence is not None
+
+    def reset(self):
+        """Drop all levels and mark the book as needing a snapshot."""
+        self.bids.clear()
+        self.asks.clear()
+        self._bid_prices.clear()
+        self._ask_prices.clear()
+        self.sequence = None
+
+    def apply_snapshot(self, bids: Iterable[list], asks: Iterable[list], sequence: int, timestamp: Optional[int] = None):
+        """Replace the book with a full snapshot."""
+        self.reset()
+        self._apply_levels(self.bids, self._bid_prices, bids)
+        self._apply_levels(self.asks, self._ask_prices, asks)
+        self.sequence = sequence
+        self.timestamp = timestamp
+
+    def apply_delta(self, bids: Iterable[list], asks: Iterable[list], sequence: int, timestamp: Optional[int] = None):
+        """
+        Apply an incremental update. A size of zero removes the level.
+
+        Raises:
+            SequenceGapError: If the book is unsynced or the delta skips a sequence number.
+        """
+        if self.sequence is None or sequence != self.sequence + 1:
+            raise SequenceGapError(
+                f"{self.exchange_id} {self.symbol}: expected seq {None if self.sequence is None else self.sequence + 1}, got {sequence}"
+            )
+        self._apply_levels(self.bids, self._bid_prices, bids)
+        self._apply_levels(self.asks, self._ask_prices, asks)
+        self.sequence = sequence
+        self.timestamp = timestamp
+
+    @staticmethod
+    def _apply_levels(levels: Dict[float, float], prices: List[float], updates: Iterable[list]):
+        for price, size in updates:
+            price = float(price)
+            size = float(size)
+            if size <= 0:
+                if levels.pop(price, None) is not None:
+                    del prices[bisect.bisect_left(prices, price)]
+            else:
+                if price not in levels:
+                    bisect.insort(prices, price)
+                levels[price] = size
+
+    def best_bid(self) -> Optional[float]:
+        return self._bid_prices[-1] if self._bid_prices else None
+
+    def best_ask(self) -> Optional[float]:
+        return self._ask_prices[0] if self._ask_prices else None
+
+    def to_ccxt(self, depth: Optional[int] = None) -> dict:
+        """Export the book in ccxt's order book format, best levels first."""
+        bid_prices = self._bid_prices[::-1] if depth is None else self._bid_prices[:-depth - 1:-1]
+        ask_prices = self._ask_prices if depth is None else self._ask_prices[:depth]
+        return {
+            'symbol': self.symbol,
+            'bids': [[price, self.bids[price]] for price in bid_prices],
+            'asks': [[price, self.asks[price]] for price in ask_prices],
+            'timestamp': self.timestamp,
+            'nonce': self.sequence
+        }
+
+
+class OrderBookStream:
+    """
+    Streaming order book engine for a normalized WebSocket delta feed.
+
+    Messages are JSON objects of the form
+    {"type": "snapshot" | "delta", "exchange": ..., "symbol": ..., "seq": int,
+     "timestamp": ms, "bids": [[price, size], ...], "asks": [[price, size], ...]}.
+    On a sequence gap the affected book is reset, deltas are buffered and a
+    fresh snapshot is requested from the feed; buffered deltas newer than the
+    snapshot are replayed once it arrives.
+    """
+
+    def __init__(self, url: str, symbols: List[str], depth: int = 25, reconnect_delay: float = 1.0):
+        self.url = url
+        self.symbols = symbols
+        self.depth = depth
+        self.reconnect_delay = reconnect_delay
+        self.books: Dict[BookKey, L2Book] = {}
+        self.listeners: List[Callable[[L2Book], None]] = []
+        self.stats = {'updates': 0, 'snapshots': 0, 'gaps': 0, 'messages': 0}
+        self._pending: Dict[BookKey, List[dict]] = {}
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._closed = False
+
+    def add_listener(self, callback: Callable[[L2Book], None]):
+        """Register a callback invoked with the book after every applied change."""
+        self.listeners.append(callback)
+
+    def get_book(self, exchange_id: str, symbol: str) -> Optional[L2Book]:
+        book = self.books.get((exchange_id, symbol))
+        return book if book is not None and book.synced else None
+
+    async def run(self):
+        """Connect, subscribe and process messages until closed, reconnecting on failure."""
+        async with aiohttp.ClientSession() as session:
+            while not self._closed:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=15) as ws:
+                        self._ws = ws
+                        await ws.send_json({'op': 'subscribe', 'symbols': self.symbols, 'depth': self.depth})
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self.handle_message(json.loads(msg.data))
+                            elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning("Feed connection to %s failed: %s", self.url, e)
+                finally:
+                    self._ws = None
+                    # Every book must be rebuilt from a snapshot after a reconnect
+                    for book in self.books.values():
+                        book.reset()
+                    self._pending.clear()
+                if not self._closed:
+                    await asyncio.sleep(self.reconnect_delay)
+
+    async def close(self):
+        self._closed = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def handle_message(self, message: dict):
+        """Apply a single feed message to the local books."""
+        self.stats['messages'] += 1
+        key = (message['exchange'], message['symbol'])
+        book = self.books.get(key)
+        if book is None:
+            book = self.books[key] = L2Book(*key)
+
+        if message['type'] == 'snapshot':
+            book.apply_snapshot(message['bids'], message['asks'], message['seq'], message.get('timestamp'))
+            self.stats['snapshots'] += 1
+            try:
+                for delta in self._pending.pop(key, []):
+                    if delta['seq'] > book.sequence:
+                        self._apply_delta(book, delta)
+            except SequenceGapError as e:
+                await self._resync(book, delta, e)
+                return
+            self._notify(book)
+            return
+
+        if key in self._pending:
+            # Resync in progress: hold deltas until the snapshot arrives
+            self._pending[key].append(message)
+            return
+        try:
+            self._apply_delta(book, message)
+        except SequenceGapError as e:
+            await self._resync(book, message, e)
+            return
+        self._notify(book)
+
+    def _apply_delta(self, book: L2Book, message: dict):
+        book.apply_delta(message['bids'], message['asks'], message['seq'], message.get('timestamp'))
+        self.stats['updates'] += 1
+
+    async def _resync(self, book: L2Book, message: dict, error: SequenceGapError):
+        key = (book.exchange_id, book.symbol)
+        self.stats['gaps'] += 1
+        logger.warning("Sequence gap, resyncing from snapshot: %s", error)
+        book.reset()
+        self._pending[key] = [message]
+        if self._ws is not None:
+            await self._ws.send_json({'op': 'snapshot', 'exchange': book.exchange_id, 'symbol': book.symbol, 'depth': self.depth})
+
+    def _notify(self, book: L2Book):
+        for callback in self.listeners:
+            try:
+                callback(book)
+            except Exception as e:
+                logger.error("Order book listener failed: %s", e)
+
@@ -0,0 +1,246 @@
+# exchanges/rate_limiter.py
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Deque, Dict, Mapping, Optional, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger('RateLimiter')
+
+# Lower value = served first when requests compete for the exchange's budget
+ENDPOINT_PRIORITIES = {
+    'orders': 0,
+    'market_data': 1,
+    'account': 2,
+    'history': 3
+}
+
+ENDPOINT_CLASSES = {
+    'create_order': 'orders',
+    'cancel_order': 'orders',
+    'fetch_order': 'orders',
+    'fetch_open_orders': 'orders',
+    'fetch_order_book': 'market_data',
+    'fetch_ticker': 'market_data',
+    'fetch_tickers': 'market_data',
+    'fetch_balance': 'account',
+    'load_markets': 'account',
+    'fetch_ohlcv': 'history',
+    'fetch_trades': 'history'
+}
+
+
+def endpoint_class(method_name: str) -> str:
+    """Endpoint class of an exchange method, defaulting to 'market_data'."""
+    return ENDPOINT_CLASSES.get(method_name, 'market_data')
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second up to `capacity`."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (after refill)."""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        exchange_id: str,
+        rate: float,
+        burst: float = 1.0,
+        endpoint_rates: Optional[Mapping[str, float]] = None,
+        min_rate_fraction: float = 0.1,
+        decrease_factor: float = 0.5,
+        increase_fraction: float = 0.02
+    ):
+        """
+        Prioritized token-bucket scheduler for one exchange.
+
+        Every request takes a token from the exchange bucket and, if its
+        endpoint class has its own limit, from that class's bucket. Queued
+        requests are served by endpoint priority (orders first, OHLCV last),
+        then in arrival order. Each endpoint class queues in arrival order, so
+        releasing a request only compares the heads of the class queues.
+
+        The exchange rate adapts AIMD-style: it is cut by `decrease_factor` on
+        every throttling response (and paused for any Retry-After) and grows by
+        `increase_fraction` of the configured rate per successful request, back
+        up to the configured rate.
+
+        Args:
+            exchange_id: Exchange the limiter gates.
+            rate: Requests per second allowed by the exchange.
+            burst: Bucket capacity, i.e. requests allowed back to back.
+            endpoint_rates: Optional per-endpoint-class requests per second.
+        """
+        self.exchange_id = exchange_id
+        self.max_rate = rate
+        self.min_rate = rate * min_rate_fraction
+        self.decrease_factor = decrease_factor
+        self.increase = rate * increase_fraction
+        self.bucket = TokenBucket(rate, burst)
+        self.endpoint_buckets = {name: TokenBucket(r, 1.0) for name, r in (endpoint_rates or {}).items()}
+        self.paused_until = 0.0
+
+        self._queues: Dict[str, Deque[Tuple[int, float, asyncio.Future]]] = {}  # endpoint -> (seq, enqueued at, future)
+        self._queued = 0
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0
+        }
+
+    async def acquire(self, endpoint: str = 'market_data'):
+        """Wait until a request to `endpoint` may be sent."""
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(endpoint, deque()).append((next(self._seq), time.monotonic(), future))
+        self._queued += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        else:
+            self._wakeup.set()
+        await future
+
+    async def _dispatch(self):
+        """Release queued requests as tokens become available."""
+        while self._queued:
+            now = time.monotonic()
+            wait = self.paused_until - now
+            if wait <= 0:
+                wait = self._release(now)
+            if wait is None:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _release(self, now: float) -> Optional[float]:
+        """
+        Release the best-priority request that has tokens.
+
+        Returns None if one was released (or none is left), else seconds
+        until one may be.
+        """
+        self.bucket.refill(now)
+        wait = self.bucket.wait_time()
+        if wait > 0:
+            return wait
+        best, best_key = None, None
+        for endpoint, waiting in self._queues.items():
+            while waiting and waiting[0][2].cancelled():
+                waiting.popleft()
+                self._queued -= 1
+            if not waiting:
+                continue
+            endpoint_bucket = self.endpoint_buckets.get(endpoint)
+            if endpoint_bucket is not None:
+                endpoint_bucket.refill(now)
+                endpoint_wait = endpoint_bucket.wait_time()
+                if endpoint_wait > 0:
+                    wait = endpoint_wait if wait == 0 else min(wait, endpoint_wait)
+                    continue
+            key = (ENDPOINT_PRIORITIES.get(endpoint, 1), waiting[0][0])
+            if best_key is None or key < best_key:
+                best, best_key = endpoint, key
+        if best is None:
+            return wait if self._queued else None
+
+        _, enqueued_at, future = self._queues[best].popleft()
+        self._queued -= 1
+        if best in self.endpoint_buckets:
+            self.endpoint_buckets[best].tokens -= 1
+        self.bucket.tokens -= 1
+        waited = now - enqueued_at
+        self.stats['requests'] += 1
+        self.stats['wait_total'] += waited
+        self.stats['wait_max'] = max(self.stats['wait_max'], waited)
+        future.set_result(None)
+        return None
+
+    def on_success(self, headers: Optional[Mapping[str, str]] = None):
+        """Additive increase after a successful request; honor exhausted-quota headers."""
+        self._set_rate(self.bucket.rate + self.increase)
+        pause = self._header_pause(headers, exhausted_only=True)
+        if pause:
+            self.pause(pause)
+
+    def on_throttled(self, headers: Optional[Mapping[str, str]] = None):
+        """Multiplicative decrease after a 429 / DDoS protection response."""
+        self.stats['throttled'] += 1
+        self._set_rate(self.bucket.rate * self.decrease_factor)
+        self.bucket.tokens = min(self.bucket.tokens, 0.0)
+        self.pause(self._header_pause(headers) or 1.0 / self.bucket.rate)
+        logger.warning("%s throttled; rate now %.3f req/s", self.exchange_id, self.bucket.rate)
+
+    def pause(self, seconds: float):
+        """Hold every queued request for `seconds`."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _set_rate(self, rate: float):
+        now = time.monotonic()
+        self.bucket.refill(now)
+        self.bucket.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    @staticmethod
+    def _header_pause(headers: Optional[Mapping[str, str]], exhausted_only: bool = False) -> Optional[float]:
+        """
+        Seconds to wait according to Retry-After or X-RateLimit-* headers.
+
+        With `exhausted_only`, only a reset time for a quota that has reached
+        zero is considered (a successful response may still carry one).
+        """
+        if not headers:
+            return None
+        headers = {key.lower(): value for key, value in headers.items()}
+        try:
+            if not exhausted_only and 'retry-after' in headers:
+                return max(0.0, float(headers['retry-after']))
+            remaining = headers.get('x-ratelimit-remaining')
+            reset = headers.get('x-ratelimit-reset')
+            if reset is not None and (not exhausted_only or (remaining is not None and float(remaining) <= 0)):
+                reset = float(reset)
+                if reset > 1e12:  # Epoch milliseconds
+                    reset = reset / 1000 - time.time()
+                elif reset > 1e9:  # Epoch seconds
+                    reset -= time.time()
+                return max(0.0, reset)
+        except ValueError:
+            pass
+        return None
+
+    def metrics(self) -> Dict[str, object]:
+        """Current queue depth per endpoint class, wait times and rate."""
+        depth = {endpoint: len(waiting) for endpoint, waiting in self._queues.items() if waiting}
+        requests = self.stats['requests']
+        return {
+            'rate': self.bucket.rate,
+            'max_rate': self.max_rate,
+            'queue_depth': depth,
+            'requests': requests,
+            'throttled': self.stats['throttled'],
+            'wait_avg': self.stats['wait_total'] / requests if requests else 0.0,
+            'wait_max': self.stats['wait_max']
+        }
@@ -0,0 +1,287 @@
+# exchanges/simulated_exchange.py
+import asyncio
+import itertools
+import math
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ccxt import ExchangeError, InvalidOrder, NetworkError, OrderNotFound, RequestTimeout
+
+from utils.data_utils import timeframe_to_ms
+
+
+class PriceWalk:
+    """
+    Random-walk reference prices shared by several simulated venues, with
+    `volatility` relative standard deviation per square root second. Each
+    symbol's walk is advanced lazily whenever it is read.
+    """
+
+    def __init__(self, volatility: float, seed: Optional[int] = None):
+        self.volatility = volatility
+        self.rng = random.Random(seed)
+        self._prices: Dict[str, List[float]] = {}  # symbol -> [price, updated at]
+
+    def price(self, symbol: str, start: float = 1.0) -> float:
+        """Current reference price of `symbol`, whose walk starts at `start` on first read."""
+        now = time.time()
+        entry = self._prices.setdefault(symbol, [start, now])
+        elapsed, entry[1] = now - entry[1], now
+        if self.volatility and elapsed > 0:
+            entry[0] *= math.exp(self.rng.gauss(0.0, self.volatility * math.sqrt(elapsed)))
+        return entry[0]
+
+
+class SimulatedExchange:
+    """
+    In-process stand-in for an async ccxt exchange.
+
+    Implements the subset of the ccxt API the bot uses. Orders fill against
+    the configured order book level by level up to their limit price, so
+    partial fills happen naturally; every call waits `latency` (+ jitter)
+    seconds and order placement is rejected with probability `reject_rate`.
+    Books are taken and orders matched halfway through that wait, as a
+    venue's response spends the second half of the round trip in transit.
+
+    Books are either set explicitly with set_order_book (as the backtest
+    does) or generated by add_market, in which case the mid price follows a
+    random walk with `volatility` relative standard deviation per square
+    root second, every request sees a fresh `depth`-level book around it and
+    fetch_ohlcv returns bars built from the walk. Venues given the same
+    `walk` follow its common price, with `volatility` then moving each
+    venue's own deviation from it. Any call fails with a NetworkError or
+    RequestTimeout with probability `error_rate`.
+    """
+
+    def __init__(
+        self,
+        exchange_id: str,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        reject_rate: float = 0.0,
+        taker_fee: float = 0.001,
+        balances: Optional[Dict[str, float]] = None,
+        consume_liquidity: bool = True,
+        depth: int = 10,
+        volatility: float = 0.0,
+        error_rate: float = 0.0,
+        walk: Optional[PriceWalk] = None,
+        seed: Optional[int] = None
+    ):
+        self.id = exchange_id
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.reject_rate = reject_rate
+        self.consume_liquidity = consume_liquidity
+        self.depth = depth
+        self.volatility = volatility
+        self.error_rate = error_rate
+        self.walk = walk
+        self.fees = {'trading': {'taker': taker_fee, 'maker': taker_fee}}
+        self.markets: Dict[str, dict] = {}
+        self.order_books: Dict[str, dict] = {}
+        self.orders: Dict[str, dict] = {}
+        self.balances: Dict[str, float] = dict(balances or {})
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+        self._order_ids = itertools.count(1)
+        self._generated: Dict[str, dict] = {}  # symbol -> {'mid', 'basis', 'spread', 'size', 'updated'}
+        self._prices: Dict[str, Deque[Tuple[int, float]]] = {}  # symbol -> (timestamp ms, mid) walk
+
+    async def _delay(self, share: float = 1.0):
+        """Count a request and wait `share` of its latency, failing it with probability `error_rate`."""
+        self.calls += 1
+        await self._wait(share)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            error = RequestTimeout if self.rng.random() < 0.5 else NetworkError
+            raise error(f"{self.id} simulated {error.__name__}")
+
+    async def _wait(self, share: float = 1.0):
+        wait = share * (self.latency + (self.rng.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def add_market(self, symbol: str, price: float, spread: float = 0.0005, level_size: float = 1.0,
+                   history: int = 10000):
+        """
+        Generate `symbol`'s book around a random-walk mid starting at `price`.
+
+        `spread` is the relative gap between best bid and ask, every level
+        holds `level_size`, and the last `history` mid prices are kept for
+        fetch_ohlcv.
+        """
+        basis = price if self.walk is None else price / self.walk.price(symbol, price)  # mid = basis * walk price
+        self._generated[symbol] = {'mid': price, 'basis': basis, 'spread': spread, 'size': level_size,
+                                   'updated': time.time()}
+        self._prices[symbol] = deque([(int(time.time() * 1000), price)], maxlen=history)
+        self._generate(symbol)
+
+    def _advance(self, symbol: str):
+        """Move a generated market's mid by the walk since its last update and rebuild its book."""
+        market = self._generated.get(symbol)
+        if market is None:
+            return
+        now = time.time()
+        elapsed, market['updated'] = now - market['updated'], now
+        if self.volatility and elapsed > 0:
+            market['basis'] *= math.exp(self.rng.gauss(0.0, self.volatility * math.sqrt(elapsed)))
+        if self.volatility or self.walk is not None:
+            market['mid'] = market['basis'] * (1.0 if self.walk is None else self.walk.price(symbol))
+            self._prices[symbol].append((int(now * 1000), market['mid']))
+        self._generate(symbol)
+
+    def _generate(self, symbol: str):
+        market = self._generated[symbol]
+        mid, size = market['mid'], market['size']
+        tick = mid * 0.0001
+        best_bid, best_ask = mid * (1 - market['spread'] / 2), mid * (1 + market['spread'] / 2)
+        self.set_order_book(symbol, {
+            'bids': [[best_bid - i * tick, size] for i in range(self.depth)],
+            'asks': [[best_ask + i * tick, size] for i in range(self.depth)]
+        })
+
+    def set_order_book(self, symbol: str, order_book: dict):
+        """Replace the book orders are filled against."""
+        self.order_books[symbol] = {
+            'symbol': symbol,
+            'bids': [list(level[:2]) for level in order_book.get('bids', [])],
+            'asks': [list(level[:2]) for level in order_book.get('asks', [])],
+            'timestamp': order_book.get('timestamp') or int(time.time() * 1000),
+            'nonce': order_book.get('nonce')
+        }
+        if symbol not in self.markets:
+            base, quote = symbol.split('/')
+            self.markets[symbol] = {'symbol': symbol, 'base': base, 'quote': quote, 'active': True, 'spot': True,
+                                    'taker': self.fees['trading']['taker']}
+
+    async def load_markets(self, reload: bool = False, params: dict = {}) -> Dict[str, dict]:
+        await self._delay()
+        return self.markets
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None, params: dict = {}) -> dict:
+        await self._delay(0.5)
+        if symbol not in self.order_books:
+            raise ExchangeError(f"{self.id} has no market {symbol}")
+        self._advance(symbol)
+        book = self.order_books[symbol]
+        book = {
+            **book,
+            'bids': [level[:] for level in book['bids'][:limit]],
+            'asks': [level[:] for level in book['asks'][:limit]]
+        }
+        await self._wait(0.5)
+        return book
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                          limit: Optional[int] = None, params: dict = {}) -> List[list]:
+        """Bars of a generated market's mid price walk, the last one still forming."""
+        await self._delay()
+        if symbol not in self._prices:
+            raise ExchangeError(f"{self.id} has no OHLCV for {symbol}")
+        self._advance(symbol)
+        step = timeframe_to_ms(timeframe)
+        bars: List[list] = []
+        for ts, price in self._prices[symbol]:
+            start = ts - ts % step
+            if since is not None and start < since - since % step:
+                continue
+            if bars and bars[-1][0] == start:
+                bar = bars[-1]
+                bar[2], bar[3], bar[4] = max(bar[2], price), min(bar[3], price), price
+            else:
+                bars.append([start, price, price, price, price, 0.0])
+        return bars[-limit:] if limit else bars
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float,
+                           price: Optional[float] = None, params: dict = {}) -> dict:
+        await self._delay(0.5)
+        if self.reject_rate and self.rng.random() < self.reject_rate:
+            raise InvalidOrder(f"{self.id} simulated reject of {side} {amount} {symbol}")
+        if symbol not in self.order_books:
+            raise ExchangeError(f"{self.id} has no market {symbol}")
+        self._advance(symbol)
+
+        filled, cost = self._match(symbol, side, amount, None if type == 'market' else price)
+        status = 'closed' if filled >= amount - 1e-12 else ('canceled' if type == 'market' else 'open')
+        fee = cost * self.fees['trading']['taker']
+        self._settle(symbol, side, filled, cost, fee)
+
+        order_id = str(next(self._order_ids))
+        self.orders[order_id] = {
+            'id': order_id,
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'price': price,
+            'amount': amount,
+            'filled': filled,
+            'remaining': amount - filled,
+            'cost': cost,
+            'average': cost / filled if filled else None,
+            'status': status,
+            'fee': {'cost': fee, 'currency': symbol.split('/')[1]},
+            'timestamp': int(time.time() * 1000)
+        }
+        order = dict(self.orders[order_id])
+        await self._wait(0.5)
+        return order
+
+    def _match(self, symbol: str, side: str, amount: float, limit: Optional[float]):
+        """Walk the opposite side of the book up to the limit price."""
+        levels: List[list] = self.order_books[symbol]['asks' if side == 'buy' else 'bids']
+        filled = cost = 0.0
+        consumed = 0
+        for level in levels:
+            level_price, level_size = level[0], level[1]
+            if limit is not None and (level_price > limit if side == 'buy' else level_price < limit):
+                break
+            take = min(level_size, amount - filled)
+            filled += take
+            cost += take * level_price
+            if self.consume_liquidity:
+                level[1] -= take
+                if level[1] <= 1e-12:
+                    consumed += 1
+            if filled >= amount - 1e-12:
+                break
+        if consumed:
+            del levels[:consumed]
+        return filled, cost
+
+    def _settle(self, symbol: str, side: str, filled: float, cost: float, fee: float):
+        base, quote = symbol.split('/')
+        sign = 1 if side == 'buy' else -1
+        self.balances[base] = self.balances.get(base, 0.0) + sign * filled
+        self.balances[quote] = self.balances.get(quote, 0.0) - sign * cost - fee
+
+    async def fetch_order(self, id: str, symbol: Optional[str] = None, params: dict = {}) -> dict:
+        await self._delay()
+        if id not in self.orders:
+            raise OrderNotFound(f"{self.id} order {id} not found")
+        return dict(self.orders[id])
+
+    async def cancel_order(self, id: str, symbol: Optional[str] = None, params: dict = {}) -> dict:
+        await self._delay()
+        order = self.orders.get(id)
+        if order is None:
+            raise OrderNotFound(f"{self.id} order {id} not found")
+        if order['status'] == 'open':
+            order['status'] = 'canceled'
+        return dict(order)
+
+    async def fetch_balance(self, params: dict = {}) -> dict:
+        await self._delay()
+        balance = {'free': {}, 'used': {}, 'total': {}}
+        for currency, total in self.balances.items():
+            balance[currency] = {'free': total, 'used': 0.0, 'total': total}
+            balance['free'][currency] = total
+            balance['used'][currency] = 0.0
+            balance['total'][currency] = total
+        return balance
+
+    async def close(self):
+        pass
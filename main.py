@@ -5,7 +5,10 @@ from core.bot import ArbitrageBot
 
 async def main():
     bot = ArbitrageBot(CONFIG)
-    await bot.run()
+    try:
+        await bot.run()
+    finally:
+        await bot.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
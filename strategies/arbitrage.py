@@ -1,39 +1,168 @@
 # strategies/arbitrage.py
-from typing import Dict, List, Optional
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from core.market_snapshot import MarketSnapshot
+from core.opportunity import CrossExchangeOpportunity
+from exchanges.latency_tracker import LatencyTracker
+from exchanges.market_cache import MarketTable
+from utils.logger import setup_logger
+from utils.order_book import OrderBook
+
+logger = setup_logger('ArbitrageStrategy')
 
 class ArbitrageStrategy:
-    def __init__(self, exchanges: Dict[str, object], config: dict):
+    def __init__(
+        self,
+        exchanges: Dict[str, object],
+        config: dict,
+        markets: Optional[MarketTable] = None,
+        latency: Optional[LatencyTracker] = None,
+        volatility: Optional[Callable[[str], Optional[float]]] = None
+    ):
+        """
+        Cross-exchange detector.
+
+        With a LatencyTracker, quotes are scored by what they will likely be
+        worth when the orders arrive: books older than 'max_book_age' seconds
+        (by the exchange's timestamp) are skipped, and each buy/sell
+        combination's edge is discounted by 'drift_z' standard deviations of
+        the price move expected over both venues' book age plus order delay.
+        `volatility` gives a pair's relative stdev per sqrt(second), such as
+        MarketAnalyzer.volatility; 'drift_default_volatility' stands in until
+        it has an estimate.
+        """
         self.exchanges = exchanges
         self.config = config
+        self.markets = markets or MarketTable(exchanges, config)
+        self.latency = latency
+        self.volatility = volatility
+        self.stats = {'stale_books': 0, 'drift_rejected': 0}
+        self._stale = set()  # (exchange_id, pair) books currently skipped as stale
 
-    def find_arbitrage(self, order_books: dict) -> List[dict]:
+    def find_arbitrage(self, snapshot: MarketSnapshot) -> List[CrossExchangeOpportunity]:
         """Find cross-exchange arbitrage opportunities."""
         opportunities = []
-        for pair, exchanges_data in order_books.items():
-            if len(exchanges_data) < 2:
+        now = time.time()
+        for pair in snapshot.pairs():
+            ex_ids = snapshot.exchanges(pair)
+            windows = None
+            if self.latency is not None:
+                ex_ids = [ex_id for ex_id in ex_ids if self._fresh(ex_id, pair, now)]
+                windows = np.array([self.latency.window(ex_id, pair, now) for ex_id in ex_ids])
+            if len(ex_ids) < 2:
                 continue
 
-            # Find the best bid and ask across exchanges
-            best_bid = max(
-                exchanges_data.items(),
-                key=lambda x: x[1]['bids'][0][0] * (1 - self.exchanges[x[0]].fees['taker'])
-            )
-            best_ask = min(
-                exchanges_data.items(),
-                key=lambda x: x[1]['asks'][0][0] * (1 + self.exchanges[x[0]].fees['taker'])
-            )
-
-            # Calculate spread and profit
-            spread = best_bid[1]['bids'][0][0] - best_ask[1]['asks'][0][0]
-            if spread > 0:
-                profit = spread / best_ask[1]['asks'][0][0] * 100
-                if profit >= self.config['min_profit']:
-                    opportunities.append({
-                        'pair': pair,
-                        'buy_exchange': best_ask[0],
-                        'sell_exchange': best_bid[0],
-                        'buy_price': best_ask[1]['asks'][0][0],
-                        'sell_price': best_bid[1]['bids'][0][0],
-                        'profit': profit
-                    })
-        return opportunities
\ No newline at end of file
+            books = [snapshot.book(ex_id, pair) for ex_id in ex_ids]
+            opportunity = self._best_trade(pair, ex_ids, books, windows)
+            if opportunity is not None:
+                opportunity.book_versions = snapshot.book_versions(
+                    ((opportunity.buy_exchange, pair), (opportunity.sell_exchange, pair))
+                )
+                opportunities.append(opportunity)
+        return opportunities
+
+    def metric_samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Books and combinations left out for latency, as samples for the metrics endpoint."""
+        return [(f'arbitrage_{name}', {}, value) for name, value in self.stats.items()]
+
+    def _fresh(self, ex_id: str, pair: str, now: float) -> bool:
+        age = self.latency.book_age(ex_id, pair, now)
+        if age is not None and age > self.config.get('max_book_age', 2.0):
+            self.stats['stale_books'] += 1
+            if (ex_id, pair) not in self._stale:
+                self._stale.add((ex_id, pair))
+                logger.warning("Skipping %s on %s: book is %.2fs old", pair, ex_id, age)
+            return False
+        if (ex_id, pair) in self._stale:
+            self._stale.discard((ex_id, pair))
+            logger.info("%s on %s is fresh again", pair, ex_id)
+        return True
+
+    def _drift(self, pair: str, windows: np.ndarray) -> np.ndarray:
+        """Percent edge at risk per (buy, sell) exchange: drift_z stdevs of the move over both windows."""
+        volatility = self.volatility(pair) if self.volatility is not None else None
+        if volatility is None:
+            volatility = self.config.get('drift_default_volatility', 0.0001)
+        return self.config.get('drift_z', 2.0) * volatility * np.sqrt(windows[:, None] + windows[None, :]) * 100
+
+    def _best_trade(
+        self,
+        pair: str,
+        ex_ids: List[str],
+        books: List[OrderBook],
+        windows: Optional[np.ndarray] = None
+    ) -> Optional[CrossExchangeOpportunity]:
+        """
+        Size the most profitable buy/sell across every exchange combination.
+
+        Net profit of buying on one venue and selling on another is concave and
+        piecewise linear in size, with kinks at the books' cumulative level
+        sizes, so it is evaluated at every such breakpoint (capped by
+        max_trade_amount) for all exchange pairs at once as an E x E x K array.
+        With per-exchange latency `windows` (seconds), the expected drift is
+        deducted before the combinations are compared.
+        """
+        cap = self.config['max_trade_amount']
+        fees = self.markets.taker_fees(pair, tuple(ex_ids))
+
+        sizes = np.concatenate(
+            [book.asks.cum_size[1:] for book in books]
+            + [book.bids.cum_size[1:] for book in books]
+            + [[cap]]
+        )
+        sizes = np.unique(sizes[(sizes > 0) & (sizes <= cap)])
+        if not len(sizes):
+            return None
+
+        buy_cost = np.vstack([book.asks.cost(sizes) for book in books]) * (1 + fees)[:, None]
+        sell_proceeds = np.vstack([book.bids.cost(sizes) for book in books]) * (1 - fees)[:, None]
+
+        # net[b, s, k]: buy on exchange b, sell on exchange s, trade sizes[k]
+        net = sell_proceeds[None, :, :] - buy_cost[:, None, :]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profit_pct = net / buy_cost[:, None, :] * 100
+        other = ~np.eye(len(ex_ids), dtype=bool)[:, :, None]
+        drift = None
+        if windows is not None:
+            drift = self._drift(pair, windows)
+            viable = ((profit_pct >= self.config['min_profit']) & other).any()
+            profit_pct = profit_pct - drift[:, :, None]
+            net = net - drift[:, :, None] / 100 * buy_cost[:, None, :]
+        eligible = (profit_pct >= self.config['min_profit']) & other
+        net = np.where(eligible, net, -np.inf)  # NaN (too thin) compares False and is excluded too
+
+        b, s, k = np.unravel_index(np.argmax(net), net.shape)
+        if not np.isfinite(net[b, s, k]) or net[b, s, k] <= 0:
+            if drift is not None and viable:
+                self.stats['drift_rejected'] += 1
+            return None
+        penalty = 0.0 if drift is None else float(drift[b, s])
+
+        amount = float(sizes[k])
+        buy_book, sell_book = books[b], books[s]
+        expected_profit, profit = float(net[b, s, k]), float(profit_pct[b, s, k])
+        rounded = self.markets.round_amount(pair, (ex_ids[b], ex_ids[s]), amount)
+        if rounded != amount:
+            # Re-price at the size both venues accept
+            if not rounded:
+                return None
+            amount = rounded
+            cost = float(buy_book.asks.cost(amount) * (1 + fees[b]))
+            expected_profit = float(sell_book.bids.cost(amount) * (1 - fees[s])) - cost - penalty / 100 * cost
+            profit = expected_profit / cost * 100
+            if profit < self.config['min_profit']:
+                return None
+        return CrossExchangeOpportunity.create(
+            pair,
+            ex_ids[b],
+            ex_ids[s],
+            amount,
+            buy_price=float(buy_book.asks.marginal_price(amount)),  # Worst level touched
+            sell_price=float(sell_book.bids.marginal_price(amount)),
+            buy_vwap=float(buy_book.asks.vwap(amount)),
+            sell_vwap=float(sell_book.bids.vwap(amount)),
+            expected_profit=expected_profit,  # Quote currency, after fees and drift
+            profit=profit,
+            drift=penalty
+        )
@@ -0,0 +1,160 @@
+# strategies/currency_graph.py
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+Node = Tuple[str, str]  # (exchange_id, currency)
+
+
+class CurrencyGraph:
+    """
+    Directed currency graph with -log(rate * (1 - fee)) edge weights.
+
+    Every market BASE/QUOTE on an exchange contributes two edges between that
+    exchange's currency nodes: QUOTE -> BASE (buy at the ask) and BASE -> QUOTE
+    (sell at the bid). A profitable conversion cycle is a negative-weight cycle.
+    Edges live in flat NumPy arrays so a book update is an O(1) write and the
+    cycle search is a handful of vectorized Bellman-Ford relaxation rounds.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.nodes: List[Node] = []
+        self.node_index: Dict[Node, int] = {}
+        self.edge_markets: List[Tuple[str, str, str]] = []  # (exchange_id, symbol, side) per edge
+        self.market_edges: Dict[Tuple[str, str], Tuple[int, int, float]] = {}  # -> (buy edge, sell edge, fee)
+        self._src = np.empty(capacity, dtype=np.int64)
+        self._dst = np.empty(capacity, dtype=np.int64)
+        self._weight = np.empty(capacity, dtype=np.float64)
+        self.edge_count = 0
+
+    def _node(self, exchange_id: str, currency: str) -> int:
+        key = (exchange_id, currency)
+        idx = self.node_index.get(key)
+        if idx is None:
+            idx = self.node_index[key] = len(self.nodes)
+            self.nodes.append(key)
+        return idx
+
+    def _add_edge(self, src: int, dst: int, market: Tuple[str, str, str]) -> int:
+        if self.edge_count == len(self._src):
+            grow = max(1024, len(self._src))
+            self._src = np.concatenate((self._src, np.empty(grow, dtype=np.int64)))
+            self._dst = np.concatenate((self._dst, np.empty(grow, dtype=np.int64)))
+            self._weight = np.concatenate((self._weight, np.empty(grow, dtype=np.float64)))
+        idx = self.edge_count
+        self._src[idx] = src
+        self._dst[idx] = dst
+        self._weight[idx] = np.inf  # Unpriced until the first book update
+        self.edge_markets.append(market)
+        self.edge_count += 1
+        return idx
+
+    def add_market(self, exchange_id: str, symbol: str, base: str, quote: str, fee: float):
+        """Register a market's buy and sell edges. Re-adding a market only updates its fee."""
+        key = (exchange_id, symbol)
+        if key in self.market_edges:
+            buy_edge, sell_edge, _ = self.market_edges[key]
+            self.market_edges[key] = (buy_edge, sell_edge, fee)
+            return
+        base_node = self._node(exchange_id, base)
+        quote_node = self._node(exchange_id, quote)
+        buy_edge = self._add_edge(quote_node, base_node, (exchange_id, symbol, 'buy'))
+        sell_edge = self._add_edge(base_node, quote_node, (exchange_id, symbol, 'sell'))
+        self.market_edges[key] = (buy_edge, sell_edge, fee)
+
+    def update_market(self, exchange_id: str, symbol: str, bid: Optional[float], ask: Optional[float]) -> bool:
+        """Reprice a market's edges from its best bid/ask. Returns False for unknown markets."""
+        edges = self.market_edges.get((exchange_id, symbol))
+        if edges is None:
+            return False
+        buy_edge, sell_edge, fee = edges
+        keep = math.log1p(-fee)
+        self._weight[buy_edge] = math.log(ask) - keep if ask else np.inf
+        self._weight[sell_edge] = -math.log(bid) - keep if bid else np.inf
+        return True
+
+    def find_cycles(self, max_length: int = 4, min_profit: float = 0.0, min_length: int = 3) -> List[dict]:
+        """
+        Find profitable conversion cycles of min_length..max_length edges.
+
+        Runs max_length + 1 synchronous Bellman-Ford rounds from a virtual source
+        connected to every node, then walks the predecessor graph from each
+        relaxed node; any cycle found there has negative total weight.
+
+        Args:
+            max_length: Longest cycle (number of conversions) to report.
+            min_profit: Minimum net return in percent (fees are already in the weights).
+            min_length: Shortest cycle to report.
+
+        Returns:
+            Cycles as dicts with 'exchange', 'legs' [(symbol, side, from, to)] and 'profit' (%).
+        """
+        m = self.edge_count
+        if m == 0:
+            return []
+        weight = self._weight[:m]
+        active = np.flatnonzero(np.isfinite(weight))
+        src, dst, w = self._src[active], self._dst[active], weight[active]
+
+        n = len(self.nodes)
+        dist = np.zeros(n)
+        pred = np.full(n, -1, dtype=np.int64)
+        for _ in range(max_length + 1):
+            candidate = dist[src] + w
+            improved = np.flatnonzero(candidate < dist[dst] - 1e-12)
+            if not len(improved):
+                break
+            new_dist = dist.copy()
+            np.minimum.at(new_dist, dst[improved], candidate[improved])
+            winners = improved[candidate[improved] == new_dist[dst[improved]]]
+            pred[dst[winners]] = active[winners]
+            dist = new_dist
+
+        threshold = -math.log1p(min_profit / 100.0)
+        cycles, seen = [], set()
+        starts = np.flatnonzero(pred >= 0).tolist()
+        if not starts:
+            return []
+        pred = pred.tolist()  # Python lists: the walk below indexes scalars
+        all_src = self._src[:m].tolist()
+        explored = [False] * n  # Nodes fully handled by an earlier walk
+        for start in starts:
+            position: Dict[int, int] = {}
+            path: List[int] = []
+            edges = None
+            node = start
+            while not explored[node]:
+                if node in position:
+                    edges = path[position[node]:][::-1]  # Walked backwards; restore trading order
+                    break
+                edge = pred[node]
+                if edge < 0:
+                    break
+                position[node] = len(path)
+                path.append(edge)
+                node = all_src[edge]
+            for visited in position:
+                explored[visited] = True
+            if not edges or not (min_length <= len(edges) <= max_length):
+                continue
+            pivot = edges.index(min(edges))
+            canonical = tuple(edges[pivot:] + edges[:pivot])
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+            total = float(weight[list(canonical)].sum())
+            if total < threshold:
+                cycles.append(self._describe(canonical, total))
+        return sorted(cycles, key=lambda c: c['profit'], reverse=True)
+
+    def _describe(self, edges: Tuple[int, ...], total_weight: float) -> dict:
+        legs = []
+        for edge in edges:
+            exchange_id, symbol, side = self.edge_markets[edge]
+            legs.append((symbol, side, self.nodes[self._src[edge]][1], self.nodes[self._dst[edge]][1]))
+        return {
+            'exchange': self.edge_markets[edges[0]][0],
+            'legs': legs,
+            'profit': (math.exp(-total_weight) - 1) * 100
+        }
@@ -0,0 +1,213 @@
+# strategies/spread_matrix.py
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Instrument = Tuple[str, str]  # (exchange_id, pair)
+
+
+class SpreadMatrix:
+    """
+    Rolling spread statistics for every candidate pair of instruments.
+
+    Log closes of all instruments are aligned by bar timestamp into one row
+    per bar; an instrument without a bar at that timestamp keeps its previous
+    close. Over the last `window` closed rows the matrix keeps running sums of
+    every column, of every column product and of every lag-1 column product,
+    so closing a bar costs a few O(N^2) outer-product updates regardless of
+    the window length. For each candidate pair (x, y) the OLS hedge ratio of
+    y on x, the z-score of the current spread y - beta * x and the spread's
+    lag-1 autocorrelation then follow from those sums in vectorized form.
+
+    Log prices are stored relative to each instrument's first close to keep
+    the running sums well conditioned, and the sums are recomputed from the
+    stored rows every `rebuild_every` bars so rounding error cannot build up.
+    """
+
+    def __init__(
+        self,
+        instruments: Sequence[Instrument],
+        window: int = 100,
+        candidates: Optional[Sequence[Tuple[int, int]]] = None,
+        rebuild_every: int = 1000
+    ):
+        self.instruments: List[Instrument] = list(instruments)
+        self.index: Dict[Instrument, int] = {instrument: i for i, instrument in enumerate(self.instruments)}
+        n = len(self.instruments)
+        self.window = window
+        self.rebuild_every = rebuild_every
+        if candidates is None:
+            self.x, self.y = np.triu_indices(n, 1)
+        else:
+            pairs = np.asarray(candidates, dtype=np.int64).reshape(-1, 2)
+            self.x, self.y = pairs[:, 0], pairs[:, 1]
+        # Flat offsets into n x n matrices: 1-D take() is much cheaper than 2-D fancy indexing
+        self._xy = self.x * n + self.y
+
+        self._rows = np.zeros((window + 1, n))  # Closed rows, ring of window + 1 for the lag pair
+        self.closed = 0  # Rows closed so far
+        self.current = np.zeros(n)  # Row being built: log close minus anchor
+        self.current_ts: Optional[int] = None
+        self.anchor = np.full(n, np.nan)  # Log of each instrument's first close
+        self.first_row = np.full(n, np.iinfo(np.int64).max)  # First row holding real data per instrument
+        self.last_close = np.full(n, np.nan)
+        self._sum = np.zeros(n)
+        self._products = np.zeros((n, n))
+        self._lagged = np.zeros((n, n))  # [a, b] = sum of a_t * b_(t-1)
+        # Scratch reused on every bar: fresh arrays this size cost more in page faults than in arithmetic
+        self._outer = np.empty((n, n))
+        self._covariance = np.empty((n, n))
+        self._lag_sums = np.empty((n, n))
+        self._pair_buffers: Optional[np.ndarray] = None  # Per-candidate rows for evaluate()
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    def update(self, instrument: Instrument, timestamp: int, close: float) -> bool:
+        """
+        Apply a bar's close. A later timestamp closes the current row first; a
+        repeated one updates the in-progress bar. Returns False for bars older
+        than the current row, which are ignored.
+        """
+        i = self.index[instrument]
+        if self.current_ts is None:
+            self.current_ts = timestamp
+        elif timestamp > self.current_ts:
+            self._close_row()
+            self.current_ts = timestamp
+        elif timestamp < self.current_ts:
+            return False
+        if not close > 0:
+            return False
+        log_close = math.log(close)
+        if math.isnan(self.anchor[i]):
+            self.anchor[i] = log_close
+            self.first_row[i] = self.closed
+        self.current[i] = log_close - self.anchor[i]
+        self.last_close[i] = close
+        return True
+
+    def update_many(self, indices: np.ndarray, timestamps: np.ndarray, closes: np.ndarray) -> int:
+        """
+        Apply many bars at once, as update() would one by one. Bars must be
+        sorted by timestamp and carry instrument indices (not names). Returns
+        the number of bars applied.
+        """
+        applied = 0
+        bounds = np.flatnonzero(np.diff(timestamps)) + 1
+        for start, stop in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(timestamps)]))):
+            timestamp = int(timestamps[start])
+            if self.current_ts is None:
+                self.current_ts = timestamp
+            elif timestamp > self.current_ts:
+                self._close_row()
+                self.current_ts = timestamp
+            elif timestamp < self.current_ts:
+                continue
+            close = closes[start:stop]
+            valid = close > 0
+            i, close = indices[start:stop][valid], close[valid]
+            log_close = np.log(close)
+            new = np.isnan(self.anchor[i])
+            if new.any():
+                self.anchor[i[new]] = log_close[new]
+                self.first_row[i[new]] = self.closed
+            self.current[i] = log_close - self.anchor[i]
+            self.last_close[i] = close
+            applied += len(i)
+        return applied
+
+    def _close_row(self):
+        k, size = self.closed, self.window + 1
+        row = self.current.copy()  # `current` carries on as the next row: forward fill
+        self._rows[k % size] = row
+        self._sum += row
+        if k < self.window:
+            self._products += np.multiply.outer(row, row, out=self._outer)
+            if k:
+                self._lagged += np.multiply.outer(row, self._rows[(k - 1) % size], out=self._outer)
+        else:
+            # The row enters and the oldest leaves the window: one rank-2 update per sum
+            oldest, second = self._rows[(k - self.window) % size], self._rows[(k - self.window + 1) % size]
+            self._sum -= oldest
+            self._products += np.matmul(np.stack((row, oldest)).T, np.stack((row, -oldest)), out=self._outer)
+            self._lagged += np.matmul(
+                np.stack((row, second)).T, np.stack((self._rows[(k - 1) % size], -oldest)), out=self._outer
+            )
+        self.closed += 1
+        if self.closed % self.rebuild_every == 0:
+            self._rebuild_sums()
+
+    def _rebuild_sums(self):
+        size = self.window + 1
+        count = min(self.closed, self.window)
+        rows = self._rows[[(self.closed - count + j) % size for j in range(count)]]
+        self._sum = rows.sum(axis=0)
+        self._products = rows.T @ rows
+        self._lagged = rows[1:].T @ rows[:-1] if count > 1 else np.zeros_like(self._products)
+
+    def ready(self) -> np.ndarray:
+        """Per candidate: both instruments have real data in every row of the window."""
+        full = self.closed - self.window
+        if self.first_row.max() <= full:
+            return np.ones(len(self.x), dtype=bool)
+        return (self.first_row[self.x] <= full) & (self.first_row[self.y] <= full)
+
+    def evaluate(self) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Statistics for every ready candidate pair, or None before a full window.
+
+        Returns arrays aligned with each other: 'x' and 'y' (instrument
+        indices), 'beta' (hedge ratio), 'deviation' (current spread minus its
+        window mean, in log terms), 'std' (spread standard deviation), 'z'
+        and 'phi' (lag-1 autocorrelation of the spread).
+        """
+        if self.closed < self.window:
+            return None
+        ready = self.ready()
+        if ready.all():
+            x, y, xy = self.x, self.y, self._xy
+        else:
+            x, y, xy = self.x[ready], self.y[ready], self._xy[ready]
+        n, m = self.window, len(x)
+        if self._pair_buffers is None or self._pair_buffers.shape[1] < m:
+            self._pair_buffers = np.empty((11, m))
+        buffers = self._pair_buffers[:, :m]
+        mean = self._sum / n
+        # Pair statistics as gathers from N x N matrices built once, not per-pair arithmetic on sums
+        covariance = np.divide(self._products, n, out=self._covariance)
+        covariance -= np.multiply.outer(mean, mean, out=self._outer)
+        lagged = np.add(self._lagged, self._lagged.T, out=self._lag_sums)  # [x, y] = x_t*y_(t-1) + y_t*x_(t-1)
+        variance, own_lag = covariance.diagonal().copy(), self._lagged.diagonal().copy()
+        mx, my, var_x, var_y, cx, cy, lag_x, lag_y, cov, spread_mean, spread_var = buffers
+        gathers = ((mean, mx, my), (variance, var_x, var_y), (self.current, cx, cy), (own_lag, lag_x, lag_y))
+        for values, out_x, out_y in gathers:
+            values.take(x, out=out_x)
+            values.take(y, out=out_y)
+        covariance.ravel().take(xy, out=cov)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            beta = cov / var_x
+            np.subtract(my, np.multiply(beta, mx, out=spread_mean), out=spread_mean)
+            np.subtract(var_y, np.multiply(beta, cov, out=spread_var), out=spread_var)
+            std = np.where(spread_var > 1e-18, spread_var, np.nan)
+            np.sqrt(std, out=std)
+            deviation = beta * cx
+            np.subtract(cy, deviation, out=deviation)
+            deviation -= spread_mean
+            # Lag-1 covariance of the spread; `cov` and `mx` are no longer needed and are reused
+            lag_cov = lagged.ravel().take(xy, out=cov)
+            np.subtract(lag_y, np.multiply(lag_cov, beta, out=lag_cov), out=lag_cov)
+            squared = np.multiply(beta, beta, out=mx)
+            lag_cov += np.multiply(squared, lag_x, out=squared)
+            lag_cov /= n - 1
+            lag_cov -= np.multiply(spread_mean, spread_mean, out=squared)
+            phi = lag_cov / spread_var
+            z = deviation / std
+        return {'x': x, 'y': y, 'beta': beta, 'deviation': deviation, 'std': std, 'z': z, 'phi': phi}
+
+
+def half_life(phi: np.ndarray) -> np.ndarray:
+    """Bars for a deviation to halve under AR(1) coefficient `phi` (inf if it does not revert)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(phi <= 0, 0.0, np.where(phi < 1, -math.log(2) / np.log(phi), np.inf))
@@ -1,38 +1,121 @@
 # strategies/statistical.py
-import pandas as pd
 from typing import Dict, List, Optional
+import numpy as np
+from core.opportunity import Leg, StatisticalOpportunity
+from exchanges.market_cache import MarketTable
+from strategies.spread_matrix import SpreadMatrix, half_life
+from utils.candle_store import CandleStore, SeriesKey
 
 class StatisticalArbitrageStrategy:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, markets: Optional[MarketTable] = None):
         self.config = config
+        self.markets = markets
+        self.matrix: Optional[SpreadMatrix] = None
+        self._fed: Dict[SeriesKey, int] = {}  # Newest bar timestamp applied per series
+        self._fees: Optional[np.ndarray] = None
+        self._fees_version = None
 
-    async def analyze(self, historical_data: pd.DataFrame) -> List[dict]:
-        """Detect statistical arbitrage opportunities using Bollinger Bands."""
-        if len(historical_data) < 20:  # Need at least 20 data points
+    async def analyze(self, candle_store: CandleStore, timeframe: str) -> List[StatisticalOpportunity]:
+        """
+        Detect mean-reversion opportunities across every stored series of `timeframe`.
+
+        Every (exchange, pair) series is an instrument of one SpreadMatrix, fed
+        only the bars that arrived since the previous call. A candidate pair
+        signals when its spread z-score reaches 'stat_entry_z', the spread
+        reverts with a half-life of at most 'stat_max_half_life' bars, and
+        reverting to the mean would beat the round-trip taker fees of both legs.
+
+        A call costs the same at any window, about half of it in
+        SpreadMatrix.evaluate and the rest reading the new bars out of the
+        CandleStore, closing the row and building signals. A NumPy recompute
+        of the full window grows with it, so the incremental path only pays off
+        for long windows: at 300 instruments (benchmarks.bench_statistical
+        --sweep) the two cost the same around a 250-bar window, while at 100
+        bars the recompute is still about 20% cheaper.
+        """
+        keys = sorted(key for key in candle_store if key[2] == timeframe)
+        if len(keys) < 2:
             return []
+        if self.matrix is None or [key[:2] for key in keys] != self.matrix.instruments:
+            self._reset(keys)
+        self._feed(candle_store, keys)
+        return self._signals()
+
+    def _reset(self, keys: List[SeriesKey]):
+        """Start a matrix for a new set of instruments; only the last window of bars is replayed."""
+        self.matrix = SpreadMatrix([key[:2] for key in keys], window=self.config.get('stat_window', 100))
+        self._fed = {key: -1 for key in keys}
+        self._fees = None
 
-        # Calculate Bollinger Bands
-        window = 20
-        sma = historical_data['close'].rolling(window).mean()
-        std = historical_data['close'].rolling(window).std()
-        upper_band = sma + (std * 2)
-        lower_band = sma - (std * 2)
+    def _feed(self, candle_store: CandleStore, keys: List[SeriesKey]):
+        """Apply every series' new bars (and in-progress updates) in timestamp order, in one batch."""
+        batches: List[np.ndarray] = []
+        counts: List[int] = []
+        series, replay = candle_store.series, self.matrix.window + 1
+        for key in keys:  # Matrix instruments are in key order
+            candles = series[key].candles
+            bars = candles.since(self._fed[key], replay)
+            counts.append(len(bars))
+            if len(bars):
+                batches.append(bars)
+                self._fed[key] = candles.last_timestamp
+        if not batches:
+            return
+        bars = np.concatenate(batches)
+        indices = np.repeat(np.arange(len(keys)), counts)
+        order = np.argsort(bars[:, 0], kind='stable')
+        self.matrix.update_many(indices[order], bars[order, 0], bars[order, 4])
+
+    def _taker_fees(self) -> np.ndarray:
+        version = None if self.markets is None else self.markets.version
+        if self._fees is None or version != self._fees_version:
+            default = self.config.get('default_taker_fee', 0.0026)
+            self._fees = np.array([
+                default if self.markets is None else self.markets.taker_fee(ex_id, pair)
+                for ex_id, pair in self.matrix.instruments
+            ])
+            self._fees_version = version
+        return self._fees
+
+    def _signals(self) -> List[StatisticalOpportunity]:
+        stats = self.matrix.evaluate()
+        if stats is None or not len(stats['x']):
+            return []
+        fees = self._taker_fees()
+        # Cheapest test first: the remaining ones only run on pairs that are far enough from their mean
+        candidates = np.flatnonzero(np.abs(stats['z']) >= self.config.get('stat_entry_z', 2.0))
+        x, y, beta, z, deviation, phi = (
+            stats[name][candidates] for name in ('x', 'y', 'beta', 'z', 'deviation', 'phi')
+        )
+        # Entering and later exiting both legs, y in full and x scaled by the hedge ratio
+        edge = np.abs(deviation) * 100 - 200 * (fees[y] + np.abs(beta) * fees[x])
+        life = half_life(phi)
+        candidates = np.flatnonzero(
+            (life <= self.config.get('stat_max_half_life', self.matrix.window / 4)) & (edge > 0)
+        )
+        limit = self.config.get('stat_max_signals', 20)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-edge[candidates], limit - 1)[:limit]]
 
-        # Generate signals
-        current_price = historical_data['close'].iloc[-1]
+        amount = self.config['trade_amount']
         opportunities = []
-        if current_price < lower_band.iloc[-1]:
-            opportunities.append({
-                'pair': 'BTC/USD',
-                'side': 'buy',
-                'price': current_price,
-                'indicator': 'bollinger_lower'
-            })
-        elif current_price > upper_band.iloc[-1]:
-            opportunities.append({
-                'pair': 'BTC/USD',
-                'side': 'sell',
-                'price': current_price,
-                'indicator': 'bollinger_upper'
-            })
-        return opportunities
\ No newline at end of file
+        for c in candidates[np.argsort(-edge[candidates])]:
+            i, j = int(x[c]), int(y[c])
+            rich = z[c] > 0  # Spread above its mean: y is expensive relative to x
+            ex_x, pair_x = self.matrix.instruments[i]
+            ex_y, pair_y = self.matrix.instruments[j]
+            price_x, price_y = float(self.matrix.last_close[i]), float(self.matrix.last_close[j])
+            opportunities.append(StatisticalOpportunity(
+                legs=(
+                    Leg(ex_y, pair_y, 'sell' if rich else 'buy', price_y, amount),
+                    Leg(ex_x, pair_x, 'buy' if (rich == (beta[c] > 0)) else 'sell', price_x,
+                        amount * abs(float(beta[c])) * price_y / price_x)
+                ),
+                amount=amount,
+                profit=float(edge[c]),
+                expected_profit=float(edge[c]) / 100 * price_y * amount,  # Quote of y, after fees
+                z_score=float(z[c]),
+                hedge_ratio=float(beta[c]),
+                half_life=float(life[c])
+            ))
+        return opportunities
@@ -1,33 +1,88 @@
 # strategies/triangular.py
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from core.market_snapshot import MarketSnapshot
+from core.opportunity import Leg, TriangularOpportunity
+from exchanges.market_cache import MarketTable
+from strategies.currency_graph import CurrencyGraph
 
 class TriangularArbitrageStrategy:
-    def __init__(self, exchanges: Dict[str, object], config: dict):
+    def __init__(self, exchanges: Dict[str, object], config: dict, markets: Optional[MarketTable] = None):
         self.exchanges = exchanges
         self.config = config
+        self.markets = markets or MarketTable(exchanges, config)
+        self.graph = CurrencyGraph()
+        self._market_counts: Dict[str, int] = {}
+        self._markets_version = self.markets.version
+        self._book_versions: Dict[Tuple[str, str], tuple] = {}
 
-    def find_triangular_arbitrage(self, prices: dict) -> List[dict]:
-        """Find triangular arbitrage opportunities."""
-        opportunities = []
-        triangles = [
-            ('BTC/USD', 'ETH/BTC', 'ETH/USD'),
-            ('ETH/USD', 'BTC/ETH', 'BTC/USD')
-        ]
+    def find_triangular_arbitrage(self, snapshot: MarketSnapshot) -> List[TriangularOpportunity]:
+        """Find profitable conversion cycles (length 3..N) on every exchange."""
+        self._sync_markets()
+
+        # Reprice only the edges whose books changed since the last evaluation
+        present = set()
+        for pair in snapshot.pairs():
+            for ex_id, book in snapshot.books_for(pair).items():
+                present.add((ex_id, pair))
+                bid = book['bids'][0][0] if book['bids'] else None
+                ask = book['asks'][0][0] if book['asks'] else None
+                version = (book.get('timestamp'), book.get('nonce'), bid, ask)
+                if self._book_versions.get((ex_id, pair)) == version:
+                    continue
+                if not self.graph.update_market(ex_id, pair, bid, ask):
+                    self._add_market(ex_id, pair)
+                    self.graph.update_market(ex_id, pair, bid, ask)
+                self._book_versions[(ex_id, pair)] = version
 
-        for triangle in triangles:
-            try:
-                # Get prices from both exchanges
-                a_ask = prices[triangle[0]]['cex']['asks'][0][0]
-                b_ask = prices[triangle[1]]['kraken']['asks'][0][0]
-                c_bid = prices[triangle[2]]['cex']['bids'][0][0]
+        # Books missing from this snapshot (failed fetch, gone stale) must not trade on their last price
+        for key in [key for key in self._book_versions if key not in present]:
+            self.graph.update_market(key[0], key[1], None, None)
+            del self._book_versions[key]
 
-                # Calculate theoretical output
-                theoretical = (1 / a_ask) / b_ask * c_bid
-                if theoretical > 1.005:  # 0.5% threshold
-                    opportunities.append({
-                        'path': triangle,
-                        'profit': (theoretical - 1) * 100
-                    })
-            except KeyError:
+        opportunities = []
+        cycles = self.graph.find_cycles(
+            max_length=self.config.get('triangular_max_length', 4),
+            min_profit=self.config['min_profit']
+        )
+        for cycle in cycles:
+            ex_id = cycle['exchange']
+            legs = []
+            for symbol, side, _, _ in cycle['legs']:
+                book = snapshot.order_book(ex_id, symbol) or {}
+                levels = book.get('asks' if side == 'buy' else 'bids')
+                if not levels:
+                    break
+                legs.append(Leg(ex_id, symbol, side, levels[0][0], 0.0))
+            if len(legs) < len(cycle['legs']):
+                continue  # A leg has no book in this snapshot
+            opportunities.append(TriangularOpportunity(
+                legs=tuple(legs),
+                amount=0.0,
+                profit=cycle['profit'],
+                book_versions=snapshot.book_versions((ex_id, leg.pair) for leg in legs)
+            ))
+        return opportunities
+
+    def _sync_markets(self):
+        """
+        Add edges for every loaded market, picking up markets loaded since the
+        last call; after the market table is invalidated every market's fee
+        is refreshed.
+        """
+        if self._markets_version != self.markets.version:
+            self._market_counts.clear()
+            self._markets_version = self.markets.version
+        for ex_id, exchange in self.exchanges.items():
+            markets = getattr(exchange, 'markets', None) or {}
+            if self._market_counts.get(ex_id) == len(markets):
                 continue
-        return opportunities
\ No newline at end of file
+            for symbol, market in markets.items():
+                if market.get('active') is False or market.get('spot') is False:
+                    continue
+                self.graph.add_market(ex_id, symbol, market['base'], market['quote'], self.markets.taker_fee(ex_id, symbol))
+            self._market_counts[ex_id] = len(markets)
+
+    def _add_market(self, exchange_id: str, symbol: str):
+        """Add a market seen in a snapshot but not (yet) in the exchange's loaded markets."""
+        base, quote = symbol.split('/')[:2]
+        self.graph.add_market(exchange_id, symbol, base, quote.split(':')[0], self.markets.taker_fee(exchange_id, symbol))
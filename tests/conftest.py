@@ -0,0 +1,20 @@
+# tests/conftest.py
+import numpy as np
+import pytest
+
+
+def synthetic_candles(bars: int, seed: int = 1) -> np.ndarray:
+    """5m OHLCV bars of a random walk, with unchanged closes and a flat stretch longer than the window."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.002, bars)
+    steps[rng.random(bars) < 0.05] = 0.0  # Unchanged closes
+    steps[bars // 3:bars // 3 + 30] = 0.0  # A flat stretch longer than the window
+    close = 60000 * np.exp(np.cumsum(steps))
+    ts = np.arange(bars, dtype=np.float64) * 300000
+    return np.column_stack([ts, close, close * 1.001, close * 0.999, close, rng.random(bars)])
+
+
+@pytest.fixture
+def make_candles():
+    """Factory for synthetic candles: make_candles(bars, seed=1)."""
+    return synthetic_candles
@@ -0,0 +1,96 @@
+# tests/test_indicators.py
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_utils import calculate_indicators
+from utils.indicators import OHLCV_COLUMNS, CandleBuffer, IndicatorEngine, RollingStats
+
+TOLERANCE = 1e-8
+
+
+def assert_matches(got: float, want: float, context):
+    if math.isnan(want) or math.isnan(got):
+        assert math.isnan(want) and math.isnan(got), (context, want, got)
+    else:
+        assert abs(got - want) / max(1.0, abs(want)) <= TOLERANCE, (context, want, got)
+
+
+def expected_latest(candles: np.ndarray, capacity: int) -> dict:
+    """calculate_indicators on the bars the engine holds, at the newest bar."""
+    indicators = calculate_indicators(pd.DataFrame(candles[-capacity:], columns=OHLCV_COLUMNS))
+    return {name: float(series.iloc[-1]) for name, series in indicators.items()}
+
+
+def assert_latest(engine: IndicatorEngine, history: np.ndarray, capacity: int, context):
+    expected = expected_latest(history, capacity)
+    got = engine.latest()
+    for name in ('bollinger_upper', 'bollinger_lower', 'rsi'):
+        assert_matches(got[name], expected.get(name, float('nan')), context + (name,))
+
+
+@pytest.mark.parametrize('capacity', [1000, 45])  # 45 wraps the ring buffer many times
+def test_engine_matches_calculate_indicators_bar_by_bar(capacity, make_candles):
+    candles = make_candles(400)
+    engine = IndicatorEngine(window=20, capacity=capacity)
+    for i, candle in enumerate(candles):
+        # The bar first arrives in progress (closing at its open), then is finalized
+        partial = candle.copy()
+        partial[4] = candle[1]
+        assert engine.update(partial)
+        assert_latest(engine, np.vstack([candles[:i], partial]), capacity, (i, 'in progress'))
+        assert engine.update(candle)
+        assert_latest(engine, candles[:i + 1], capacity, (i, 'closed'))
+    np.testing.assert_array_equal(engine.candles.array(), candles[-capacity:])
+
+
+def test_engine_ignores_older_bars(make_candles):
+    candles = make_candles(30)
+    engine = IndicatorEngine(window=20)
+    for candle in candles:
+        engine.update(candle)
+    before = engine.latest()
+    assert not engine.update(candles[5])
+    assert engine.latest() == before
+    assert len(engine.candles) == len(candles)
+
+
+def test_rsi_edge_cases_match_pandas():
+    ts = np.arange(30) * 300000.0
+    for closes in (np.full(30, 100.0), 100.0 + np.arange(30), 130.0 - np.arange(30)):
+        candles = np.column_stack([ts, closes, closes, closes, closes, np.ones(30)])
+        engine = IndicatorEngine(window=20)
+        for candle in candles:
+            engine.update(candle)
+        assert_matches(engine.latest()['rsi'], expected_latest(candles, 1000)['rsi'], closes[:2])
+
+
+def test_candle_buffer_since_across_wraparound(make_candles):
+    candles = make_candles(50)
+    buffer = CandleBuffer(capacity=8)
+    for candle in candles:
+        buffer.append(candle)
+    np.testing.assert_array_equal(buffer.since(candles[-3, 0]), candles[-3:])
+    np.testing.assert_array_equal(buffer.since(-1), candles[-8:])
+    np.testing.assert_array_equal(buffer.since(-1, limit=5), candles[-5:])
+    assert buffer.since(candles[-1, 0] + 1).shape == (0, len(OHLCV_COLUMNS))
+
+
+def test_rolling_stats_push_and_replace_match_numpy():
+    rng = np.random.default_rng(3)
+    stats = RollingStats(7)
+    values = []
+    for step in range(100):  # Crosses the periodic recompute many times
+        value = float(rng.normal(1000, 5))
+        stats.push(value)
+        values.append(value)
+        if step % 3 == 0:
+            values[-1] = float(rng.normal(1000, 5))
+            stats.replace_newest(values[-1])
+        window = np.array(values[-7:])
+        assert stats.mean == pytest.approx(window.mean(), rel=1e-12)
+        if len(window) > 1:
+            assert stats.variance == pytest.approx(window.var(ddof=1), rel=1e-9)
+    assert stats.ready
@@ -0,0 +1,129 @@
+# tests/test_statistical.py
+import asyncio
+import math
+
+import numpy as np
+import pytest
+
+from core.opportunity import Opportunity, StatisticalOpportunity
+from strategies.spread_matrix import SpreadMatrix, half_life
+from strategies.statistical import StatisticalArbitrageStrategy
+from utils.candle_store import CandleStore
+
+STEP_MS = 300000
+
+
+def feed(matrix: SpreadMatrix, logs: np.ndarray):
+    """Apply one bar per row of log prices (relative to the first) to every instrument, in order."""
+    for t, row in enumerate(logs):
+        for instrument, log_price in zip(matrix.instruments, row):
+            assert matrix.update(instrument, t * STEP_MS, 100 * math.exp(log_price))
+
+
+def cointegrated_logs(bars: int, beta: float, phi: float, seed: int = 5) -> np.ndarray:
+    """Log prices (bars x 2): x a random walk, y = beta * x plus AR(1) noise with coefficient `phi`."""
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.normal(0, 0.01, bars))
+    noise = np.zeros(bars)
+    for t in range(1, bars):
+        noise[t] = phi * noise[t - 1] + rng.normal(0, 0.002)
+    return np.column_stack([x, beta * x + noise])
+
+
+def test_three_instruments_match_hand_computed_statistics():
+    # Window of 4 closed bars plus the current one. For (A, B):
+    #   mean A = 1.5, mean B = 3.25, var A = 1.25, cov = 2.625, so beta = 2.1
+    #   spread B - 2.1 A = (0, -0.1, 0.8, -0.3): mean 0.1, variance 0.175
+    #   current spread 8 - 2.1 * 4 = -0.4, so deviation = -0.5 and z = -0.5 / sqrt(0.175)
+    #   lag-1: (0 - 0.08 - 0.24) / 3 - 0.1^2 = -0.35 / 3, so phi = -2/3
+    logs = np.array([
+        [0.0, 0.0, 0.0],
+        [1.0, 2.0, 0.5],
+        [2.0, 5.0, 0.5],
+        [3.0, 6.0, 1.0],
+        [4.0, 8.0, 1.5],
+    ]) / 100  # Scaled so closes stay near 100; every statistic scales accordingly
+    matrix = SpreadMatrix([('ex', 'A/USD'), ('ex', 'B/USD'), ('ex', 'C/USD')], window=4)
+    feed(matrix, logs[:4])
+    assert matrix.evaluate() is None  # Three closed rows: not a full window yet
+    for instrument, log_price in zip(matrix.instruments, logs[4]):  # Closes the fourth row
+        assert matrix.update(instrument, 4 * STEP_MS, 100 * math.exp(log_price))
+
+    stats = matrix.evaluate()
+    assert list(zip(stats['x'], stats['y'])) == [(0, 1), (0, 2), (1, 2)]
+    assert stats['beta'][0] == pytest.approx(2.1, rel=1e-9)
+    assert stats['deviation'][0] == pytest.approx(-0.5 / 100, rel=1e-9)
+    assert stats['std'][0] == pytest.approx(math.sqrt(0.175) / 100, rel=1e-9)
+    assert stats['z'][0] == pytest.approx(-0.5 / math.sqrt(0.175), rel=1e-9)
+    assert stats['phi'][0] == pytest.approx(-2 / 3, rel=1e-9)
+    assert half_life(stats['phi'][:1])[0] == 0.0  # Overshooting spreads revert within a bar
+
+
+def test_rolling_window_matches_per_pair_least_squares():
+    window = 100
+    logs = cointegrated_logs(350, beta=1.5, phi=0.5)
+    matrix = SpreadMatrix([('ex', 'X/USD'), ('ex', 'Y/USD')], window=window, rebuild_every=75)
+    feed(matrix, logs)
+    stats = matrix.evaluate()
+
+    # The matrix works in logs relative to each first close; phi's window-mean centring depends on that anchor
+    anchored = logs - logs[0]
+    rows, current = anchored[-window - 1:-1], anchored[-1]  # The window of closed bars, then the in-progress one
+    beta, intercept = np.polyfit(rows[:, 0], rows[:, 1], 1)
+    spread = rows[:, 1] - beta * rows[:, 0]
+    deviation = (current[1] - beta * current[0]) - spread.mean()
+    lag = np.mean(spread[1:] * spread[:-1]) - spread.mean() ** 2
+    assert stats['beta'][0] == pytest.approx(beta, rel=1e-8)
+    assert stats['z'][0] == pytest.approx(deviation / spread.std(), rel=1e-7)
+    assert stats['phi'][0] == pytest.approx(lag / spread.var(), rel=1e-7)
+    # And the estimates recover the process
+    assert stats['beta'][0] == pytest.approx(1.5, abs=0.1)
+    assert stats['phi'][0] == pytest.approx(0.5, abs=0.2)
+
+
+def test_strategy_signals_a_shocked_cointegrated_pair():
+    window = 100
+    logs = cointegrated_logs(window + 1, beta=1.5, phi=0.5)
+    logs[-1, 1] += 0.03  # Y jumps 3% above its fitted spread on the latest bar
+    store = CandleStore(capacity=window * 2)
+    for t, row in enumerate(logs):
+        for pair, log_price in zip(('X/USD', 'Y/USD'), row):
+            close = 100 * math.exp(log_price)
+            store.upsert('ex', pair, '5m', [[t * STEP_MS, close, close, close, close, 1.0]])
+    fee = 0.0005
+    strategy = StatisticalArbitrageStrategy({'trade_amount': 0.01, 'stat_window': window, 'stat_entry_z': 2.0,
+                                             'stat_max_half_life': window, 'default_taker_fee': fee})
+
+    opportunities = asyncio.run(strategy.analyze(store, '5m'))
+
+    assert len(opportunities) == 1
+    opportunity = opportunities[0]
+    assert isinstance(opportunity, StatisticalOpportunity)
+    stats = strategy.matrix.evaluate()
+    beta, deviation = float(stats['beta'][0]), float(stats['deviation'][0])
+    assert opportunity.z_score > 2.0 and opportunity.hedge_ratio == pytest.approx(beta)
+    # Y is rich: sell it, and buy X against it (positive hedge ratio)
+    (sell_leg, buy_leg) = opportunity.legs
+    assert (sell_leg.pair, sell_leg.side, buy_leg.pair, buy_leg.side) == ('Y/USD', 'sell', 'X/USD', 'buy')
+    assert buy_leg.amount == pytest.approx(0.01 * beta * sell_leg.price / buy_leg.price)
+    # Edge in percent: the deviation less both legs' taker fees, in and out
+    edge = abs(deviation) * 100 - 200 * (fee + abs(beta) * fee)
+    assert opportunity.profit == pytest.approx(edge) and opportunity.profit > 0
+    assert opportunity.expected_profit == pytest.approx(edge / 100 * sell_leg.price * 0.01)
+
+    data = opportunity.to_dict()
+    assert data['strategy'] == 'statistical' and data['profit'] == opportunity.profit
+    assert Opportunity.from_dict(data).legs == opportunity.legs
+
+
+def test_strategy_ignores_pairs_within_the_band():
+    window = 100
+    logs = cointegrated_logs(window + 1, beta=1.5, phi=0.5)
+    logs[-1] = logs[-2]  # Latest bar repeats the previous one: no shock
+    store = CandleStore(capacity=window * 2)
+    for t, row in enumerate(logs):
+        for pair, log_price in zip(('X/USD', 'Y/USD'), row):
+            close = 100 * math.exp(log_price)
+            store.upsert('ex', pair, '5m', [[t * STEP_MS, close, close, close, close, 1.0]])
+    strategy = StatisticalArbitrageStrategy({'trade_amount': 0.01, 'stat_window': window, 'stat_entry_z': 4.0})
+    assert asyncio.run(strategy.analyze(store, '5m')) == []
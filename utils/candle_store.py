@@ -0,0 +1,82 @@
+# utils/candle_store.py
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.data_utils import timeframe_to_ms
+from utils.indicators import IndicatorEngine
+
+SeriesKey = Tuple[str, str, str]  # (exchange_id, pair, timeframe)
+
+
+class CandleStore:
+    """
+    Deduplicated OHLCV history, one series per (exchange, pair, timeframe).
+
+    Each series is an IndicatorEngine, so candles are upserted by timestamp
+    (a repeated bar replaces the stored one, older bars are dropped) and the
+    indicators stay current. Missing bars are reported so the caller can
+    backfill them before newer bars are applied.
+    """
+
+    def __init__(self, capacity: int = 1000, window: int = 20):
+        self.capacity = capacity
+        self.window = window
+        self.series: Dict[SeriesKey, IndicatorEngine] = {}
+        self._known_gaps: Dict[SeriesKey, List[Tuple[int, int]]] = {}
+
+    def engine(self, exchange_id: str, pair: str, timeframe: str) -> IndicatorEngine:
+        """The series for a key, created empty on first use."""
+        key = (exchange_id, pair, timeframe)
+        engine = self.series.get(key)
+        if engine is None:
+            engine = self.series[key] = IndicatorEngine(window=self.window, capacity=self.capacity)
+        return engine
+
+    def __iter__(self) -> Iterator[SeriesKey]:
+        return iter(self.series)
+
+    def since(self, exchange_id: str, pair: str, timeframe: str) -> Optional[int]:
+        """
+        Timestamp to fetch from: the newest stored bar, so its in-progress values
+        are refreshed along with any newer bars. None when nothing is stored.
+        """
+        engine = self.series.get((exchange_id, pair, timeframe))
+        return None if engine is None else engine.candles.last_timestamp
+
+    def upsert(
+        self,
+        exchange_id: str,
+        pair: str,
+        timeframe: str,
+        candles: Sequence[Sequence[float]],
+        allow_gaps: bool = False
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Merge fetched candles into a series.
+
+        Args:
+            exchange_id: Exchange the candles came from.
+            pair: Trading pair.
+            timeframe: Candle timeframe (e.g. '5m').
+            candles: ccxt OHLCV rows, in any order, possibly overlapping stored bars.
+            allow_gaps: Accept missing bars instead of stopping at the first gap.
+
+        Returns:
+            (number of candles applied, timestamp of the first missing bar or None).
+            When a gap is found, candles after it are not applied.
+        """
+        engine = self.engine(exchange_id, pair, timeframe)
+        step = timeframe_to_ms(timeframe)
+        applied = 0
+        for candle in sorted(candles, key=lambda c: c[0]):
+            last_ts = engine.candles.last_timestamp
+            if last_ts is not None and candle[0] > last_ts + step:
+                if not allow_gaps:
+                    return applied, last_ts + step
+                self._known_gaps.setdefault((exchange_id, pair, timeframe), []).append((last_ts + step, int(candle[0])))
+            if engine.update(candle):
+                applied += 1
+        return applied, None
+
+    def gaps(self, exchange_id: str, pair: str, timeframe: str) -> List[Tuple[int, int]]:
+        """Gaps that were accepted because the exchange had no bars to backfill them."""
+        return list(self._known_gaps.get((exchange_id, pair, timeframe), []))
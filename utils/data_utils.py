@@ -52,4 +52,18 @@ def calculate_indicators(historical_data: pd.DataFrame) -> Dict[str, pd.Series]:
     rs = gain / loss
     indicators['rsi'] = 100 - (100 / (1 + rs))
 
-    return indicators
\ No newline at end of file
+    return indicators
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """
+    Convert a ccxt timeframe string to milliseconds.
+
+    Args:
+        timeframe: A timeframe such as '1m', '5m', '1h', '1d', '1w' or '1M'.
+
+    Returns:
+        The bar duration in milliseconds.
+    """
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000, 'y': 31536000}
+    return int(timeframe[:-1]) * units[timeframe[-1]] * 1000
@@ -0,0 +1,209 @@
+# utils/indicators.py
+import math
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+class CandleBuffer:
+    """
+    Fixed-capacity ring buffer of OHLCV candles.
+
+    Appends and in-place updates of the newest bar are O(1); the oldest bar is
+    overwritten once the buffer is full.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._data = np.full((capacity, len(OHLCV_COLUMNS)), np.nan)
+        self._timestamps = self._data[:, 0]  # View: scalar reads are cheaper on 1-D arrays
+        self._start = 0
+        self._size = 0
+        self.last_timestamp: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _newest_index(self) -> int:
+        return (self._start + self._size - 1) % self.capacity
+
+    def append(self, candle: Sequence[float]):
+        """Add a new bar, evicting the oldest one when full."""
+        if self._size < self.capacity:
+            self._data[(self._start + self._size) % self.capacity] = candle[:6]
+            self._size += 1
+        else:
+            self._data[self._start] = candle[:6]
+            self._start = (self._start + 1) % self.capacity
+        self.last_timestamp = int(candle[0])
+
+    def replace_last(self, candle: Sequence[float]):
+        """Overwrite the newest bar (e.g. an in-progress candle that was updated)."""
+        self._data[self._newest_index()] = candle[:6]
+        self.last_timestamp = int(candle[0])
+
+    def last(self, n: int = 1) -> np.ndarray:
+        """The newest `n` bars in chronological order (a copy)."""
+        n = min(n, self._size)
+        first = (self._start + self._size - n) % self.capacity
+        if first + n <= self.capacity:
+            return self._data[first:first + n].copy()
+        return np.concatenate((self._data[first:], self._data[:first + n - self.capacity]))
+
+    def since(self, timestamp: float, limit: Optional[int] = None) -> np.ndarray:
+        """Bars stamped `timestamp` or later, at most the newest `limit`, in chronological order (a copy)."""
+        count, index, timestamps = 0, self._newest_index(), self._timestamps
+        limit = self._size if limit is None else min(limit, self._size)
+        while count < limit and timestamps[index] >= timestamp:
+            count += 1
+            index = (index - 1) % self.capacity
+        return self.last(count)
+
+    def array(self) -> np.ndarray:
+        """All bars in chronological order (a copy)."""
+        return self.last(self._size)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.array()[:, OHLCV_COLUMNS.index(name)]
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.array(), columns=OHLCV_COLUMNS)
+
+
+class RollingStats:
+    """
+    Rolling mean and sample variance over a fixed window using Welford updates.
+
+    Pushing a value and replacing the newest value are both O(1). To stop
+    rounding drift from removals accumulating, the sums are recomputed from the
+    window once every `window` pushes, which keeps the amortized cost O(1).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = [0.0] * window
+        self._pos = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.count == self.window
+
+    @property
+    def variance(self) -> float:
+        return max(self._m2, 0.0) / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def push(self, value: float):
+        """Add a value, dropping the oldest one once the window is full."""
+        if self.count < self.window:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            self._replace(self._values[self._pos], value)
+        self._values[self._pos] = value
+        self._pos = (self._pos + 1) % self.window
+        if self._pos == 0 and self.ready:
+            self.mean = math.fsum(self._values) / self.window
+            self._m2 = math.fsum((value - self.mean) ** 2 for value in self._values)
+
+    def replace_newest(self, value: float):
+        """Replace the most recently pushed value."""
+        newest = (self._pos - 1) % self.window
+        self._replace(self._values[newest], value)
+        self._values[newest] = value
+
+    def _replace(self, old: float, new: float):
+        delta = new - old
+        old_mean = self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (new - self.mean + old - old_mean)
+
+
+class IndicatorEngine:
+    """
+    Streaming Bollinger Bands and RSI over a candle ring buffer.
+
+    Each new or updated bar costs O(1). Values match calculate_indicators in
+    utils/data_utils.py (rolling mean/sample std of closes and a rolling-mean
+    RSI over `window` bars) evaluated at the newest bar.
+    """
+
+    def __init__(self, window: int = 20, num_std: float = 2.0, capacity: int = 1000):
+        self.window = window
+        self.num_std = num_std
+        self.candles = CandleBuffer(capacity)
+        self._closes = RollingStats(window)
+        self._gains = RollingStats(window)
+        self._losses = RollingStats(window)
+        self._last_close = float('nan')
+        self._prev_close: Optional[float] = None  # Close of the bar before the newest one
+
+    def update(self, candle: Sequence[float]) -> bool:
+        """
+        Feed one OHLCV bar.
+
+        A bar with the newest timestamp replaces it, a newer bar is appended and
+        an older one is ignored. Returns True if the bar changed the state.
+        """
+        last_ts = self.candles.last_timestamp
+        ts = candle[0]
+        close = float(candle[4])
+        if last_ts is None or ts > last_ts:
+            newest_close = None if last_ts is None else self._last_close
+            self.candles.append(candle)
+            self._closes.push(close)
+            gain, loss = self._gain_loss(newest_close, close)
+            self._gains.push(gain)
+            self._losses.push(loss)
+            self._prev_close = newest_close
+            self._last_close = close
+            return True
+        if ts == last_ts:
+            self.candles.replace_last(candle)
+            self._closes.replace_newest(close)
+            gain, loss = self._gain_loss(self._prev_close, close)
+            self._gains.replace_newest(gain)
+            self._losses.replace_newest(loss)
+            self._last_close = close
+            return True
+        return False
+
+    @staticmethod
+    def _gain_loss(previous: Optional[float], close: float):
+        if previous is None:
+            return 0.0, 0.0  # The first diff is NaN, which the pandas version counts as zero
+        delta = close - previous
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def latest(self) -> Dict[str, float]:
+        """Indicator values at the newest bar (NaN until `window` bars are available)."""
+        nan = float('nan')
+        if not self._closes.ready:
+            return {'close': self._last_close, 'sma': nan, 'std': nan,
+                    'bollinger_upper': nan, 'bollinger_lower': nan, 'rsi': nan}
+        sma = self._closes.mean
+        std = self._closes.std
+        gain, loss = self._gains.mean, self._losses.mean
+        if loss > 0:
+            rsi = 100 - 100 / (1 + gain / loss)
+        else:
+            rsi = 100.0 if gain > 0 else nan
+        return {
+            'close': self._last_close,
+            'sma': sma,
+            'std': std,
+            'bollinger_upper': sma + std * self.num_std,
+            'bollinger_lower': sma - std * self.num_std,
+            'rsi': rsi
+        }
@@ -1,12 +1,146 @@
 # utils/logger.py
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from typing import Optional
+import threading
+from typing import Dict, Optional, Set
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_QUEUE_SIZE = 10000
+
+_IMMUTABLE = (str, int, float, bool, type(None))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _RoutingHandler(logging.Handler):
+    """
+    Runs on the listener thread: writes every record to the console and to the
+    log files its logger was set up with.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.console = logging.StreamHandler(sys.stdout)
+        self.console.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        self.files: Dict[str, logging.Handler] = {}
+        self.routes: Dict[str, Set[str]] = {}  # logger name -> log files
+        self.routes_lock = threading.Lock()
+
+    def add_route(self, name: str, log_file: str):
+        with self.routes_lock:
+            if log_file not in self.files:
+                handler = logging.FileHandler(log_file)
+                handler.setFormatter(JsonFormatter())
+                self.files[log_file] = handler
+            self.routes.setdefault(name, set()).add(log_file)
+
+    def emit(self, record: logging.LogRecord):
+        self.console.handle(record)
+        with self.routes_lock:
+            handlers = [self.files[path] for path in self.routes.get(record.name, ())]
+        for handler in handlers:
+            handler.handle(record)
+
+    def close(self):
+        try:
+            self.console.flush()
+        except (OSError, ValueError):
+            pass  # The stream was closed before us (as logging.shutdown allows for): nothing left to flush
+        for handler in self.files.values():
+            handler.close()
+        super().close()
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread.
+
+    Only records that pass the logger's level get here, so %-style arguments
+    are still only formatted for records that are emitted. The message and
+    any `extra=` fields are snapshotted before queueing: callers pass live
+    objects the event loop may change before the listener writes them. When
+    the queue is full the record is dropped rather than blocking the caller.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in list(record.__dict__.items()):
+            if key not in _RECORD_ATTRS and not key.startswith('_') and not isinstance(value, _IMMUTABLE):
+                record.__dict__[key] = json.loads(json.dumps(value, default=str))
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)  # Wait for room: the stop request must not be dropped
+
+
+_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue(_QUEUE_SIZE)
+_router: Optional[_RoutingHandler] = None
+_listener: Optional[_Listener] = None
+_setup_lock = threading.Lock()
+
+
+def _start_listener() -> _RoutingHandler:
+    global _router, _listener
+    if _listener is None:
+        _router = _RoutingHandler()
+        _listener = _Listener(_queue, _router, respect_handler_level=False)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return _router
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _router.close()
+            _listener = None
+
 
 def setup_logger(name: str, log_file: Optional[str] = None, level: int = logging.INFO) -> logging.Logger:
     """
     Set up and configure a logger.
 
+    Records go through a queue to a background listener thread that writes
+    them to stdout and, as JSON lines, to `log_file`, so logging never waits
+    on the console or the disk. Calling this again for the same logger adds
+    no duplicate handlers.
+
     Args:
         name: The name of the logger.
         log_file: The file to write logs to (optional).
@@ -17,19 +151,11 @@ def setup_logger(name: str, log_file: Optional[str] = None, level: int = logging
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-
-    # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-
-    # Add console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    # Add file handler if log_file is provided
-    if log_file:
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-
-    return logger
\ No newline at end of file
+    with _setup_lock:
+        router = _start_listener()
+        if not any(isinstance(handler, _NonBlockingQueueHandler) for handler in logger.handlers):
+            logger.addHandler(_NonBlockingQueueHandler(_queue))
+            logger.propagate = False
+        if log_file:
+            router.add_route(name, log_file)
+    return logger
@@ -0,0 +1,296 @@
+# utils/market_recorder.py
+import heapq
+import mmap
+import os
+import zlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+SegmentKey = Tuple[str, str, str]  # (exchange_id, pair, kind)
+
+MAGIC = b'MKTSEG01'
+KINDS = ('order_book', 'ohlcv')
+
+# One entry per chunk, in the segment's sidecar .idx file
+INDEX_DTYPE = np.dtype([
+    ('offset', '<i8'),      # Byte offset of the chunk in the .seg file
+    ('length', '<i8'),      # Bytes on disk
+    ('rows', '<i8'),
+    ('first_ts', '<i8'),
+    ('last_ts', '<i8'),
+    ('compressed', '<i8')
+])
+
+
+def _schema(kind: str, depth: int) -> List[Tuple[str, np.dtype, int]]:
+    """Columns of a segment as (name, dtype, values per row)."""
+    if kind == 'order_book':
+        return [('ts', np.dtype('<i8'), 1)] + [
+            (name, np.dtype('<f8'), depth) for name in ('bid_price', 'bid_size', 'ask_price', 'ask_size')
+        ]
+    if kind == 'ohlcv':
+        return [('ts', np.dtype('<i8'), 1), ('candle_ts', np.dtype('<i8'), 1)] + [
+            (name, np.dtype('<f8'), 1) for name in ('open', 'high', 'low', 'close', 'volume')
+        ]
+    raise ValueError(f"Unknown segment kind {kind!r}")
+
+
+def _file_stem(key: SegmentKey) -> str:
+    """File name (without extension) of a segment; every part is percent-encoded, so it parses back exactly."""
+    return '__'.join(quote(part, safe='').replace('_', '%5F') for part in key)
+
+
+def _legacy_file_stem(key: SegmentKey) -> str:
+    """Name used by recordings written before stems were percent-encoded."""
+    exchange_id, pair, kind = key
+    return f"{exchange_id}__{pair.replace('/', '-')}__{kind}"
+
+
+def _parse_stem(stem: str) -> SegmentKey:
+    exchange_id, pair, kind = (unquote(part) for part in stem.split('__'))
+    if '/' not in pair:  # Unified symbols always contain '/': a legacy stem, where it was written as '-'
+        pair = pair.replace('-', '/')
+    return exchange_id, pair, kind
+
+
+class _SegmentWriter:
+    """Buffers rows of one segment and appends them as columnar chunks."""
+
+    def __init__(self, root: str, key: SegmentKey, depth: int, chunk_rows: int, compress: bool):
+        self.kind = key[2]
+        self.depth = depth
+        self.chunk_rows = chunk_rows
+        self.compress = compress
+        self.schema = _schema(self.kind, depth)
+        self.columns = {name: np.empty((chunk_rows, width), dtype=dtype) for name, dtype, width in self.schema}
+        self.rows = 0
+
+        stem = os.path.join(root, _file_stem(key))
+        legacy = os.path.join(root, _legacy_file_stem(key))
+        if not os.path.exists(stem + '.seg') and os.path.exists(legacy + '.seg'):
+            stem = legacy  # Keep appending to a segment recorded under the old name
+        new = not os.path.exists(stem + '.seg')
+        self.data = open(stem + '.seg', 'ab')
+        self.index = open(stem + '.idx', 'ab')
+        if new:
+            self.data.write(MAGIC + np.array([KINDS.index(self.kind), depth], dtype='<i4').tobytes())
+        else:
+            with open(stem + '.seg', 'rb') as f:
+                header = f.read(16)
+            if header[:8] != MAGIC or int(np.frombuffer(header[12:16], dtype='<i4')[0]) != depth:
+                raise ValueError(f"{stem}.seg was recorded with a different format or depth")
+
+    def append_book(self, ts: int, book: dict):
+        i = self.rows
+        self.columns['ts'][i, 0] = ts
+        for side in ('bid', 'ask'):
+            levels = book.get(side + 's') or []
+            n = min(len(levels), self.depth)
+            prices, sizes = self.columns[side + '_price'][i], self.columns[side + '_size'][i]
+            prices[n:] = np.nan
+            sizes[n:] = np.nan
+            if n:
+                arr = np.asarray([level[:2] for level in levels[:n]], dtype=np.float64)
+                prices[:n] = arr[:, 0]
+                sizes[:n] = arr[:, 1]
+        self._advance()
+
+    def append_candle(self, ts: int, candle: Sequence[float]):
+        i = self.rows
+        self.columns['ts'][i, 0] = ts
+        self.columns['candle_ts'][i, 0] = candle[0]
+        for j, name in enumerate(('open', 'high', 'low', 'close', 'volume'), start=1):
+            self.columns[name][i, 0] = candle[j] if candle[j] is not None else np.nan
+        self._advance()
+
+    def _advance(self):
+        self.rows += 1
+        if self.rows == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        n = self.rows
+        payload = b''.join(self.columns[name][:n].tobytes() for name, _, _ in self.schema)
+        compressed = 0
+        if self.compress:
+            packed = zlib.compress(payload, 1)
+            if len(packed) < len(payload):
+                payload, compressed = packed, 1
+        # Keep uncompressed chunks 8-byte aligned so the reader can view them in place
+        pad = -self.data.tell() % 8
+        if pad:
+            self.data.write(b'\0' * pad)
+        offset = self.data.tell()
+        self.data.write(payload)
+        self.data.flush()
+        ts = self.columns['ts'][:n, 0]
+        entry = np.array([(offset, len(payload), n, ts.min(), ts.max(), compressed)], dtype=INDEX_DTYPE)
+        self.index.write(entry.tobytes())
+        self.index.flush()
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+        self.data.close()
+        self.index.close()
+
+
+class MarketRecorder:
+    """
+    Append-only recorder of order book and OHLCV fetches.
+
+    Writes one segment per (exchange, pair, kind) under `root`. A segment is
+    a .seg file of columnar chunks (int64 timestamps, float64 prices/sizes,
+    books padded with NaN to `depth` levels), each optionally zlib-compressed,
+    plus a .idx file with one fixed-width entry per chunk giving its offset
+    and time range. Rows are buffered in memory and written a chunk at a time.
+    """
+
+    def __init__(self, root: str, depth: int = 25, chunk_rows: int = 1024, compress: bool = True):
+        self.root = root
+        self.depth = depth
+        self.chunk_rows = chunk_rows
+        self.compress = compress
+        self.segments: Dict[SegmentKey, _SegmentWriter] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _segment(self, exchange_id: str, pair: str, kind: str) -> _SegmentWriter:
+        key = (exchange_id, pair, kind)
+        segment = self.segments.get(key)
+        if segment is None:
+            segment = self.segments[key] = _SegmentWriter(self.root, key, self.depth, self.chunk_rows, self.compress)
+        return segment
+
+    def record_order_book(self, exchange_id: str, pair: str, order_book: dict, ts: int):
+        """Append an order book fetched at `ts` (ms)."""
+        self._segment(exchange_id, pair, 'order_book').append_book(ts, order_book)
+
+    def record_ohlcv(self, exchange_id: str, pair: str, candles: Sequence[Sequence[float]], ts: int):
+        """Append every candle of an OHLCV response fetched at `ts` (ms)."""
+        segment = self._segment(exchange_id, pair, 'ohlcv')
+        for candle in candles:
+            segment.append_candle(ts, candle)
+
+    def flush(self):
+        for segment in self.segments.values():
+            segment.flush()
+
+    def close(self):
+        for segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
+
+
+class Segment:
+    """
+    Memory-mapped view of one recorded segment.
+
+    Uncompressed chunks are returned as NumPy views straight onto the mapped
+    file; compressed chunks are inflated on access.
+    """
+
+    def __init__(self, path: str, key: SegmentKey):
+        self.key = key
+        self.path = path
+        with open(path + '.seg', 'rb') as f:
+            header = f.read(16)
+            if header[:8] != MAGIC:
+                raise ValueError(f"{path}.seg is not a market data segment")
+            kind_code, self.depth = (int(v) for v in np.frombuffer(header[8:16], dtype='<i4'))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.kind = KINDS[kind_code]
+        self.schema = _schema(self.kind, self.depth)
+        self.index = np.fromfile(path + '.idx', dtype=INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return int(self.index['rows'].sum())
+
+    def chunk(self, i: int) -> Dict[str, np.ndarray]:
+        """Columns of chunk `i`, shaped (rows, width)."""
+        entry = self.index[i]
+        rows = int(entry['rows'])
+        offset = int(entry['offset'])
+        if entry['compressed']:
+            buffer, offset = zlib.decompress(self._mmap[offset:offset + int(entry['length'])]), 0
+        else:
+            buffer = self._mmap
+        columns = {}
+        for name, dtype, width in self.schema:
+            columns[name] = np.frombuffer(buffer, dtype=dtype, count=rows * width, offset=offset).reshape(rows, width)
+            offset += rows * width * dtype.itemsize
+        return columns
+
+    def read(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield the rows with start <= ts < end (ms), a chunk at a time.
+
+        Chunks outside the range are skipped using the index alone.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.index['last_ts'], start, side='left'))
+        hi = len(self.index) if end is None else int(np.searchsorted(self.index['first_ts'], end, side='left'))
+        for i in range(lo, hi):
+            columns = self.chunk(i)
+            ts = columns['ts'][:, 0]
+            a = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+            b = len(ts) if end is None else int(np.searchsorted(ts, end, side='left'))
+            if a < b:
+                yield {name: values[a:b] for name, values in columns.items()}
+
+    def records(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[dict]:
+        """Rows as backtest records, grouping each OHLCV response back into one record."""
+        exchange_id, pair, kind = self.key
+        for columns in self.read(start, end):
+            ts = columns['ts'][:, 0]
+            if kind == 'order_book':
+                for i in range(len(ts)):
+                    yield {
+                        'ts': int(ts[i]), 'type': kind, 'exchange': exchange_id, 'symbol': pair,
+                        'bids': self._levels(columns['bid_price'][i], columns['bid_size'][i]),
+                        'asks': self._levels(columns['ask_price'][i], columns['ask_size'][i])
+                    }
+            else:
+                candles = np.column_stack([columns[name][:, 0] for name in
+                                           ('candle_ts', 'open', 'high', 'low', 'close', 'volume')]).tolist()
+                bounds = np.flatnonzero(np.diff(ts)) + 1
+                for a, b in zip(np.r_[0, bounds], np.r_[bounds, len(ts)]):
+                    yield {
+                        'ts': int(ts[a]), 'type': kind, 'exchange': exchange_id, 'symbol': pair,
+                        'candles': [[int(c[0])] + c[1:] for c in candles[a:b]]
+                    }
+
+    @staticmethod
+    def _levels(prices: np.ndarray, sizes: np.ndarray) -> List[List[float]]:
+        n = int(np.count_nonzero(~np.isnan(prices)))  # Levels are packed at the front
+        return np.column_stack((prices[:n], sizes[:n])).tolist()
+
+    def close(self):
+        self._mmap.close()
+
+
+class RecordingReader:
+    """Reader for a directory written by MarketRecorder."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.segments: Dict[SegmentKey, Segment] = {}
+        for name in sorted(os.listdir(root)):
+            if name.endswith('.seg'):
+                stem = name[:-4]
+                key = _parse_stem(stem)
+                self.segments[key] = Segment(os.path.join(root, stem), key)
+
+    def segment(self, exchange_id: str, pair: str, kind: str) -> Optional[Segment]:
+        return self.segments.get((exchange_id, pair, kind))
+
+    def records(self, start: Optional[int] = None, end: Optional[int] = None) -> Iterator[dict]:
+        """Every segment's records merged into one time-ordered stream."""
+        return heapq.merge(*(segment.records(start, end) for segment in self.segments.values()),
+                           key=lambda record: record['ts'])
+
+    def close(self):
+        for segment in self.segments.values():
+            segment.close()
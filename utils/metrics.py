@@ -0,0 +1,171 @@
+# utils/metrics.py
+import bisect
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from utils.logger import setup_logger
+
+logger = setup_logger('Metrics')
+
+# Seconds; spans in-process strategy evaluation up to slow exchange round trips
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+# Set by enable(); every recording call returns immediately while this is False
+_enabled = False
+
+
+def enable():
+    """Start recording metrics (off by default)."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        if not _enabled:
+            return
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *label_values: str):
+        if not _enabled:
+            return
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = 'le="%s"' % ('+Inf' if bound == math.inf else repr(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {series[-1]}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+# Gauge samples as (name, {label: value}, value), collected when the endpoint is scraped
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List[Collector] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Collector):
+        """Register a callback producing gauge samples at scrape time."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.error("Metrics collector failed: %s", e)
+                continue
+            for name, labels, value in samples:
+                lines.append(f'{name}{_format_labels(list(labels), list(labels.values()))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+FETCH_LATENCY = REGISTRY.histogram(
+    'exchange_request_seconds', 'Latency of exchange API requests', ('exchange', 'method'))
+REQUEST_RETRIES = REGISTRY.counter(
+    'exchange_request_retries_total', 'Exchange API requests retried after an error', ('exchange', 'method'))
+REQUEST_FAILURES = REGISTRY.counter(
+    'exchange_request_failures_total', 'Exchange API requests that failed after all retries', ('exchange', 'method'))
+MARKET_DATA_FETCH = REGISTRY.histogram(
+    'market_data_fetch_seconds', 'Time to fetch all order books and OHLCV for a tick')
+STRATEGY_EVALUATION = REGISTRY.histogram(
+    'strategy_evaluation_seconds', 'Time for one strategy to evaluate a snapshot', ('strategy',))
+DETECT_TO_ORDER = REGISTRY.histogram(
+    'detect_to_order_seconds', 'Time from detecting an opportunity to submitting its orders', ('strategy',))
+ORDER_ACK = REGISTRY.histogram(
+    'order_ack_seconds', 'Time from order submission to exchange acknowledgement', ('exchange',))
+
+
+class MetricsServer:
+    """Serves REGISTRY at /metrics over HTTP."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.registry = registry
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self, host: str = '127.0.0.1', port: int = 9102):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
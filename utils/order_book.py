@@ -0,0 +1,131 @@
+# utils/order_book.py
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+ArrayLike = Union[float, np.ndarray]
+
+
+class BookSide:
+    """
+    One side of an order book stored as contiguous float64 arrays.
+
+    Levels are ordered best-first. Cumulative size and notional are precomputed
+    so depth queries are a binary search instead of a walk over the levels.
+    """
+    __slots__ = ('prices', 'sizes', 'cum_size', 'cum_notional', 'is_bid', '_keys')
+
+    def __init__(self, prices: np.ndarray, sizes: np.ndarray, is_bid: bool):
+        self.prices = prices
+        self.sizes = sizes
+        self.is_bid = is_bid
+        # Leading zero so index i holds the totals of the first i levels
+        self.cum_size = np.concatenate(([0.0], np.cumsum(sizes)))
+        self.cum_notional = np.concatenate(([0.0], np.cumsum(prices * sizes)))
+        # Ascending search keys: bids are stored best (highest) first
+        self._keys = -prices if is_bid else prices
+
+    @classmethod
+    def from_levels(cls, levels: list, is_bid: bool) -> 'BookSide':
+        """Build a side from ccxt-style [[price, amount], ...] levels."""
+        if len(levels) == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return cls(empty, empty, is_bid)
+        data = np.asarray(levels, dtype=np.float64)[:, :2]
+        return cls(np.ascontiguousarray(data[:, 0]), np.ascontiguousarray(data[:, 1]), is_bid)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def best(self) -> Optional[float]:
+        return float(self.prices[0]) if len(self.prices) else None
+
+    @property
+    def total_size(self) -> float:
+        return float(self.cum_size[-1])
+
+    def cost(self, amount: ArrayLike) -> ArrayLike:
+        """Notional needed to fill `amount`; NaN where the side is too thin."""
+        amount = np.asarray(amount, dtype=np.float64)
+        cost = np.interp(amount, self.cum_size, self.cum_notional)
+        return np.where(amount <= self.cum_size[-1], cost, np.nan)[()]
+
+    def vwap(self, amount: ArrayLike) -> ArrayLike:
+        """Volume-weighted average price to fill `amount`; NaN where the side is too thin."""
+        amount = np.asarray(amount, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(amount > 0, self.cost(amount) / amount, self.best if len(self.prices) else np.nan)[()]
+
+    def marginal_price(self, amount: ArrayLike) -> ArrayLike:
+        """Price of the level that the last unit of `amount` is filled at."""
+        idx = np.searchsorted(self.cum_size[1:], np.asarray(amount, dtype=np.float64), side='left')
+        padded = np.append(self.prices, np.nan)
+        return padded[np.minimum(idx, len(self.prices))][()]
+
+    def depth_within_bps(self, bps: ArrayLike) -> ArrayLike:
+        """Size available within `bps` basis points of the best price."""
+        if not len(self.prices):
+            return np.zeros_like(np.asarray(bps, dtype=np.float64))[()]
+        offset = np.asarray(bps, dtype=np.float64) / 10000.0
+        limit = self.prices[0] * (1 - offset) if self.is_bid else self.prices[0] * (1 + offset)
+        return self.size_at_price(limit)
+
+    def size_at_price(self, price: ArrayLike) -> ArrayLike:
+        """Cumulative size available at `price` or better."""
+        key = -np.asarray(price, dtype=np.float64) if self.is_bid else np.asarray(price, dtype=np.float64)
+        return self.cum_size[np.searchsorted(self._keys, key, side='right')][()]
+
+
+class OrderBook:
+    """
+    Array-backed order book built once from a ccxt order book dict.
+
+    Bids and asks are BookSide instances; every depth query is O(log n) and
+    accepts NumPy arrays to answer many sizes or thresholds at once.
+    """
+    __slots__ = ('symbol', 'bids', 'asks', 'timestamp', 'nonce')
+
+    def __init__(self, bids: BookSide, asks: BookSide, symbol: Optional[str] = None,
+                 timestamp: Optional[int] = None, nonce: Optional[int] = None):
+        self.symbol = symbol
+        self.bids = bids
+        self.asks = asks
+        self.timestamp = timestamp
+        self.nonce = nonce
+
+    @classmethod
+    def from_ccxt(cls, order_book: Dict[str, list]) -> 'OrderBook':
+        """Convert a ccxt order book dict ({'bids': [...], 'asks': [...]})."""
+        return cls(
+            BookSide.from_levels(order_book.get('bids') or [], is_bid=True),
+            BookSide.from_levels(order_book.get('asks') or [], is_bid=False),
+            symbol=order_book.get('symbol'),
+            timestamp=order_book.get('timestamp'),
+            nonce=order_book.get('nonce')
+        )
+
+    def to_ccxt(self) -> dict:
+        """The book as a ccxt order book dict, for consumers that read levels as lists."""
+        return {
+            'symbol': self.symbol,
+            'bids': np.column_stack((self.bids.prices, self.bids.sizes)).tolist(),
+            'asks': np.column_stack((self.asks.prices, self.asks.sizes)).tolist(),
+            'timestamp': self.timestamp,
+            'nonce': self.nonce
+        }
+
+    def side(self, side: str) -> BookSide:
+        """Side consumed by a taker order: asks for 'buy', bids for 'sell'."""
+        return self.asks if side == 'buy' else self.bids
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.bids.best is None or self.asks.best is None:
+            return None
+        return (self.bids.best + self.asks.best) / 2
+
+
+def as_order_book(order_book: Union[OrderBook, Dict[str, list]]) -> OrderBook:
+    """Return `order_book` as an OrderBook, converting ccxt dicts on the fly."""
+    return order_book if isinstance(order_book, OrderBook) else OrderBook.from_ccxt(order_book)
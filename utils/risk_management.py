@@ -1,42 +1,39 @@
 # utils/risk_management.py
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
+import numpy as np
+from utils.order_book import ArrayLike, OrderBook, as_order_book
 
-def check_liquidity(order_book: Dict[str, list], amount: float) -> bool:
+def check_liquidity(order_book: Union[OrderBook, Dict[str, list]], amount: ArrayLike) -> Union[bool, np.ndarray]:
     """
     Check if there is sufficient liquidity for a trade.
 
     Args:
-        order_book: The order book data.
-        amount: The amount to trade.
+        order_book: The order book data (ccxt dict or OrderBook).
+        amount: The amount to trade, or an array of amounts.
 
     Returns:
-        True if there is sufficient liquidity, False otherwise.
+        True if there is sufficient liquidity, False otherwise (element-wise for arrays).
     """
-    cumulative = 0
-    for ask in order_book['asks']:
-        cumulative += ask[1]
-        if cumulative >= amount:
-            return True
-    return False
+    asks = as_order_book(order_book).asks
+    if np.ndim(amount) == 0:
+        return bool(asks.total_size >= amount)
+    return np.asarray(amount) <= asks.total_size
 
-def calculate_slippage(order_book: Dict[str, list], amount: float) -> float:
+def calculate_slippage(order_book: Union[OrderBook, Dict[str, list]], amount: ArrayLike) -> ArrayLike:
     """
     Calculate the expected slippage for a trade.
 
     Args:
-        order_book: The order book data.
-        amount: The amount to trade.
+        order_book: The order book data (ccxt dict or OrderBook).
+        amount: The amount to trade, or an array of amounts.
 
     Returns:
         The expected slippage as a percentage.
     """
-    cumulative = 0
-    slippage = 0.0
-    for ask in order_book['asks']:
-        if cumulative + ask[1] >= amount:
-            slippage += (amount - cumulative) * (ask[0] - order_book['asks'][0][0])
-            break
-        else:
-            slippage += ask[1] * (ask[0] - order_book['asks'][0][0])
-            cumulative += ask[1]
-    return (slippage / amount) * 100
\ No newline at end of file
+    asks = as_order_book(order_book).asks
+    amount = np.asarray(amount, dtype=np.float64)
+    filled = np.minimum(amount, asks.total_size)
+    cost = np.interp(filled, asks.cum_size, asks.cum_notional)
+    slippage = cost - filled * (asks.best or 0.0)
+    result = (slippage / amount) * 100
+    return float(result) if result.ndim == 0 else result
\ No newline at end of file
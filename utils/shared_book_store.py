@@ -0,0 +1,154 @@
+# utils/shared_book_store.py
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.market_snapshot import MarketSnapshot
+from utils.order_book import BookSide, OrderBook
+
+BookKey = Tuple[str, str]  # (exchange_id, pair)
+
+# Per-slot header fields (int64)
+SEQ, TIMESTAMP, N_BIDS, N_ASKS = range(4)
+# Per-slot level columns (float64, `depth` values each)
+BID_PRICE, BID_SIZE, ASK_PRICE, ASK_SIZE = range(4)
+
+# Retries spent spinning before a reader starts sleeping so a preempted writer can finish
+_SPIN_ATTEMPTS = 16
+_BACKOFF_SECONDS = 0.00005
+
+
+class TornReadError(Exception):
+    """A consistent read could not be made because the slot kept being rewritten."""
+
+
+class SharedBookStore:
+    """
+    Order books for a fixed set of (exchange, pair) keys in shared memory.
+
+    Every key owns a fixed-layout slot: an int64 header (sequence, timestamp,
+    bid and ask level counts) and four float64 columns of `depth` levels (bid
+    price/size, ask price/size). One writer process updates a slot; any number
+    of processes attach by name and read it without pickling.
+
+    Slots are versioned seqlock-style: the writer makes the sequence odd
+    before touching a slot and even again afterwards, and a reader accepts
+    what it copied only if the sequence was even and unchanged around the
+    copy. Writers must not share a slot.
+    """
+
+    def __init__(self, keys: Iterable[BookKey], depth: int = 25, name: Optional[str] = None, create: bool = True):
+        self.keys: List[BookKey] = list(keys)
+        self.slots: Dict[BookKey, int] = {key: i for i, key in enumerate(self.keys)}
+        self.depth = depth
+        header_bytes = len(self.keys) * 4 * 8
+        size = header_bytes + len(self.keys) * 4 * depth * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+        self.header = np.ndarray((len(self.keys), 4), dtype=np.int64, buffer=self.shm.buf)
+        self.levels = np.ndarray((len(self.keys), 4, depth), dtype=np.float64, buffer=self.shm.buf,
+                                 offset=header_bytes)
+        if create:
+            self.header[:] = 0
+
+    @classmethod
+    def attach(cls, name: str, keys: Iterable[BookKey], depth: int = 25) -> 'SharedBookStore':
+        """Open a store created by another process (same keys, in the same order, and depth)."""
+        return cls(keys, depth=depth, name=name, create=False)
+
+    def write(self, exchange_id: str, pair: str, order_book: dict, timestamp: Optional[int] = None):
+        """Publish the top `depth` levels of a ccxt order book dict."""
+        i = self.slots[(exchange_id, pair)]
+        header, levels = self.header[i], self.levels[i]
+        header[SEQ] += 1  # Odd: write in progress
+        for side, price_col, size_col, count in (('bids', BID_PRICE, BID_SIZE, N_BIDS),
+                                                 ('asks', ASK_PRICE, ASK_SIZE, N_ASKS)):
+            rows = order_book.get(side) or []
+            n = min(len(rows), self.depth)
+            if n:
+                data = np.asarray(rows[:n], dtype=np.float64)
+                levels[price_col, :n] = data[:, 0]
+                levels[size_col, :n] = data[:, 1]
+            header[count] = n
+        header[TIMESTAMP] = timestamp or order_book.get('timestamp') or int(time.time() * 1000)
+        header[SEQ] += 1  # Even: consistent
+
+    def version(self, exchange_id: str, pair: str) -> int:
+        """Slot sequence number; changes on every write, 0 if never written."""
+        return int(self.header[self.slots[(exchange_id, pair)], SEQ])
+
+    def read(self, exchange_id: str, pair: str, levels: Optional[int] = None,
+             max_attempts: int = 1000) -> Optional[OrderBook]:
+        """
+        Consistent copy of the top `levels` (default: all stored) as an OrderBook.
+
+        Returns None if the slot was never written. The copy is a memcpy of the
+        requested columns, not a deserialization. After a few immediate
+        retries the reader backs off briefly, since a writer preempted
+        mid-update cannot finish while readers spin on the same CPU.
+        """
+        i = self.slots[(exchange_id, pair)]
+        header, data = self.header[i], self.levels[i]
+        for attempt in range(max_attempts):
+            if attempt >= _SPIN_ATTEMPTS:
+                time.sleep(_BACKOFF_SECONDS)
+            seq = int(header[SEQ])
+            if seq == 0:
+                return None
+            if seq & 1:
+                continue
+            n_bids = int(header[N_BIDS]) if levels is None else min(levels, int(header[N_BIDS]))
+            n_asks = int(header[N_ASKS]) if levels is None else min(levels, int(header[N_ASKS]))
+            timestamp = int(header[TIMESTAMP])
+            bid_prices, bid_sizes = data[BID_PRICE, :n_bids].copy(), data[BID_SIZE, :n_bids].copy()
+            ask_prices, ask_sizes = data[ASK_PRICE, :n_asks].copy(), data[ASK_SIZE, :n_asks].copy()
+            if int(header[SEQ]) == seq:
+                return OrderBook(BookSide(bid_prices, bid_sizes, True), BookSide(ask_prices, ask_sizes, False),
+                                 symbol=pair, timestamp=timestamp, nonce=seq // 2)
+        raise TornReadError(f"{exchange_id} {pair} was rewritten during {max_attempts} read attempts")
+
+    def view(self, exchange_id: str, pair: str) -> Tuple[int, np.ndarray, np.ndarray]:
+        """
+        Zero-copy access: (sequence, bid columns, ask columns) viewing the slot.
+
+        The views are only meaningful if `version()` still returns the same
+        even sequence after the caller is done with them.
+        """
+        i = self.slots[(exchange_id, pair)]
+        return int(self.header[i, SEQ]), self.levels[i, BID_PRICE:BID_SIZE + 1], self.levels[i, ASK_PRICE:ASK_SIZE + 1]
+
+    def snapshot(self, pairs: Optional[Iterable[str]] = None, max_age: float = 1.0,
+                 levels: Optional[int] = None) -> MarketSnapshot:
+        """
+        MarketSnapshot of the current books, ready for the strategies.
+
+        Books are read consistently per slot and handed over as OrderBooks;
+        ccxt dicts are only built for the books a consumer reads as dicts.
+        Slots whose timestamp is more than `max_age` seconds old are left out,
+        so a writer that stopped does not keep serving its last books, and the
+        snapshot is dated by its oldest book.
+        """
+        wanted = None if pairs is None else set(pairs)
+        oldest_ms = (time.time() - max_age) * 1000
+        books: Dict[BookKey, OrderBook] = {}
+        for exchange_id, pair in self.keys:
+            if wanted is not None and pair not in wanted:
+                continue
+            if self.header[self.slots[(exchange_id, pair)], TIMESTAMP] < oldest_ms:
+                continue  # Never written (0) or no longer updated
+            book = self.read(exchange_id, pair, levels)
+            if book is not None:
+                books[(exchange_id, pair)] = book
+        fetched_at = min(book.timestamp for book in books.values()) / 1000 if books else None
+        return MarketSnapshot.from_books(books, max_age=max_age, fetched_at=fetched_at)
+
+    def close(self):
+        """Detach from the shared memory (every process)."""
+        self.header = self.levels = None
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory (creator, once every process has closed it)."""
+        self.shm.unlink()